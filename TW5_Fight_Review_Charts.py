@@ -1,20 +1,16 @@
 from dataclasses import dataclass,field
 import os.path
-from os import listdir
 from enum import Enum
 from xlutils.copy import copy
-import json
 import datetime
-import gzip
 import math
 
 from collections import OrderedDict
+from TW5_log_loader import find_log_files, load_log
 
 #Change input_directory to match json log location
 input_directory = 'D:\\GW2Logs\\Output\\'
 
-files = listdir(input_directory)
-sorted_files = sorted(files)
 
 fileDate = datetime.datetime.now()
 #fileTid = fileDate.strftime('%Y%m%d%H%M')+"_Fight_Review.tid"
@@ -49,23 +45,13 @@ def buildStatData(player, fightSeconds, stat):
 
     
 FightReview = {}
-for filename in sorted_files:
-    # skip files of incorrect filetype
-    file_start, file_extension = os.path.splitext(filename)
-    #if args.filetype not in file_extension or "top_stats" in file_start:
-    if file_extension not in ['.json', '.gz'] or "top_stats" in file_start:
-        continue
-
+for filename in find_log_files(input_directory):
     print_string = "parsing "+filename
     print(print_string)
     file_path = "".join((input_directory,"/",filename))
 
-    if file_extension == '.gz':
-        with gzip.open(file_path, mode="r") as f:
-            json_data = json.loads(f.read().decode('utf-8'))
-    else:
-        json_datafile = open(file_path, encoding='utf-8')
-        json_data = json.load(json_datafile)    
+    json_data, load_stats = load_log(file_path)
+    print(load_stats)
     
 
     if 'usedExtensions' not in json_data:
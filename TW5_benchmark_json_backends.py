@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+#    TW5_benchmark_json_backends.py compares the json decoders available to TW5_log_loader on EI logs.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import argparse
+import os.path
+import sys
+import time
+import tracemalloc
+
+from TW5_log_loader import JSON_BACKENDS, LoadStats, decode_log, find_log_files, json_backend, projected_backend, read_log_bytes
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Compare the decoding time of all installed json backends on the EI logs in a directory.')
+	parser.add_argument('input_directory', help='Directory containing .json or .gz files from Elite Insights, use logs of the size you usually parse')
+	parser.add_argument('-r', '--repeat', dest="repeat", type=int, help="How often each log is decoded by each backend, the fastest run counts", default=3)
+	parser.add_argument('-p', '--projected', dest="projected", help="Also decode with the projection used for the top stats", default=False, action='store_true')
+	parser.add_argument('-m', '--memory', dest="memory", help="Also measure the peak memory of each decode, in one extra untimed run", default=False, action='store_true')
+	args = parser.parse_args()
+
+	if not os.path.isdir(args.input_directory):
+		print("Directory ",args.input_directory," is not a directory or does not exist!")
+		sys.exit()
+
+	projections = {'full': None}
+	if args.projected:
+		from TW5_parse_top_stats_tools import TOP_STATS_LOG_PROJECTION
+		projections['projected'] = TOP_STATS_LOG_PROJECTION
+
+	print("installed backends: "+", ".join(JSON_BACKENDS)+", default: "+json_backend+", default with projection: "+projected_backend)
+
+	total_bytes = 0
+	total_time = {(backend, mode): 0. for backend in JSON_BACKENDS for mode in projections}
+	peak_memory = {(backend, mode): 0 for backend in JSON_BACKENDS for mode in projections}
+	for filename in find_log_files(args.input_directory):
+		stats = LoadStats(filename)
+		buffer = read_log_bytes(os.path.join(args.input_directory, filename), stats)
+		total_bytes += stats.bytes_decoded
+		print_string = f"{filename}: {stats.bytes_decoded/1e6:.1f} MB"
+		for backend in JSON_BACKENDS:
+			for mode, projection in projections.items():
+				fastest = None
+				for _ in range(args.repeat):
+					start_time = time.perf_counter()
+					json_data = decode_log(buffer, projection, backend)
+					decode_time = time.perf_counter() - start_time
+					del json_data
+					if fastest is None or decode_time < fastest:
+						fastest = decode_time
+				total_time[(backend, mode)] += fastest
+				print_string += f" | {backend} {mode} {fastest:.3f}s"
+				if args.memory:
+					tracemalloc.start()
+					json_data = decode_log(buffer, projection, backend)
+					peak = tracemalloc.get_traced_memory()[1]
+					tracemalloc.stop()
+					del json_data
+					peak_memory[(backend, mode)] = max(peak_memory[(backend, mode)], peak)
+					print_string += f" {peak/1e6:.0f} MB"
+		print(print_string)
+
+	if total_bytes == 0:
+		print("ERROR: no logs found in "+args.input_directory)
+		sys.exit(1)
+
+	print("\nbackend   mode        time      MB/s"+("  peak MB" if args.memory else ""))
+	for (backend, mode), decode_time in sorted(total_time.items(), key=lambda item: item[1]):
+		print_string = f"{backend:<9} {mode:<9} {decode_time:>7.2f}s {total_bytes/1e6/max(decode_time, 1e-9):>8.1f}"
+		if args.memory:
+			print_string += f" {peak_memory[(backend, mode)]/1e6:>8.0f}"
+		print(print_string)
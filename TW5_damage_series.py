@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+#    TW5_damage_series.py computes on per second damage series of arcdps logs for the TW5 top stats scripts.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# A series is a list with one value per second (tick) of a fight. EI writes damage as cumulative
+# series, e.g. targetDamage1S, where tick t holds all damage done up to t. Everything here works on
+# whole series at once with builtins (map, zip, accumulate), so no python level loop runs per tick
+# and per player where it can be avoided. Integer damage gives exactly the same values as adding
+# up tick by tick.
+
+
+from dataclasses import dataclass, field
+from itertools import accumulate, islice
+import math
+from operator import add, sub
+
+
+def sum_series(series_list, num_ticks):
+	"""Return the tick by tick sum of all series in series_list, cut to num_ticks ticks."""
+	return [sum(tick_values) for tick_values in islice(zip(*series_list), num_ticks)]
+
+
+def get_per_tick(cumulative):
+	"""Return the damage of each tick of a cumulative series, the first tick keeps its value."""
+	return cumulative[:1] + list(map(sub, islice(cumulative, 1, None), cumulative))
+
+
+def get_tick_differences(cumulative):
+	"""Return cumulative[t + 1] - cumulative[t] for each tick but the last."""
+	return list(map(sub, islice(cumulative, 1, None), cumulative))
+
+
+def get_cumulative(per_tick):
+	"""Return the cumulative series of per tick values, the inverse of get_per_tick."""
+	return list(accumulate(per_tick))
+
+
+def get_prefix_sums(per_tick):
+	"""Return the sums of all ticks before each tick of a per tick series, and of the whole series as last value."""
+	prefix_sums = [0]
+	prefix_sums.extend(accumulate(per_tick))
+	return prefix_sums
+
+
+def sum_ticks(prefix_sums, start_tick, end_tick):
+	"""Return the sum of the ticks from start_tick up to end_tick of a series from its prefix sums, 0 for an empty range."""
+	if end_tick <= start_tick:
+		return 0
+	return prefix_sums[end_tick] - prefix_sums[start_tick]
+
+
+def moving_average(data, window_size):
+	"""
+	Return the average of the window_size values on both sides of each value, and the value itself.
+
+	The windows are cut at the ends of data. Each window is a difference of prefix sums, so this
+	takes the same time for any window_size.
+	"""
+	num_elements = len(data)
+	prefix_sums = get_prefix_sums(data)
+	ma = []
+	for n in range(num_elements):
+		min_tick = max(n - window_size, 0)
+		max_tick = min(n + window_size, num_elements - 1)
+		ma.append((prefix_sums[max_tick + 1] - prefix_sums[min_tick]) / (max_tick + 1 - min_tick))
+	return ma
+
+
+def get_coordination_damage(player_damage_ma, squad_damage_ma, squad_damage_ma_total, duration, coordination_damage=0):
+	"""
+	Add the damage of each tick weighted by the portion of all squad damage done in that tick to coordination_damage.
+
+	player_damage_ma and squad_damage_ma are the moving averages of the per tick damage of a player and the squad.
+	Ticks in which either did no damage are left out.
+	"""
+	for player_damage_on_tick, squad_damage_on_tick in zip(player_damage_ma, squad_damage_ma):
+		if player_damage_on_tick == 0 or squad_damage_on_tick == 0:
+			continue
+		coordination_damage += player_damage_on_tick * (squad_damage_on_tick / squad_damage_ma_total) * duration
+	return coordination_damage
+
+
+def get_window_maxima(cumulative, window_sizes):
+	"""
+	Return the most damage done within each of window_sizes ticks, from a cumulative series.
+
+	The damage of a window ending on tick t is cumulative[t] - cumulative[t - window_size].
+
+	Returns:
+		dict: most damage of a window by window size. Window sizes that don't fit into the series
+		are left out.
+	"""
+	window_maxima = {}
+	for window_size in window_sizes:
+		window_damage = list(map(sub, islice(cumulative, window_size, None), cumulative))
+		if window_damage:
+			window_maxima[window_size] = max(window_damage)
+	return window_maxima
+
+
+# This class stores the downs and deaths of an enemy as ticks, for the chunk and carrion damage
+# of all players on that enemy, see get_down_events
+@dataclass
+class DownEvents:
+	down_ticks: list = field(default_factory=list)           # tick of each down that counts for chunk damage
+	chunk_start_ticks: dict = field(default_factory=dict)    # window size -> tick each chunk damage window starts on, by down
+	carrion_ticks: list = field(default_factory=list)        # (down tick, death tick) of each down that ended in a death, by death
+
+
+def get_down_events(downs, deaths, window_sizes):
+	"""
+	Return the DownEvents of an enemy.
+
+	downs and deaths are the [start, end] lists in ms of combatReplayData. The chunk damage window
+	of a down starts window_size ticks before it, but never before the previous down. A down on the
+	same tick as the one before it (e.g. an elementalist in mist form) doesn't count. Carrion damage
+	counts from each down that ends on the start time of a death up to that death.
+	"""
+	events = DownEvents()
+	down_ends = {}
+	earliest_start_ticks = []
+	last_down_tick = None
+	for down_time, down_end in dict(downs).items():
+		down_tick = math.ceil(down_time / 1000)
+		if last_down_tick is None or last_down_tick != down_tick:
+			events.down_ticks.append(down_tick)
+			earliest_start_ticks.append(0 if last_down_tick is None else last_down_tick)
+		last_down_tick = down_tick
+		down_ends.setdefault(down_end, []).append(down_tick)
+	for window_size in window_sizes:
+		events.chunk_start_ticks[window_size] = [max(earliest_start_tick, down_tick - window_size) for down_tick, earliest_start_tick in zip(events.down_ticks, earliest_start_ticks)]
+	for death_time in dict(deaths):
+		for down_tick in down_ends.get(death_time, []):
+			events.carrion_ticks.append((down_tick, math.ceil(death_time / 1000)))
+	return events
+
+
+def get_window_damage(cumulative, start_ticks, end_ticks):
+	"""Return the damage of a cumulative series within all windows from start_ticks[i] to end_ticks[i] together."""
+	return sum(map(cumulative.__getitem__, end_ticks)) - sum(map(cumulative.__getitem__, start_ticks))
+
+
+def add_window_per_tick(per_tick_sum, per_tick, start_tick, end_tick):
+	"""
+	Add the values of per_tick from start_tick up to end_tick to the same ticks of per_tick_sum.
+
+	Ticks beyond the end of either list are left out, per_tick_sum keeps its length.
+	"""
+	end_tick = min(end_tick, len(per_tick_sum), len(per_tick))
+	per_tick_sum[start_tick:end_tick] = list(map(add, per_tick_sum[start_tick:end_tick], per_tick[start_tick:end_tick]))
+
+
+def add_damage_by_stacks(damage_by_stacks, states, damage_per_tick, prefix_sums):
+	"""
+	Add the damage done during each [start, end, stacks] state to damage_by_stacks[stacks].
+
+	Start and end are in ms, damage_per_tick is the damage of each second with its prefix_sums from
+	get_prefix_sums. A partly covered second counts with the covered portion. Stacks beyond the end of
+	damage_by_stacks count for its last entry. Damage before the first state counts for the first
+	state, damage after a state up to the next one (e.g. condis ticking while dead) or up to the end
+	of the fight counts for that state. Each state takes the same time regardless of its length.
+	"""
+	max_stacks = len(damage_by_stacks) - 1
+	for idx, [state_start, state_end, stacks] in enumerate(states):
+		start_sec = state_start / 1000
+		end_sec = state_end / 1000
+
+		start_sec_int = int(start_sec)
+		start_sec_rem = start_sec - start_sec_int
+
+		end_sec_int = int(end_sec)
+		end_sec_rem = end_sec - end_sec_int
+
+		if start_sec_int == end_sec_int:
+			damage_with_stacks = damage_per_tick[start_sec_int] * (end_sec - start_sec)
+		else:
+			damage_with_stacks = damage_per_tick[start_sec_int] * (1.0 - start_sec_rem)
+			damage_with_stacks += sum_ticks(prefix_sums, start_sec_int + 1, end_sec_int)
+			damage_with_stacks += damage_per_tick[end_sec_int] * end_sec_rem
+
+		if idx == 0:
+			# damage before the first state
+			damage_with_stacks += damage_per_tick[start_sec_int] * (start_sec_rem)
+			damage_with_stacks += sum_ticks(prefix_sums, 0, start_sec_int)
+		if idx == len(states) - 1:
+			# not elif, a single state is both the first and the last one
+			# damage after the last state
+			damage_with_stacks += damage_per_tick[end_sec_int] * (1.0 - end_sec_rem)
+			damage_with_stacks += sum_ticks(prefix_sums, end_sec_int + 1, len(damage_per_tick))
+		elif state_end != states[idx + 1][0]:
+			# damage up to the next state
+			next_state_sec = states[idx + 1][0] / 1000
+			next_start_sec_int = int(next_state_sec)
+			next_start_sec_rem = next_state_sec - next_start_sec_int
+
+			damage_with_stacks += damage_per_tick[end_sec_int] * (1.0 - end_sec_rem)
+			damage_with_stacks += sum_ticks(prefix_sums, end_sec_int + 1, next_start_sec_int)
+			damage_with_stacks += damage_per_tick[next_start_sec_int] * (next_start_sec_rem)
+
+		damage_by_stacks[min(stacks, max_stacks)] += damage_with_stacks
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+#    TW5_intervals.py provides operations on time intervals of arcdps logs for the TW5 top stats scripts.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# An interval list is a list of [start, end, *values] lists sorted by start, e.g. the [start, end, stacks]
+# states of a buff or the [start, end] combat time breakpoints of a player, usually in ms. Intervals in
+# one list don't overlap unless stated otherwise. All operations walk their inputs once in order, so
+# they take linear time in the number of intervals.
+
+
+def split_states(states, duration):
+	"""
+	Turn EI [time, value] states into [start, end, value] intervals that end at the next state.
+
+	The last state lasts until duration, states starting at or after duration are left out.
+	"""
+	intervals = []
+	num_states = len(states) - 1
+	for index, [start, value] in enumerate(states):
+		if index == num_states:
+			if start < duration:
+				intervals.append([start, duration, value])
+		else:
+			intervals.append([start, min(states[index + 1][0], duration), value])
+	return intervals
+
+
+def get_on_off_intervals(states):
+	"""
+	Return the [start, end] intervals of EI [time, value] states of a buff that is either on (1) or off (0).
+
+	Each time the buff goes off closes the interval opened when it last went on, repeated on or off
+	states don't start or end another one. The intervals are sorted and don't overlap, so they can be
+	used with intersect. A buff that never goes off again has no last interval.
+	"""
+	intervals = []
+	start = None
+	for time, value in states:
+		if value == 1:
+			if start is None:
+				start = time
+		elif value == 0:
+			if start is not None and time > start:
+				intervals.append([start, time])
+			start = None
+	return intervals
+
+
+def intersect(intervals, other):
+	"""
+	Return the parts of intervals that lie within any interval of other, with the values of intervals.
+
+	An interval that spans several intervals of other is cut into one part for each of them, e.g.
+	intersect(states, breakpoints) clips buff states to the times a player was in combat.
+	"""
+	intersection = []
+	index = 0
+	other_index = 0
+	while index < len(intervals) and other_index < len(other):
+		interval = intervals[index]
+		other_start, other_end = other[other_index][0], other[other_index][1]
+		new_start = max(interval[0], other_start)
+		new_end = min(interval[1], other_end)
+		if new_end > new_start:
+			intersection.append([new_start, new_end, *interval[2:]])
+		# move on with whichever ends first, the other one may still overlap the next interval
+		if interval[1] <= other_end:
+			index += 1
+		else:
+			other_index += 1
+	return intersection
+
+
+def measure(intervals):
+	"""Return the total length of intervals."""
+	return sum(interval[1] - interval[0] for interval in intervals)
@@ -0,0 +1,686 @@
+#!/usr/bin/env python3
+
+#    TW5_log_loader.py reads arcdps logs as written by Elite Insights for the TW5 top stats scripts.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
+import io
+import os
+import os.path
+from os import listdir
+import bz2
+import gzip
+import lzma
+import tarfile
+import threading
+import zipfile
+import json
+import json.decoder
+import json.scanner
+import re
+import time
+
+# Codecs of single logs by file extension: the name shown in LoadStats and a function that wraps
+# the raw binary file into a decompressing stream (None for plain json). gzip, bzip2 and xz come
+# with python, zstd and lz4 are added when the zstandard and lz4 packages are installed.
+LOG_CODECS = {
+	'.json': ('json', None),
+	'.gz': ('gzip', lambda raw_file: gzip.GzipFile(fileobj=raw_file, mode='rb')),
+	'.bz2': ('bzip2', lambda raw_file: bz2.BZ2File(raw_file, mode='rb')),
+	'.xz': ('xz', lambda raw_file: lzma.LZMAFile(raw_file, mode='rb')),
+}
+try:
+	import zstandard
+	LOG_CODECS['.zst'] = ('zstd', lambda raw_file: zstandard.ZstdDecompressor().stream_reader(raw_file))
+except ImportError:
+	pass
+try:
+	import lz4.frame
+	LOG_CODECS['.lz4'] = ('lz4', lambda raw_file: lz4.frame.LZ4FrameFile(raw_file, mode='rb'))
+except ImportError:
+	pass
+
+# Extensions of Elite Insights output that are picked up from the input directory
+LOG_EXTENSIONS = list(LOG_CODECS)
+
+# Codecs that need an optional package, by extension. Logs using them are skipped with a warning when it is missing.
+OPTIONAL_LOG_CODECS = {'.zst': 'zstandard', '.lz4': 'lz4'}
+
+# Archives in the input directory whose logs are read in place. Their members are named
+# "<archive>/<member>", e.g. "week_12.zip/20240321-203502_wvw_kill.json.gz".
+ARCHIVE_EXTENSIONS = ['.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz']
+
+# Tar archives whose content is compressed as a whole, see TarReader
+COMPRESSED_TAR_EXTENSIONS = ['.tar.gz', '.tgz', '.tar.bz2', '.tar.xz']
+
+# Maximum size of the members of a compressed tar that are kept in memory after they were passed while
+# reading a later member, e.g. when the logs are read by several prefetch threads
+TAR_READ_AHEAD_MEMORY = 128 * 1024 * 1024
+
+# Expected compression ratio of json logs, used to size the read buffer when the codec does not store the size
+COMPRESSION_RATIO_HINT = 8
+
+# Expected memory of a decoded log relative to the size of its json text, used to budget the logs loaded ahead.
+# The parts of an EI log kept for the top stats take about 2 to 6 times the size of the whole text once decoded.
+DECODED_SIZE_RATIO = 4
+
+# Size of a single read from disk or from the decompressing stream
+READ_CHUNK_SIZE = 1024 * 1024
+
+# Tokens that matter when skipping over a json value: strings (which may contain brackets) and brackets
+SKIP_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]')
+# A json string, number, true, false or null
+SKIP_SCALAR = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[^,\]}\s]+')
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# Keys read by probe_log_header. The top level keys are only matched at the top level of the log, see
+# find_top_level_values. notInSquad only exists on players and enemyPlayer only on targets.
+HEADER_TOP_LEVEL_KEYS = {
+	b'"durationMS"': re.compile(rb'\s*:\s*(\d+)'),
+	b'"timeStartStd"': re.compile(rb'\s*:\s*"([^"]*)"'),
+	b'"timeEndStd"': re.compile(rb'\s*:\s*"([^"]*)"'),
+}
+HEADER_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]')
+# EI writes the top level values before the targets and players, logs without them in the first bytes are decoded
+HEADER_SCAN_LIMIT = 1024 * 1024
+HEADER_NOT_IN_SQUAD = re.compile(rb'"notInSquad"\s*:\s*(true|false)')
+HEADER_ENEMY_PLAYER = re.compile(rb'"enemyPlayer"\s*:\s*true')
+
+# Json decoders that can be used for the logs, by name. Each takes the text of a log as str or bytes-like
+# object and returns the decoded data. The stdlib decoder is always available, faster ones are added when installed.
+def without_bytearray(loads):
+	"""Wrap a decoder that only accepts str and bytes."""
+	def wrapped_loads(buffer):
+		if isinstance(buffer, bytearray):
+			buffer = bytes(buffer)
+		return loads(buffer)
+	return wrapped_loads
+
+JSON_BACKENDS = {'json': json.loads}
+try:
+	import orjson
+	JSON_BACKENDS['orjson'] = orjson.loads
+except ImportError:
+	pass
+try:
+	import simdjson
+	JSON_BACKENDS['simdjson'] = without_bytearray(simdjson.loads)
+except ImportError:
+	pass
+try:
+	import ujson
+	JSON_BACKENDS['ujson'] = without_bytearray(ujson.loads)
+except ImportError:
+	pass
+
+# Preferred order of the decoders, the first installed one is used unless the TW5_JSON_BACKEND
+# environment variable names another one or set_json_backend is called
+JSON_BACKEND_PREFERENCE = ['orjson', 'simdjson', 'ujson', 'json']
+json_backend = next(name for name in JSON_BACKEND_PREFERENCE if name in JSON_BACKENDS)
+# Decoder used for loads with a projection. Only the stdlib decoder never builds the skipped parts, the others
+# decode the whole log before it is pruned, which takes several times the memory for a large log.
+# A decoder named in TW5_JSON_BACKEND or given to set_json_backend is used for these loads as well.
+projected_backend = 'json'
+requested_backend = os.environ.get('TW5_JSON_BACKEND')
+if requested_backend in JSON_BACKENDS:
+	json_backend = requested_backend
+	projected_backend = requested_backend
+elif requested_backend:
+	print("WARNING: json backend "+requested_backend+" from TW5_JSON_BACKEND is not installed, using "+json_backend)
+
+
+# This class stores the IO and decode cost of loading one log
+@dataclass
+class LoadStats:
+	filename: str = ""
+	bytes_read: int = 0          # bytes read from disk (compressed size for compressed logs and archive members)
+	bytes_decoded: int = 0       # bytes of json text handed to the decoder
+	read_time: float = 0.        # seconds spent reading and decompressing
+	decode_time: float = 0.      # seconds spent decoding the json text
+	backend: str = ""            # name of the json decoder used
+	codec: str = ""              # how the json text was stored, see get_log_codec
+
+	def __str__(self):
+		return "loaded {}: {:,} bytes read, {:,} bytes decoded, read {:.2f}s ({}, {:.1f} MB/s), decode {:.2f}s ({})".format(
+			self.filename, self.bytes_read, self.bytes_decoded, self.read_time, self.codec,
+			get_throughput(self.bytes_decoded, self.read_time), self.decode_time, self.backend)
+
+
+# This class stores the few values of a log that decide whether a fight is used, see probe_log_header
+@dataclass
+class LogHeader:
+	duration_ms: int = 0
+	time_start_std: str = ""
+	time_end_std: str = ""
+	num_players: int = 0         # all allied players, in and out of squad
+	num_squad: int = 0
+	num_enemies: int = 0         # enemy players among the targets
+
+
+def get_throughput(num_bytes, seconds):
+	"""Return num_bytes per seconds in MB/s."""
+	return num_bytes / 1e6 / seconds if seconds > 0 else 0.
+
+
+def get_archive_extension(filename):
+	"""Return the entry of ARCHIVE_EXTENSIONS that filename ends with, or None for other files."""
+	for archive_extension in ARCHIVE_EXTENSIONS:
+		if filename.lower().endswith(archive_extension):
+			return archive_extension
+	return None
+
+
+def is_log_name(filename):
+	"""Return whether filename looks like an EI log, skipping our own top_stats output."""
+	file_start, file_extension = os.path.splitext(os.path.basename(filename))
+	return file_extension in LOG_EXTENSIONS and "top_stats" not in file_start
+
+
+def get_missing_codec_package(filename):
+	"""Return the package needed to read filename if it is a log in a codec that is not installed, else None."""
+	file_start, file_extension = os.path.splitext(os.path.basename(filename))
+	if file_extension in LOG_EXTENSIONS or "top_stats" in file_start:
+		return None
+	return OPTIONAL_LOG_CODECS.get(file_extension)
+
+
+# This class reads the members of a tar archive. The archive is scanned once for its members, so a member
+# is found without reading all headers before it again. A compressed tar can only be read front to back,
+# so its members are read from one decompressing stream that is kept open and only moves forward. Reading
+# the members in the order they are stored decompresses the archive a single time, nothing is written to disk.
+class TarReader:
+	def __init__(self, archive_path, key):
+		self.archive_path = archive_path
+		self.key = key                     # (mtime, size) of the archive when it was scanned
+		with tarfile.open(archive_path, 'r:*') as archive:
+			self.members = {member.name: member for member in archive.getmembers() if member.isfile()}
+		self.stored_order = sorted(self.members.values(), key=lambda member: member.offset_data)
+		self.compressed = get_archive_extension(archive_path) in COMPRESSED_TAR_EXTENSIONS
+		self.lock = threading.Lock()
+		self.archive = None                # the open archive of a compressed tar
+		self.position = 0                  # offset in the tar stream after the last member read from it
+		self.unread = set(name for name in self.members if is_log_name(name))
+		self.read_ahead = {}               # bytes of unread logs passed while reading a later member, by name
+		self.read_ahead_size = 0
+
+	def read_member(self, name):
+		"""Return the stored bytes of the member called name of a compressed tar."""
+		with self.lock:
+			self.unread.discard(name)
+			if name in self.read_ahead:
+				data = self.read_ahead.pop(name)
+				self.read_ahead_size -= len(data)
+			else:
+				info = self.members[name]
+				if self.archive is None or info.offset_data < self.position:
+					# member was passed already, start over
+					self.close()
+					self.archive = tarfile.open(self.archive_path, 'r:*')
+				for passed in self.stored_order:
+					if self.position <= passed.offset_data < info.offset_data and passed.name in self.unread and self.read_ahead_size + passed.size <= TAR_READ_AHEAD_MEMORY:
+						self.read_ahead[passed.name] = self.archive.extractfile(passed).read()
+						self.read_ahead_size += passed.size
+				data = self.archive.extractfile(info).read()
+				self.position = info.offset_data + info.size
+			if not self.unread:
+				self.close()
+			return data
+
+	def close(self):
+		if self.archive is not None:
+			self.archive.close()
+			self.archive = None
+		self.position = 0
+
+
+# TarReader of the tar archives read so far by archive path, see get_tar_reader
+tar_readers = {}
+tar_readers_lock = threading.Lock()
+
+
+def get_tar_reader(archive_path):
+	"""Return the TarReader of the tar archive at archive_path, a new one if the archive changed since it was last read."""
+	archive_stat = os.stat(archive_path)
+	key = (archive_stat.st_mtime_ns, archive_stat.st_size)
+	with tar_readers_lock:
+		reader = tar_readers.get(archive_path)
+		if reader is None or reader.key != key:
+			if reader is not None:
+				with reader.lock:
+					reader.close()
+			reader = TarReader(archive_path, key)
+			tar_readers[archive_path] = reader
+		return reader
+
+
+def list_archive_logs(archive_path):
+	"""Return the sorted names of all files stored in the zip or tar archive at archive_path."""
+	if get_archive_extension(archive_path) == '.zip':
+		with zipfile.ZipFile(archive_path) as archive:
+			names = [info.filename for info in archive.infolist() if not info.is_dir()]
+	else:
+		names = list(get_tar_reader(archive_path).members)
+	return sorted(names)
+
+
+def find_log_files(input_directory):
+	"""
+	Return the sorted file names of all EI logs in input_directory, skipping our own top_stats output.
+
+	Logs inside zip and tar archives are listed as "<archive>/<member>", so they are read in place
+	without unpacking the archive first. Logs in a codec whose package is not installed are skipped with a warning.
+	"""
+	log_files = []
+	missing_packages = {}
+	for filename in sorted(listdir(input_directory)):
+		names = [filename]
+		if get_archive_extension(filename):
+			try:
+				names = [filename+"/"+member for member in list_archive_logs(os.path.join(input_directory, filename))]
+			except (zipfile.BadZipFile, tarfile.TarError, OSError) as error:
+				print("WARNING: could not read archive "+filename+": "+str(error))
+				continue
+		for name in names:
+			package = get_missing_codec_package(name)
+			if package:
+				missing_packages[package] = missing_packages.get(package, 0) + 1
+			elif is_log_name(name):
+				log_files.append(name)
+	for package, count in missing_packages.items():
+		print("WARNING: skipped "+str(count)+" logs that need the "+package+" package, install it with: pip3 install "+package)
+	return log_files
+
+
+def split_archive_path(file_path):
+	"""Split file_path into the path of the archive and the member name if it points into an archive, else return (file_path, None)."""
+	parts = file_path.replace("\\", "/").split("/")
+	for index in range(len(parts) - 1):
+		if get_archive_extension(parts[index]):
+			archive_path = "/".join(parts[:index + 1])
+			if os.path.isfile(archive_path):
+				return archive_path, "/".join(parts[index + 1:])
+	return file_path, None
+
+
+def get_log_codec(file_path):
+	"""Return the name of the codec of file_path, prefixed with the archive type for archive members, e.g. "zip:gzip"."""
+	archive_path, member = split_archive_path(file_path)
+	codec = LOG_CODECS.get(os.path.splitext(member or file_path)[1].lower(), LOG_CODECS['.json'])[0]
+	if member is None:
+		return codec
+	return get_archive_extension(archive_path).lstrip('.')+":"+codec
+
+
+def open_raw_log(file_path, exit_stack):
+	"""
+	Open the still compressed bytes of a log, which can be a file or a member of an archive.
+
+	Returns:
+		tuple: the binary stream, the number of bytes it yields and the number of bytes stored on disk
+		for it. All opened files are closed by exit_stack.
+	"""
+	archive_path, member = split_archive_path(file_path)
+	if member is None:
+		raw_file = exit_stack.enter_context(open(file_path, 'rb'))
+		size = os.fstat(raw_file.fileno()).st_size
+		return raw_file, size, size
+	if get_archive_extension(archive_path) == '.zip':
+		archive = exit_stack.enter_context(zipfile.ZipFile(archive_path))
+		info = archive.getinfo(member)
+		# the zip stream is already inflated, compress_size is what is stored on disk
+		return exit_stack.enter_context(archive.open(info)), info.file_size, info.compress_size
+	# tar members are stored uncompressed in the (possibly compressed) tar stream, see TarReader
+	reader = get_tar_reader(archive_path)
+	info = reader.members[member]
+	if reader.compressed:
+		return io.BytesIO(reader.read_member(member)), info.size, info.size
+	archive = exit_stack.enter_context(tarfile.open(archive_path, 'r:'))
+	return exit_stack.enter_context(archive.extractfile(info)), info.size, info.size
+
+
+def get_uncompressed_size(file_path):
+	"""
+	Return the size of the json text in file_path, used to presize the read buffer.
+
+	The size is exact for plain json and .gz files, where it is read from the gzip trailer. For other
+	codecs it is estimated from the compressed size with COMPRESSION_RATIO_HINT.
+	"""
+	archive_path, member = split_archive_path(file_path)
+	if member is None:
+		return get_size_hint(file_path, os.path.getsize(file_path))
+	if get_archive_extension(archive_path) == '.zip':
+		with zipfile.ZipFile(archive_path) as archive:
+			return get_size_hint(file_path, archive.getinfo(member).file_size)
+	return get_size_hint(file_path, get_tar_reader(archive_path).members[member].size)
+
+
+def get_size_hint(file_path, raw_size):
+	"""Return the size of the json text in file_path, given the size of its still compressed stream."""
+	archive_path, member = split_archive_path(file_path)
+	extension = os.path.splitext(member or file_path)[1].lower()
+	if member is None and extension == '.gz':
+		# gzip stores the uncompressed size modulo 2**32 in the last four bytes
+		with open(file_path, 'rb') as raw_file:
+			raw_file.seek(-4, os.SEEK_END)
+			return int.from_bytes(raw_file.read(4), 'little')
+	if LOG_CODECS.get(extension, LOG_CODECS['.json'])[1] is None:
+		return raw_size
+	return raw_size * COMPRESSION_RATIO_HINT
+
+
+def read_log_bytes(file_path, stats):
+	"""
+	Read the json text of a log into a single presized buffer.
+
+	The log can be plain json, compressed with any codec in LOG_CODECS, or a member of a zip or tar
+	archive as listed by find_log_files. It is read in READ_CHUNK_SIZE pieces straight into the
+	final buffer, so no intermediate copy of the whole file is made before decoding.
+	"""
+	start_time = time.perf_counter()
+	extension = os.path.splitext(split_archive_path(file_path)[1] or file_path)[1].lower()
+	open_codec = LOG_CODECS.get(extension, LOG_CODECS['.json'])[1]
+	filled = 0
+	with ExitStack() as exit_stack:
+		raw_file, raw_size, stats.bytes_read = open_raw_log(file_path, exit_stack)
+		buffer = bytearray(get_size_hint(file_path, raw_size))
+		stream = exit_stack.enter_context(open_codec(raw_file)) if open_codec else raw_file
+		while True:
+			if filled == len(buffer):
+				# size hint was too small (estimated size, multi member gzip or > 4 GB), grow by half
+				buffer.extend(bytes(max(READ_CHUNK_SIZE, len(buffer) // 2)))
+			with memoryview(buffer) as view:
+				count = stream.readinto(view[filled:filled + READ_CHUNK_SIZE])
+			if not count:
+				break
+			filled += count
+	del buffer[filled:]
+	stats.bytes_decoded = filled
+	stats.read_time = time.perf_counter() - start_time
+	stats.codec = get_log_codec(file_path)
+	return buffer
+
+
+def summarize_load_stats(all_stats):
+	"""Return one line per codec with the number of logs, bytes read and the read throughput over all_stats."""
+	totals = {}
+	for stats in all_stats:
+		total = totals.setdefault(stats.codec, [0, 0, 0, 0., 0.])
+		total[0] += 1
+		total[1] += stats.bytes_read
+		total[2] += stats.bytes_decoded
+		total[3] += stats.read_time
+		total[4] += stats.decode_time
+	lines = []
+	for codec, (num_logs, bytes_read, bytes_decoded, read_time, decode_time) in sorted(totals.items()):
+		lines.append("{}: {} logs, {:,} bytes read, {:,} bytes of json, read {:.2f}s ({:.1f} MB/s), decode {:.2f}s".format(
+			codec, num_logs, bytes_read, bytes_decoded, read_time, get_throughput(bytes_decoded, read_time), decode_time))
+	return lines
+
+
+# Decodes only the parts of a json document selected by a projection.
+#
+# A projection describes which parts of the log are materialized as python objects:
+#   True  - decode the value as a whole
+#   False - skip the value, the key is left out of the result
+#   dict  - decode an object key by key, each key is looked up in the dict. The '*' entry is used for
+#           keys that are not listed and defaults to False. Applied to a list, the dict is used for every element.
+# Skipped values are only scanned for their end, so they never exist as python objects.
+class ProjectedDecoder:
+	def __init__(self, text):
+		self.text = text
+		self.scan_once = json.scanner.make_scanner(json.JSONDecoder())
+
+	def decode(self, projection):
+		value, end = self.decode_value(self.skip_whitespace(0), projection)
+		if self.skip_whitespace(end) != len(self.text):
+			raise json.JSONDecodeError("Extra data", self.text, end)
+		return value
+
+	def skip_whitespace(self, index):
+		return WHITESPACE.match(self.text, index).end()
+
+	def decode_value(self, index, projection):
+		if projection is True or not isinstance(projection, dict):
+			try:
+				return self.scan_once(self.text, index)
+			except StopIteration as err:
+				raise json.JSONDecodeError("Expecting value", self.text, err.value) from None
+		char = self.text[index:index + 1]
+		if char == '{':
+			return self.decode_object(index + 1, projection)
+		if char == '[':
+			return self.decode_array(index + 1, projection)
+		# a scalar where the projection expected a container, decode it as it is
+		return self.decode_value(index, True)
+
+	def decode_object(self, index, projection):
+		text = self.text
+		result = {}
+		index = self.skip_whitespace(index)
+		if text[index:index + 1] == '}':
+			return result, index + 1
+		default = projection.get('*', False)
+		while True:
+			if text[index:index + 1] != '"':
+				raise json.JSONDecodeError("Expecting property name enclosed in double quotes", text, index)
+			key, index = json.decoder.scanstring(text, index + 1)
+			index = self.skip_whitespace(index)
+			if text[index:index + 1] != ':':
+				raise json.JSONDecodeError("Expecting ':' delimiter", text, index)
+			index = self.skip_whitespace(index + 1)
+			key_projection = projection.get(key, default)
+			if key_projection is False:
+				index = self.skip_value(index)
+			else:
+				result[key], index = self.decode_value(index, key_projection)
+			index = self.skip_whitespace(index)
+			char = text[index:index + 1]
+			if char == '}':
+				return result, index + 1
+			if char != ',':
+				raise json.JSONDecodeError("Expecting ',' delimiter", text, index)
+			index = self.skip_whitespace(index + 1)
+
+	def decode_array(self, index, projection):
+		text = self.text
+		result = []
+		index = self.skip_whitespace(index)
+		if text[index:index + 1] == ']':
+			return result, index + 1
+		while True:
+			value, index = self.decode_value(index, projection)
+			result.append(value)
+			index = self.skip_whitespace(index)
+			char = text[index:index + 1]
+			if char == ']':
+				return result, index + 1
+			if char != ',':
+				raise json.JSONDecodeError("Expecting ',' delimiter", text, index)
+			index = self.skip_whitespace(index + 1)
+
+	def skip_value(self, index):
+		"""Return the index after the json value starting at index without decoding it."""
+		if self.text[index:index + 1] not in ('{', '['):
+			match = SKIP_SCALAR.match(self.text, index)
+			if match is None:
+				raise json.JSONDecodeError("Expecting value", self.text, index)
+			return match.end()
+		depth = 0
+		for token in SKIP_TOKEN.finditer(self.text, index):
+			char = token.group()[0]
+			if char in '[{':
+				depth += 1
+			elif char in ']}':
+				depth -= 1
+				if depth == 0:
+					return token.end()
+		raise json.JSONDecodeError("Unterminated value", self.text, index)
+
+
+def find_top_level_values(buffer, patterns):
+	"""
+	Find the values of the keys in patterns at the top level of the json object in buffer, without decoding it.
+
+	Only strings and brackets are scanned, up to HEADER_SCAN_LIMIT bytes and only until all keys are found.
+
+	Args:
+		buffer (bytes): json text of the log.
+		patterns (dict): compiled pattern by quoted key, matched right after the key. Its first group is the value.
+
+	Returns:
+		dict: the first group of the match by quoted key, for the keys that were found.
+	"""
+	values = {}
+	depth = 0
+	for token in HEADER_TOKEN.finditer(buffer, 0, HEADER_SCAN_LIMIT):
+		text = token.group()
+		if text[:1] == b'"':
+			if depth == 1 and text in patterns and text not in values:
+				match = patterns[text].match(buffer, token.end())
+				if match is not None:
+					values[text] = match.group(1)
+					if len(values) == len(patterns):
+						break
+		elif text in (b'[', b'{'):
+			depth += 1
+		else:
+			depth -= 1
+	return values
+
+
+def probe_log_header(buffer):
+	"""
+	Read the fight duration and the number of allies and enemies from the json text of a log without decoding it.
+
+	Returns:
+		LogHeader: the values found, or None if the log doesn't contain them in the expected form.
+	"""
+	values = find_top_level_values(buffer, HEADER_TOP_LEVEL_KEYS)
+	if len(values) < len(HEADER_TOP_LEVEL_KEYS):
+		return None
+	not_in_squad = HEADER_NOT_IN_SQUAD.findall(buffer)
+	header = LogHeader()
+	header.duration_ms = int(values[b'"durationMS"'])
+	header.time_start_std = values[b'"timeStartStd"'].decode('utf-8')
+	header.time_end_std = values[b'"timeEndStd"'].decode('utf-8')
+	header.num_players = len(not_in_squad)
+	header.num_squad = not_in_squad.count(b'false')
+	header.num_enemies = sum(1 for _ in HEADER_ENEMY_PLAYER.finditer(buffer))
+	return header
+
+
+def set_json_backend(name):
+	"""Use the json decoder called name for all following loads, with or without a projection."""
+	global json_backend, projected_backend
+	if name not in JSON_BACKENDS:
+		raise ValueError("json backend {} is not installed, available: {}".format(name, ", ".join(JSON_BACKENDS)))
+	json_backend = name
+	projected_backend = name
+
+
+def prune_projected(data, projection):
+	"""Remove the parts of already decoded data that are not selected by projection, in place."""
+	if not isinstance(projection, dict):
+		return
+	if isinstance(data, list):
+		for item in data:
+			prune_projected(item, projection)
+	elif isinstance(data, dict):
+		default = projection.get('*', False)
+		for key in list(data):
+			key_projection = projection.get(key, default)
+			if key_projection is False:
+				del data[key]
+			else:
+				prune_projected(data[key], key_projection)
+
+
+def decode_log(buffer, projection=None, backend=None, stats=None):
+	"""
+	Decode the json text in buffer, keeping only the parts selected by projection if one is given.
+
+	The stdlib decoder never materializes the skipped parts, so it is used for projections unless another
+	backend is chosen (see projected_backend). Other backends decode the whole log with their faster decoder
+	and drop the skipped parts afterwards, at a much higher peak memory. The decode time and backend are noted
+	in stats if given.
+	"""
+	if backend is None:
+		backend = json_backend if projection is None else projected_backend
+	start_time = time.perf_counter()
+	if projection is None:
+		json_data = JSON_BACKENDS[backend](buffer)
+	elif backend == 'json':
+		text = buffer.decode(json.detect_encoding(buffer))
+		json_data = ProjectedDecoder(text).decode(projection)
+	else:
+		json_data = JSON_BACKENDS[backend](buffer)
+		prune_projected(json_data, projection)
+	if stats is not None:
+		stats.decode_time = time.perf_counter() - start_time
+		stats.backend = backend
+	return json_data
+
+
+def load_log(file_path, projection=None):
+	"""
+	Open, decompress and decode an EI log exactly once.
+
+	Args:
+		file_path (str): path of the log, see read_log_bytes.
+		projection (dict): the parts of the log to decode, see ProjectedDecoder. Decodes everything if None.
+
+	Returns:
+		tuple: the decoded json data and the LoadStats for this file.
+	"""
+	stats = LoadStats(os.path.basename(split_archive_path(file_path)[1] or file_path))
+	buffer = read_log_bytes(file_path, stats)
+	json_data = decode_log(buffer, projection, stats=stats)
+	return json_data, stats
+
+
+def prefetch_logs(file_paths, load, lookahead=2, memory_limit=512 * 1024 * 1024):
+	"""
+	Yield load(file_path) for all file_paths in order, running load for the next files in background threads.
+
+	Reading and decompressing the next logs overlaps with whatever the caller does with the current one.
+	At most lookahead files are loaded ahead, using no more than memory_limit bytes once decoded, except that
+	the next file is always loaded. The memory of a decoded log is estimated as DECODED_SIZE_RATIO times the
+	size of its json text (see get_uncompressed_size). With a lookahead below 1 everything is loaded in the
+	calling thread.
+	"""
+	if lookahead < 1:
+		for file_path in file_paths:
+			yield load(file_path)
+		return
+
+	with ThreadPoolExecutor(max_workers=lookahead) as executor:
+		pending = deque()
+		queued_bytes = 0
+		next_index = 0
+		while next_index < len(file_paths) or pending:
+			while next_index < len(file_paths) and len(pending) < lookahead:
+				size = get_uncompressed_size(file_paths[next_index]) * DECODED_SIZE_RATIO
+				if pending and queued_bytes + size > memory_limit:
+					break
+				pending.append((executor.submit(load, file_paths[next_index]), size))
+				queued_bytes += size
+				next_index += 1
+			future, size = pending.popleft()
+			queued_bytes -= size
+			yield future.result()
@@ -30,8 +30,10 @@ import xlwt
 from collections import OrderedDict
 from TW5_parse_top_stats_tools import *
 
-if __name__ == '__main__':
-	parser = argparse.ArgumentParser(description='This reads a set of arcdps reports in xml format and generates top stats.')
+
+# Command line options of the detailed top stats, also used by TW5_watch_top_stats.py
+def create_argument_parser(description='This reads a set of arcdps reports in xml format and generates top stats.'):
+	parser = argparse.ArgumentParser(description=description)
 	parser.add_argument('input_directory', help='Directory containing .xml or .json files from arcdps reports')
 	parser.add_argument('-o', '--output', dest="output_filename", help="Text file to write the computed top stats")
 	#parser.add_argument('-f', '--input_filetype', dest="filetype", help="filetype of input files. Currently supports json and xml, defaults to json.", default="json")
@@ -40,13 +42,16 @@ if __name__ == '__main__':
 	parser.add_argument('-l', '--log_file', dest="log_file", help="Logging file with all the output")
 	parser.add_argument('-c', '--config_file', dest="config_file", help="Config file with all the settings", default="TW5_parser_config_detailed")
 	parser.add_argument('-a', '--anonymized', dest="anonymize", help="Create an anonymized version of the top stats. All account and character names will be replaced.", default=False, action='store_true')
-	args = parser.parse_args()
+	parser.add_argument('--jobs', dest="jobs", type=int, help="Number of processes used to parse the logs. The result is the same for any number of jobs.", default=1)
+	parser.add_argument('--prefetch', dest="prefetch", type=int, help="Number of logs read and decoded ahead in background threads while parsing without --jobs, 0 to disable.", default=2)
+	parser.add_argument('--prefetch_memory', dest="prefetch_memory", type=int, help="Maximum memory in MB of all logs read and decoded ahead, estimated from the size of their json text, see --prefetch.", default=512)
+	parser.add_argument('--cache_dir', dest="cache_dir", help="Directory to cache the data extracted from each log in. Reruns on the same logs only redo the output, unless the config changes what is extracted.", default=None)
+	parser.add_argument('--state_file', dest="state_file", help="File to save the collected stats in. The next run with the same file only parses the logs added to the input directory since.", default=None)
+	return parser
 
-	myDate = datetime.datetime.now()
 
-	if not os.path.isdir(args.input_directory):
-		print("Directory ",args.input_directory," is not a directory or does not exist!")
-		sys.exit()
+# Fill in the default names of the output files, stamped with myDate, and put them in the input directory
+def set_output_filenames(args, myDate):
 	if args.output_filename is None:
 		args.output_filename = args.input_directory+"/TW5_top_stats_detailed_"+myDate.strftime("%Y%m%d%H%M")+".tid"
 	else:
@@ -58,23 +63,18 @@ if __name__ == '__main__':
 	if args.log_file is None:
 		args.log_file = args.input_directory+"/log_detailed_"+myDate.strftime("%Y%m%d%H%M")+".txt"
 
-	output = open(args.output_filename, "w",encoding="utf-8")
-	log = open(args.log_file, "w")
-
-	parser_config = importlib.import_module("parser_configs."+args.config_file , package=None) 
-	
-	config = fill_config(parser_config)
 
-	if config.use_PlenBot:
-		PlenBotPath = config.PlenBotPath
-		getPlenBotLogs(PlenBotPath)
-		
-	print_string = "Using input directory "+args.input_directory+", writing output to "+args.output_filename+" and log to "+args.log_file
-	print(print_string)
-	print_string = "Considering fights with at least "+str(config.min_allied_players)+" allied players and at least "+str(config.min_enemy_players)+" enemies that took longer than "+str(config.min_fight_duration)+" s."
-	print_to_file(log, print_string)
+# Write the .tid, .xls and .json top stats and the charts.
+# Input:
+# args = cmd line arguments with the output file names, see set_output_filenames
+# config = configuration to use for top stats computation
+# log = log file to write to
+# myDate = time stamp of this output
+# stat_data = the collected stats as returned by collect_stat_data
+def write_top_stats(args, config, log, myDate, stat_data):
+	players, fights, found_healing, found_barrier, squad_comp, party_comp, squad_offensive, squad_Control, enemy_Control, enemy_Control_Player, downed_Healing, uptime_Table, stacking_uptime_Table, auras_TableIn, auras_TableOut, Death_OnTag, Attendance, DPS_List, CPS_List, SPS_List, HPS_List, DPSStats = stat_data
 
-	players, fights, found_healing, found_barrier, squad_comp, party_comp, squad_offensive, squad_Control, enemy_Control, enemy_Control_Player, downed_Healing, uptime_Table, stacking_uptime_Table, auras_TableIn, auras_TableOut, Death_OnTag, Attendance, DPS_List, CPS_List, SPS_List, HPS_List, DPSStats = collect_stat_data(args, config, log, args.anonymize)    
+	output = open(args.output_filename, "w",encoding="utf-8")
 
 	# create xls file if it doesn't exist
 	book = xlwt.Workbook(encoding="utf-8")
@@ -2741,4 +2741,35 @@ if __name__ == '__main__':
 				teamID_OK = False
 				print_to_file(log, f'{fight_num+1: >8}\t{str(fight.enemies_Unk)}')
 		if teamID_OK:
-			print_to_file(log, f'{fight_num+1: >8} fights, No unknown teamIDs')
\ No newline at end of file
+			print_to_file(log, f'{fight_num+1: >8} fights, No unknown teamIDs')
+
+	output.close()
+
+
+if __name__ == '__main__':
+	args = create_argument_parser().parse_args()
+
+	myDate = datetime.datetime.now()
+
+	if not os.path.isdir(args.input_directory):
+		print("Directory ",args.input_directory," is not a directory or does not exist!")
+		sys.exit()
+	set_output_filenames(args, myDate)
+
+	log = open(args.log_file, "w")
+
+	parser_config = importlib.import_module("parser_configs."+args.config_file , package=None) 
+	
+	config = fill_config(parser_config)
+
+	if config.use_PlenBot:
+		PlenBotPath = config.PlenBotPath
+		getPlenBotLogs(PlenBotPath)
+		
+	print_string = "Using input directory "+args.input_directory+", writing output to "+args.output_filename+" and log to "+args.log_file
+	print(print_string)
+	print_string = "Considering fights with at least "+str(config.min_allied_players)+" allied players and at least "+str(config.min_enemy_players)+" enemies that took longer than "+str(config.min_fight_duration)+" s."
+	print_to_file(log, print_string)
+
+	stat_data = collect_stat_data(args, config, log, args.anonymize)
+	write_top_stats(args, config, log, myDate, stat_data)
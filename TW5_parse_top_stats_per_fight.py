@@ -1,16 +1,14 @@
 #!/usr/bin/env python3
 
-from os import listdir
 import argparse
 import os.path
 import sys
 import importlib
-import json
 import datetime
-import gzip
 import xlsxwriter
 
-from TW5_parse_top_stats_tools import fill_config, reset_globals, get_stats_from_fight_json, get_stat_from_player_json, get_buff_ids_from_json, get_combat_time_breakpoints, sum_breakpoints, BuffGenerationType
+from TW5_log_loader import find_log_files, load_log, summarize_load_stats
+from TW5_parse_top_stats_tools import fill_config, reset_globals, get_stats_from_fight_json, get_stat_from_player_json, get_stats_from_player_json, get_buff_ids_from_json, get_player_context, BuffGenerationType, TOP_STATS_LOG_PROJECTION
 
 if __name__ == '__main__':
 	parser = argparse.ArgumentParser(description='This reads a set of arcdps reports in xml format and generates top stats.')
@@ -147,26 +145,19 @@ if __name__ == '__main__':
 		sheet1.write(0, i, header, header_format)
 
 	# iterating over all fights in directory
-	files = listdir(args.input_directory)
-	sorted_files = sorted(files)
 	rally_num = 1
 	fight_num = 1
 	last_fight_end_time = None
 	row = 1
-	for filename in sorted_files:
-		file_start, file_extension = os.path.splitext(filename)
-		if file_extension not in ['.json', '.gz'] or "top_stats" in file_start:
-			continue
-
+	all_load_stats = []
+	for filename in find_log_files(args.input_directory):
 		print("parsing "+filename)
 		file_path = "".join((args.input_directory,"/",filename))
 
-		if file_extension == '.gz':
-			with gzip.open(file_path, mode="r") as f:
-				json_data = json.loads(f.read().decode('utf-8'))
-		else:
-			json_datafile = open(file_path, encoding='utf-8')
-			json_data = json.load(json_datafile)
+		json_data, load_stats = load_log(file_path, TOP_STATS_LOG_PROJECTION)
+		print(load_stats)
+		log.write(str(load_stats)+"\n")
+		all_load_stats.append(load_stats)
 
 		reset_globals()
 		config = fill_config(parser_config)
@@ -201,7 +192,7 @@ if __name__ == '__main__':
 			player_prof_name_alt = player_name + "_{{"+player['profession']+"}}"
 
 			fight_duration = json_data["durationMS"] / 1000
-			combat_time = sum_breakpoints(get_combat_time_breakpoints(player)) / 1000
+			combat_time = get_player_context(player).combat_time_ms / 1000
 			num_party_members = party_member_counts[player['group']]
 
 			# Calculate healing values
@@ -290,8 +281,9 @@ if __name__ == '__main__':
 			row_data.append(squad_offensive[player_prof_name]['stats']['evaded'])
 			row_data.append(squad_offensive[player_prof_name]['stats']['blocked'])
 
+			stat_values = get_stats_from_player_json(player, players_running_healing_addon, stats_to_compute, config)
 			for i,stat in enumerate(stats_to_compute):
-				row_data.append(get_stat_from_player_json(player, players_running_healing_addon, stat, config))
+				row_data.append(stat_values[stat])
 			
 			row_data.append(total_healing)
 			row_data.append(power_healing)
@@ -397,5 +389,10 @@ if __name__ == '__main__':
 		
 		fight_num += 1
 
+	# read throughput of the logs by how they were stored
+	for line in summarize_load_stats(all_load_stats):
+		print(line)
+		log.write(line+"\n")
+
 	#book.save(args.input_directory+"/TW5_top_stats_per_fight.xls")
 	book.close()
\ No newline at end of file
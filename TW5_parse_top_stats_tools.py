@@ -19,7 +19,16 @@
 
 from cgi import test
 from dataclasses import dataclass,field
+from copy import deepcopy
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+from itertools import repeat
+import hashlib
+import os
 import os.path
+import pickle
 from os import listdir
 import sys
 from enum import Enum
@@ -36,6 +45,10 @@ import csv
 from collections import OrderedDict
 
 from GW2_Color_Scheme import ProfessionColor
+from TW5_damage_series import add_damage_by_stacks, add_window_per_tick, get_coordination_damage, get_cumulative, get_down_events, get_per_tick, get_prefix_sums, get_tick_differences, get_window_damage, get_window_maxima, moving_average, sum_series
+from TW5_intervals import get_on_off_intervals, intersect, measure, split_states
+from TW5_positions import TagDistances
+from TW5_log_loader import LoadStats, LogHeader, decode_log, find_log_files, load_log, prefetch_logs, probe_log_header, read_log_bytes, summarize_load_stats
 
 try:
 	import Guild_Data
@@ -47,6 +60,42 @@ def set_guild_data(guild_data):
 
 debug = False # enable / disable debug output
 
+#Parts of an EI log that are decoded for the top stats, see ProjectedDecoder in TW5_log_loader.
+#Everything is kept except the large arrays no function in this module reads, so these never become python objects.
+#Add a path back here when a new stat starts using it.
+log_per_second_arrays = ['conditionDamage1S', 'breakbarDamage1S', 'targetPowerDamage1S', 'targetConditionDamage1S', 'targetBreakbarDamage1S', 'damageTaken1S', 'powerDamageTaken1S', 'conditionDamageTaken1S', 'breakbarDamageTaken1S']
+TOP_STATS_LOG_PROJECTION = {
+	'*': True,
+	'phases': False,
+	'mechanics': False,
+	'players': {
+		'*': True,
+		'buffUptimes': False,
+		'deathRecap': False,
+		'barrierPercents': False,
+		'boonsStates': False,
+		'conditionsStates': False,
+		'activeCombatMinions': False,
+		'combatReplayData': {'*': True, 'orientations': False},
+		**{key: False for key in log_per_second_arrays},
+	},
+	'targets': {
+		'*': True,
+		'rotation': False,
+		'deathRecap': False,
+		'healthPercents': False,
+		'barrierPercents': False,
+		'boonsStates': False,
+		'conditionsStates': False,
+		'damage1S': False,
+		'powerDamage1S': False,
+		'targetDamage1S': False,
+		'buffs': {'*': True, 'states': False},
+		'combatReplayData': {'*': True, 'positions': False, 'orientations': False},
+		**{key: False for key in log_per_second_arrays},
+	},
+}
+
 class StatType(Enum):
 	TOTAL = 1
 	CONSISTENT = 2
@@ -116,6 +165,7 @@ class Fight:
 	squad: int = 0
 	notSquad: int = 0
 	kills: int = 0
+	downs: int = 0
 	start_time: str = ""
 	enemy_squad: dict = field(default_factory=dict) #profession and count of enemies
 	enemy_Dps: dict = field(default_factory=dict) #enemy name and amount of damage output
@@ -126,6 +176,51 @@ class Fight:
 
 	
 	
+# This class stores what one squad player contributed to a single fight, see get_player_fight_records
+@dataclass
+class PlayerFightRecord:
+	account: str                        # account name
+	name: str                           # character name
+	profession: str                     # profession name
+	group: int = 0                      # squad group of the player in this fight
+	num_party_members: int = 0          # the number of players in the group of the player
+	stats: dict = field(default_factory=dict)                 # the value of each stat for this player in this fight
+	total_stats: dict = field(default_factory=dict)           # what this fight adds to the total value of each stat
+	total_stats_group: dict = field(default_factory=dict)     # what this fight adds to the total value of each stat for their group
+	total_stats_self: dict = field(default_factory=dict)      # what this fight adds to the total value of each stat for self
+	high_scores: list = field(default_factory=list)           # (stat, key, value) candidates for the HighScores, in order of computation
+
+	def initialize(self, config):
+		self.stats = {key: value for key, value in config.empty_stats.items()}
+		self.total_stats = {key: 0 for key in config.stats_to_compute}
+		self.total_stats_group = {key: 0 for key in config.stats_to_compute}
+		self.total_stats_self = {key: 0 for key in config.stats_to_compute}
+
+
+# This class stores everything extracted from a single log, see extract_fight
+@dataclass
+class FightPartial:
+	filename: str
+	fight: Fight = None
+	players_running_healing_addon: list = field(default_factory=list)
+	buff_ids: dict = field(default_factory=dict)                   # buff ids found in the buffMap of this log
+	buffs_stacking_duration: list = field(default_factory=list)
+	buffs_stacking_intensity: list = field(default_factory=list)
+	fight_state: dict = field(default_factory=dict)                # the accumulators of fight_state_globals for this fight only
+	fight_link: list = field(default_factory=list)                 # entry for Fight_Logs
+	player_records: list = field(default_factory=list)             # PlayerFightRecord for each squad player
+	log_text: str = ""                                             # what was written to the log file while extracting
+	load_stats: LoadStats = None                                   # None if the partial came from the cache
+
+
+# This class stores a log as read by load_fight_log, ready for extract_fight
+@dataclass
+class LoadedLog:
+	load_stats: LoadStats
+	header: LogHeader = None       # None if probe_log_header didn't find the header values
+	json_data: dict = None         # None if the fight is skipped by its header
+
+
 # This class stores the configuration for running the top stats.
 @dataclass
 class Config:
@@ -324,6 +419,8 @@ total_Enemy_Skill_Dmg = {}
 
 #Player Skill Damage Tracking
 Player_Damage_by_Skill = {}
+#Casts of each skill id by player in the current fight, added to the skills of Player_Damage_by_Skill when the fight is merged
+Player_Skill_Casts = {}
 
 #Damage Modifiers Outgoing and Incoming
 squadDamageMods = {}
@@ -376,13 +473,28 @@ usedRelicSkill = {}
 RelicDataBuffs = {}
 RelicDataSkills = {}
 
+#Accumulators filled while extracting a fight. Each fight is extracted against an empty copy of these
+#and the result is merged back in file order, see extract_fight and merge_fight_state
+fight_state_globals = [
+	'squad_offensive', 'squad_Control', 'enemy_Control', 'enemy_Control_Player', 'battle_Standard',
+	'squad_damage_output', 'downed_Healing', 'auras_TableOut', 'auras_TableIn', 'uptime_Table',
+	'partyUptimes', 'squadUptimes', 'stacking_uptime_Table', 'FB_Pages', 'buffs_personal',
+	'prof_role_skills', 'skill_Dict', 'Death_OnTag', 'Attendance', 'DPS_List', 'CPS_List', 'SPS_List',
+	'HPS_List', 'DPSStats', 'MOA_Targets', 'MOA_Casters', 'Cmd_Tags', 'minion_Data', 'OutgoingHealing',
+	'total_Squad_Skill_Dmg', 'total_Enemy_Skill_Dmg', 'Player_Damage_by_Skill', 'squadDamageMods',
+	'profModifiers', 'modifierMap', 'conditionData', 'conditionDataGroups', 'conditionDataSquad',
+	'ResistanceData', 'usedRelicBuff', 'usedRelicSkill', 'RelicDataBuffs', 'RelicDataSkills', 'Player_Skill_Casts'
+]
+empty_fight_state = deepcopy({name: globals()[name] for name in fight_state_globals})
+
 #fetch Guild Data and Check Guild Status function
 #members: Dict[str, Any] = {}
 members: dict = field(default_factory=dict) 
 API_response = ""
 
 #If Guild_Data exists and Guild_ID is a dict, ask which guild to use.  Otherwise, use the guild data in Guild_Data variables
-if Guild_Data:
+#Fight parsing worker processes get the members from the parent instead, see init_fight_worker
+if Guild_Data and multiprocessing.parent_process() is None:
 	if type(Guild_Data.Guild_ID) == dict:
 		print("Guild Keys Available: ", Guild_Data.Guild_ID.keys())
 		inputGuild = input('What Guild key for this session?\n')
@@ -493,10 +605,17 @@ DPS_Utility = {
 	34211: "Tin of Fruitcake"
 	}
 
+#consumable ids by the subtype they point to, and the professions that can play support
+Cele_Consumable_Ids = frozenset(Cele_Food)
+Heal_Consumable_Ids = frozenset(Heal_Food).union(Heal_Utility)
+DPS_Consumable_Ids = frozenset(DPS_Food).union(DPS_Utility)
+support_professions = frozenset(["Tempest", "Scrapper", "Mechanist", "Druid", "Chronomancer", "Vindicator", "Firebrand", "Spectre", "Spellbreaker", "Willbender", "Guardian", "Berserker", "Scourge"])
+
 def find_sub_type(player: dict) -> str:
-	"""Determine the subtype of a given player based on their profession, consumables, and stats."""
-	support_professions = ["Tempest", "Scrapper", "Mechanist", "Druid", "Chronomancer", "Vindicator", "Firebrand", "Spectre", "Spellbreaker", "Willbender", "Guardian", "Berserker", "Scourge"]
+	"""Determine the subtype of a given player based on their profession, consumables, and stats.
 
+	This is computed once per player and fight by PlayerContext.sub_type, use that instead.
+	"""
 	if player["profession"] not in support_professions:
 		# Calculate total damage, power damage, and condi damage
 		total_damage = 0
@@ -522,11 +641,11 @@ def find_sub_type(player: dict) -> str:
 	# Search consumables for Cele, Heal, or DPS food/utility
 	if "consumables" in player:
 		for item in player["consumables"]:
-			if item["id"] in Cele_Food:
+			if item["id"] in Cele_Consumable_Ids:
 				return "Cele"
-			if item["id"] in Heal_Food or item["id"] in Heal_Utility:
+			if item["id"] in Heal_Consumable_Ids:
 				return "Support"
-			if item["id"] in DPS_Food or item["id"] in DPS_Utility:
+			if item["id"] in DPS_Consumable_Ids:
 				return "Dps"
 
 	# Only healers should have a crit % lower than 40%
@@ -550,6 +669,85 @@ def my_value(number: int) -> str:
 	"""Format a number with commas every thousand."""
 	return "{:,}".format(number)
 
+# Skills that are not relevant to role performance, left out of the skill casts by role
+excluded_role_skills = {
+	# Downed skills
+	'9149': 'Wrath',
+	'9096': 'Wave of Light',
+	'9095': 'Symbol of Judgement',
+	'28180': 'Essence Sap',
+	'27063': 'Forceful Displacement',
+	'27792': 'Vengeful Blast',
+	'14390': 'Throw Rock',
+	'14515': 'Hammer Toss',
+	'14391': 'Vengeance',
+	'5820': 'Throw Junk',
+	'5962': 'Grappling Line',
+	'5963': 'Booby Trap',
+	'12486': 'Throw Dirt',
+	'12485': 'Thunderclap',
+	'12515': 'Lick Wounds',
+	'13003': 'Trail of Knives',
+	'13138': 'Venomous Knife',
+	'13140': 'Shadow Escape',
+	'13033': 'Smoke Bomb',
+	# Resurrect skills
+	'1006': 'Resurrect',
+	'1066': 'Resurrect',
+	'1175': 'Bandage',
+	# Siege golem skills
+	'14627': 'Punch',
+	'14709': 'Rocket Punch',
+	'14713': 'Rocket Punch',
+	'63185': 'Rocket Punch',
+	'1656': "Whirling Assualt",
+	'14639': "Whirling Assualt",
+	'14642': 'Eject',
+	# Generic skills to exclude
+	'14601': 'Turn Left',
+	'14600': 'Turn Right',
+	'23284': 'Weapon Draw',
+	'23285': 'Weapon Stow',
+	'-2': 'Weapon Swap',
+	'58083': 'Lance',
+	'20285': 'Fire Hollowed Boulder',
+	'9284': 'Flame Blast',
+	'23275': 'Dodge',
+	'54877': 'Chain Pull',
+	'54941': 'Chain Pull',
+	'54953': 'Chain Pull',
+	'21615': '((276158))',
+	'23267': '((290194))',
+	'18792': '((300969))',
+	'18793': '((300969))',
+	'25533': '((300969))',
+	'27927': '((300969))',
+	'30765': '((300969))',
+	'34797': '((300969))',
+}
+
+# Class of each skill for get_skill_casts_by_role by (skill id, name, autoAttack) of the skillMap, each
+# skill is classified once per run. Only 'counted' skills are counted, see classify_role_skill.
+role_skill_classes = {}
+
+def classify_role_skill(skill_id, skill_name, skill_auto):
+	"""Return why a skill is left out of the skill casts by role, or 'counted'."""
+	#skip unknown skills:
+	if skill_name.isnumeric():
+		return 'unknown'
+	if skill_id in excluded_role_skills:
+		return 'excluded'
+	#skip auto attack skills
+	if skill_auto and skill_id != '31796':
+		return 'auto'
+	#skip node gathering and finishers
+	if 'Gather' in skill_name or 'Finisher' in skill_name or 'Harvest Plants' in skill_name or 'Unbound Magic' in skill_name:
+		return 'gather'
+	#skip siege deployment
+	if 'Deploy' in skill_name and 'Jade Sphere' not in skill_name:
+		return 'siege'
+	return 'counted'
+
 def get_skill_casts_by_role(player_data, name, player_prof_role, playerRoleActiveTime, skill_map):
 	
 	if player_prof_role not in prof_role_skills:
@@ -568,81 +766,14 @@ def get_skill_casts_by_role(player_data, name, player_prof_role, playerRoleActiv
 	if 'rotation' in player_data:
 		for rotation_skill in player_data['rotation']:
 			skill_id = str(rotation_skill['id'])
-			skill_name = skill_map['s'+skill_id]['name']
-			skill_auto = skill_map['s'+skill_id]['autoAttack']
-			#skip unknown skills:
-			if skill_name.isnumeric():
+			skill = skill_map['s'+skill_id]
+			skill_key = (skill_id, skill['name'], skill['autoAttack'])
+			skill_class = role_skill_classes.get(skill_key)
+			if skill_class is None:
+				skill_class = role_skill_classes[skill_key] = classify_role_skill(*skill_key)
+			if skill_class != 'counted':
 				continue
 
-			# Exclude skills that are not relevant to role performance
-			excluded_skills = {
-				# Downed skills
-				'9149': 'Wrath',
-				'9096': 'Wave of Light',
-				'9095': 'Symbol of Judgement',
-				'28180': 'Essence Sap',
-				'27063': 'Forceful Displacement',
-				'27792': 'Vengeful Blast',
-				'14390': 'Throw Rock',
-				'14515': 'Hammer Toss',
-				'14391': 'Vengeance',
-				'5820': 'Throw Junk',
-				'5962': 'Grappling Line',
-				'5963': 'Booby Trap',
-				'12486': 'Throw Dirt',
-				'12485': 'Thunderclap',
-				'12515': 'Lick Wounds',
-				'13003': 'Trail of Knives',
-				'13138': 'Venomous Knife',
-				'13140': 'Shadow Escape',
-				'13033': 'Smoke Bomb',
-				# Resurrect skills
-				'1006': 'Resurrect',
-				'1066': 'Resurrect',
-				'1175': 'Bandage',
-				# Siege golem skills
-				'14627': 'Punch',
-				'14709': 'Rocket Punch',
-				'14713': 'Rocket Punch',
-				'63185': 'Rocket Punch',
-				'1656': "Whirling Assualt",
-				'14639': "Whirling Assualt",
-				'14642': 'Eject',
-				# Generic skills to exclude
-				'14601': 'Turn Left',
-				'14600': 'Turn Right',
-				'23284': 'Weapon Draw',
-				'23285': 'Weapon Stow',
-				'-2': 'Weapon Swap',
-				'58083': 'Lance',
-				'20285': 'Fire Hollowed Boulder',
-				'9284': 'Flame Blast',
-				'23275': 'Dodge',
-				'54877': 'Chain Pull',
-				'54941': 'Chain Pull',
-				'54953': 'Chain Pull',
-				'21615': '((276158))',
-				'23267': '((290194))',
-				'18792': '((300969))',
-				'18793': '((300969))',
-				'25533': '((300969))',
-				'27927': '((300969))',
-				'30765': '((300969))',
-				'34797': '((300969))',
-			}            
-
-			if skill_id in excluded_skills:
-				continue
-			#skip auto attack skills
-			if skill_auto and skill_id != '31796':
-				continue
-			#skip node gathering and finishers
-			if 'Gather' in skill_name or 'Finisher' in skill_name or 'Harvest Plants' in skill_name or 'Unbound Magic' in skill_name:
-				continue
-			#skip siege deployment
-			if 'Deploy' in skill_name and 'Jade Sphere' not in skill_name:
-				continue
-		
 			skill_casts = 0
 			for skill_usage in rotation_skill['skills']:
 				# When the duration equals the timeLost, the skill was interrupted or cancelled	
@@ -2222,7 +2353,7 @@ def get_buff_ids_from_json(json_data, config):
 	for buff_id, buff in buffs.items():
 		if buff['name'] in config.buff_abbrev:
 			abbrev_name = config.buff_abbrev[buff['name']]
-			config.buff_ids[abbrev_name] = buff_id[1:]
+			config.buff_ids[abbrev_name] = int(buff_id[1:])
 			if buff['stacking']:
 				config.buffs_stacking_intensity.append(abbrev_name)
 			else:
@@ -2238,538 +2369,1021 @@ def get_buff_ids_from_json(json_data, config):
 				config.buffs_stacking_duration.append(buff)
 
 
-# Collect the top stats data.
-# Input:
-# args = cmd line arguments
-# config = configuration to use for top stats computation
-# log = log file to write to
-# Output:
-# list of Players with their stats
-# list of all fights (also the skipped ones)
-# was healing found in the logs?
-def collect_stat_data(args, config, log, anonymize=False):
+#How lists found in the accumulators of a fight are combined with the lists collected so far, see merge_state_list.
+#Lists not named here are added up element by element.
+def merge_skill_damage(total, fight_list):
+	#[damage, min, max, hits, connectedHits, crit, critDamage, casts]
+	for index, value in enumerate(fight_list):
+		if index == 1:
+			if total[index] == 0 or value <= total[index]:
+				total[index] = value
+		elif index == 2:
+			if total[index] == 0 or value >= total[index]:
+				total[index] = value
+		else:
+			total[index] += value
+
+fight_state_list_rules = {
+	'DPS_List': 'extend',
+	'CPS_List': 'extend',
+	'SPS_List': 'extend',
+	'HPS_List': 'extend',
+	'Death_OnTag': 'extend',
+	'RelicDataBuffs': 'extend',
+	'buffs_personal': 'unique',
+	'minion_Data': 'unique',
+	'profModifiers': 'unique',
+	'Player_Damage_by_Skill': merge_skill_damage,
+}
 
-	# healing only in logs if addon was installed
-	found_healing = False # Todo what if some logs have healing and some don't
-	found_barrier = False    
+#Keys that are not accumulated by adding up: burst damage keeps the best window over all fights,
+#resistance states are rebuilt for every fight
+fight_state_key_rules = {
+	'Burst_Damage': 'max',
+	'Ch5Ca_Burst_Damage': 'max',
+	'ResistStates': 'replace',
+	'Condition': 'replace',
+}
 
-	players = []        # list of all player/profession combinations
-	player_index = {}   # dictionary that matches each player/profession combo to its index in players list
-	account_index = {}  # dictionary that matches each account name to a list of its indices in players list
-	squad_comp = {}     # dictionary that contains count of professions by fight_num
-	party_comp = {}     # dictionary that contains list of professions by party by fight_num
-	used_fights = 0
-	fights = []
-	first = True
 
-	# iterating over all fights in directory
-	files = listdir(args.input_directory)
-	sorted_files = sorted(files)
-	for filename in sorted_files:
-		# skip files of incorrect filetype
-		file_start, file_extension = os.path.splitext(filename)
-		#if args.filetype not in file_extension or "top_stats" in file_start:
-		if file_extension not in ['.json', '.gz'] or "top_stats" in file_start:
+def merge_state_list(total, fight_list, rule):
+	if callable(rule):
+		rule(total, fight_list)
+	elif rule == 'extend':
+		total.extend(fight_list)
+	elif rule == 'unique':
+		for value in fight_list:
+			if value not in total:
+				total.append(value)
+	elif rule == 'max':
+		for index, value in enumerate(fight_list):
+			total[index] = max(total[index], value)
+	else:
+		for index, value in enumerate(fight_list):
+			if index < len(total):
+				total[index] += value
+			else:
+				total.append(value)
+
+
+def merge_state_dict(total, fight_dict, list_rule):
+	"""Merge the accumulator dict of one fight into the accumulator collected over all previous fights, in place."""
+	for key, value in fight_dict.items():
+		if key not in total:
+			total[key] = value
 			continue
+		key_rule = fight_state_key_rules.get(key, list_rule)
+		if key_rule == 'replace':
+			total[key] = value
+		elif isinstance(value, dict):
+			merge_state_dict(total[key], value, list_rule)
+		elif isinstance(value, list):
+			merge_state_list(total[key], value, key_rule)
+		elif isinstance(value, (int, float)):
+			total[key] += value
+		#other values (names, professions, roles, icons) are kept from the first fight they were seen in
 
-		print_string = "parsing "+filename
-		print(print_string)
-		file_path = "".join((args.input_directory,"/",filename))
 
-		# load file
-		with (gzip.open if file_extension == '.gz' else open)(file_path, mode='rt', encoding='utf-8') as file:
-			json_data = json.load(file)
-		if file_extension == '.gz':
-			with gzip.open(file_path, mode="r") as f:
-				json_data = json.loads(f.read().decode('utf-8'))
+#Accumulators keyed by the skill_Dict names of the skills, see get_skill_renames
+skill_name_keyed_globals = ['total_Squad_Skill_Dmg', 'total_Enemy_Skill_Dmg', 'Player_Damage_by_Skill']
+
+
+def get_skill_renames(fight_skills):
+	"""Names a fight used for its skills that the merged skill_Dict knows by another name, mapped to that name.
+
+	A fight is extracted with only the skills of its own log in skill_Dict, a serial run used the first name
+	seen in any fight so far and "Skill-<id>" only for skills no fight knew yet.
+	"""
+	renames = {}
+	for skill_id, skill in skill_Dict.items():
+		if skill_id not in fight_skills:
+			renames['Skill-'+skill_id] = skill['name']
+		elif fight_skills[skill_id]['name'] != skill['name']:
+			renames[fight_skills[skill_id]['name']] = skill['name']
+	return renames
+
+
+def add_skill_damage(total, fight_list):
+	"""Return the damage of a skill in total and fight_list combined like merge_skill_damage does, without changing either."""
+	total = list(total)
+	merge_skill_damage(total, fight_list)
+	return total
+
+
+def rename_skills(skills, renames, merge_value):
+	"""Return skills with its keys renamed by renames, in the same order. Values of keys renamed to the same name are merged."""
+	renamed = {}
+	for skill_name, value in skills.items():
+		skill_name = renames.get(skill_name, skill_name)
+		if skill_name in renamed:
+			renamed[skill_name] = merge_value(renamed[skill_name], value)
 		else:
-			json_datafile = open(file_path, encoding='utf-8')
-			json_data = json.load(json_datafile)
-		# get fight stats
-		fight, players_running_healing_addon, squad_offensive, squad_Control, enemy_Control, enemy_Control_Player, downed_Healing, uptime_Table, stacking_uptime_Table, auras_TableIn, auras_TableOut, Death_OnTag, Attendance, DPS_List, CPS_List, SPS_List, HPS_List, DPSStats = get_stats_from_fight_json(json_data, config, log)
-			
-		if first:
-			first = False
-			get_buff_ids_from_json(json_data, config)
-
-		# add new entry for this fight in all players
-		for player in players:
-			player.stats_per_fight.append({key: value for key, value in config.empty_stats.items()})   
-
-		fight_number = int(len(fights))
-		# don't compute anything for skipped fights
-		if fight.skipped:
-			fights.append(fight)
-			log.write("skipped "+filename)            
-			continue
+			renamed[skill_name] = value
+	return renamed
 
-		#Collect Fight Link Data
-		fightStamp = filename.split("_",1)[0]
-		Fight_Logs.append(get_fight_log_link_data(json_data, fightStamp, fight_number))
 
-		party_member_counts = {}
-		for player_data in json_data['players']:
-			group = player_data['group']
-			if group in party_member_counts:
-				party_member_counts[group] += 1
+def merge_fight_state(fight_state):
+	"""Merge the accumulators extracted from one fight into the module level accumulators, in place.
+
+	The accumulators are changed in place as the top stats scripts import them by name.
+	"""
+	renames = {}
+	for name in fight_state_globals:
+		total = globals()[name]
+		fight_dict = fight_state[name]
+		if renames and name in skill_name_keyed_globals:
+			if name == 'Player_Damage_by_Skill':
+				fight_dict = {player_prof_name: dict(player_skills, Skills=rename_skills(player_skills['Skills'], renames, add_skill_damage)) for player_prof_name, player_skills in fight_dict.items()}
 			else:
-				party_member_counts[group] = 1
+				fight_dict = rename_skills(fight_dict, renames, lambda total_damage, damage: total_damage + damage)
+		if name == 'skill_Dict':
+			#skill names are only replaced if the previous fights didn't know the skill
+			for skill_id, skill in fight_dict.items():
+				if skill_id not in total or (total[skill_id]['name'] == "UNKNOWN" and skill['name'] != "UNKNOWN"):
+					total[skill_id] = skill
+			renames = get_skill_renames(fight_dict)
+		elif name == 'Player_Skill_Casts':
+			#casts count for every skill the player did damage with so far, also in previous fights.
+			#skill_Dict is already merged, so the skill names are the ones of all fights so far.
+			for player_prof_name, skill_casts in fight_dict.items():
+				player_skills = Player_Damage_by_Skill[player_prof_name]['Skills']
+				for skill_id, casts in skill_casts.items():
+					skill_name = skill_Dict[skill_id]['name']
+					if skill_name in player_skills:
+						player_skills[skill_name][7] += casts
+		else:
+			merge_state_dict(total, fight_dict, fight_state_list_rules.get(name, 'add'))
 
-		used_fights += 1
-		#fight_number = used_fights-1
-		squad_comp[fight_number]={}
-		party_comp[fight_number]={}
-		
 
-		# Collect personal damage modifiers for this fight
-		damage_mod_map = json_data['damageModMap']
-		if 'personalDamageMods' in json_data:
-			personal_damage_mods = json_data['personalDamageMods']
-			for profession in personal_damage_mods:
-				for mod_id in personal_damage_mods[profession]:
-					mod_name = damage_mod_map['d' + str(mod_id)]['name']
-					if mod_name not in profModifiers['buffList']:
-						profModifiers['buffList'].append(mod_name)
-					if profession not in profModifiers['Professions']:
-						profModifiers['Professions'][profession] = []
-					if mod_name not in profModifiers['Professions'][profession]:
-						profModifiers['Professions'][profession].append(mod_name)
-
-		#Collect Damage Modifiers for this fight
-		activeMods = {}
-		#damage_mod_map = json_data['damageModMap']
-		for modifier_id, modifier_data in damage_mod_map.items():
-			modifier_name = modifier_data['name']
-			modifier_icon = modifier_data['icon']
-
-			if 'incoming' in modifier_data:
-				if modifier_data['incoming']:
-					if modifier_name in profModifiers['buffList'] and modifier_name not in modifierMap['Incoming']['Prof']:
-						modifierMap['Incoming']['Prof'][modifier_name] = modifier_icon
-					if modifier_name not in profModifiers['buffList'] and modifier_name not in modifierMap['Incoming']['Shared']:
-						modifierMap['Incoming']['Shared'][modifier_name] = modifier_icon
-				else:
-					if modifier_name in profModifiers['buffList'] and modifier_name not in modifierMap['Outgoing']['Prof']:
-						modifierMap['Outgoing']['Prof'][modifier_name] = modifier_icon
-					if modifier_name not in profModifiers['buffList'] and modifier_name not in modifierMap['Outgoing']['Shared']:
-						modifierMap['Outgoing']['Shared'][modifier_name] = modifier_icon
-
-			if any(keyword in modifier_name for keyword in ['Relic', 'Superior Sigil of', "Nourys's"]):
-				if modifier_name not in activeMods:
-					activeMods[modifier_name] = modifier_id[1:]
-			
-		# get stats for each player
-		for player_data in json_data['players']:
-			# get basic player data
-			account, name, profession, not_in_squad, playerGroup = get_basic_player_data_from_json(player_data)
+def init_fight_worker(guild_members, plen_bot_logs):
+	"""Initializer of the fight parsing worker processes, these don't ask for the guild or query the API themselves."""
+	global members
+	members = guild_members
+	Plen_Bot_Logs.update(plen_bot_logs)
 
-			if not_in_squad:
-				continue
-			create_new_player = False
-			build_swapped = False
-			
-			# Update squad composition for this fight
-			if profession not in squad_comp[fight_number]:
-				squad_comp[fight_number][profession] = 1
-			else:
-				squad_comp[fight_number][profession] += 1
-
-			#collect players by party
-			if playerGroup not in party_comp[fight_number]:
-				party_comp[fight_number][playerGroup]=[]
-			party_comp[fight_number][playerGroup].append([profession, name])
-
-			# if this combination of charname + profession is not in the player index yet, create a new entry
-			name_and_prof = name+" "+profession
-			if name_and_prof not in player_index.keys():
-				print("creating new player",name_and_prof)
-				create_new_player = True
-
-			# if this account is not in the account index yet, create a new entry
-			if account not in account_index.keys():
-				account_index[account] = [len(players)]
-			elif name_and_prof not in player_index.keys():
-				# if account does already exist, but name/prof combo does not, this player swapped build or character
-				# -> note for all Player instances of this account
-				for ind in range(len(account_index[account])):
-					players[account_index[account][ind]].swapped_build = True
-				account_index[account].append(len(players))
-				build_swapped = True
-
-			if create_new_player:
-				player = Player(account, name, profession)
-				player.initialize(config)
-				player_index[name_and_prof] = len(players)
-				# fill up fights where the player wasn't there yet with empty stats
-				while len(player.stats_per_fight) <= fight_number:                
-				#while len(player.stats_per_fight) <= used_fights:
-					player.stats_per_fight.append({key: value for key, value in config.empty_stats.items()})                
-				players.append(player)
-
-			player = players[player_index[name_and_prof]]
-
-			playerRole=find_sub_type(player_data)
-			playerRoleActiveTime = get_stat_from_player_json(player_data, players_running_healing_addon, 'time_active', config)
-			
-			if config.ignore_role_in_skill_cast:
-				player_prof_role = profession
+
+# Collect what each squad player did in a single fight.
+# Input:
+# fight_context = the FightContext of the decoded log, with fightStamp and fight_number
+# config = configuration to use for top stats computation
+# fight = the Fight as returned by get_stats_from_fight_json, its total_stats are filled in here
+# players_running_healing_addon = as returned by get_stats_from_fight_json
+# log = log file to write to
+# Output:
+# list of PlayerFightRecord, in order of the players in the log
+def get_player_fight_records(fight_context, config, fight, players_running_healing_addon, log):
+	records = []
+	json_data = fight_context.json_data
+	actor_index = fight_context.actor_index
+	party_member_counts = fight_context.party_member_counts
+
+	# Collect personal damage modifiers for this fight
+	damage_mod_map = json_data['damageModMap']
+	if 'personalDamageMods' in json_data:
+		personal_damage_mods = json_data['personalDamageMods']
+		for profession in personal_damage_mods:
+			for mod_id in personal_damage_mods[profession]:
+				mod_name = damage_mod_map['d' + str(mod_id)]['name']
+				if mod_name not in profModifiers['buffList']:
+					profModifiers['buffList'].append(mod_name)
+				if profession not in profModifiers['Professions']:
+					profModifiers['Professions'][profession] = []
+				if mod_name not in profModifiers['Professions'][profession]:
+					profModifiers['Professions'][profession].append(mod_name)
+
+	#Collect Damage Modifiers for this fight
+	activeMods = {}
+	#damage_mod_map = json_data['damageModMap']
+	for modifier_id, modifier_data in damage_mod_map.items():
+		modifier_name = modifier_data['name']
+		modifier_icon = modifier_data['icon']
+
+		if 'incoming' in modifier_data:
+			if modifier_data['incoming']:
+				if modifier_name in profModifiers['buffList'] and modifier_name not in modifierMap['Incoming']['Prof']:
+					modifierMap['Incoming']['Prof'][modifier_name] = modifier_icon
+				if modifier_name not in profModifiers['buffList'] and modifier_name not in modifierMap['Incoming']['Shared']:
+					modifierMap['Incoming']['Shared'][modifier_name] = modifier_icon
 			else:
-				player_prof_role = profession + ' ' + playerRole
-
-			skill_map = json_data['skillMap']
-
-			#Collect Role Data for Skill Casts
-			get_skill_casts_by_role(player_data, name, player_prof_role, playerRoleActiveTime, skill_map)
-
-
-			# Collect Gear Buff Data for each player
-			if config.include_comp_and_review:
-				buff_map = json_data['buffMap']
-				player_name_prof = "{{" + profession + "}} " + name
-				if 'selfBuffs' in player_data:
-					for index, buff in enumerate(player_data['selfBuffs']):
-						buff_id = "b" + str(buff['id'])
-						generated = 0
-						buff_stacks = 0
-						if ("Relic" in buff_map[buff_id]['name'] or
-							"Superior Sigil of" in buff_map[buff_id]['name'] or
-							"Nourys's" in buff_map[buff_id]['name']):
-							relic_name = buff_map[buff_id]['name']
-							relic_icon = buff_map[buff_id]['icon']
-							if player_name_prof not in RelicDataBuffs:
-								RelicDataBuffs[player_name_prof] = {}
-
-							if name in player_data['buffUptimesActive'][index]['buffData'][0]['generated']:
-								if relic_name in relic_Stacks:
-									generated = player_data['buffUptimesActive'][index]['buffData'][0]['presence']
-									buff_stacks = player_data['buffUptimesActive'][index]['buffData'][0]['uptime']
-								else:
-									generated = player_data['buffUptimesActive'][index]['buffData'][0]['uptime']
-
-								damage_gained = 0
-								hit_count = 0
-								total_hits = 0
-								if relic_name not in RelicDataBuffs[player_name_prof]:
-									if relic_name not in usedRelicBuff:
-										usedRelicBuff[relic_name] = relic_icon
-									RelicDataBuffs[player_name_prof][relic_name] = {
-										'fightTime': [],
-										'buffDuration': [],
-										'buffStacks': [],
-										'damageGain': [],
-										'hitCount': [],
-										'totalHits': []
-									}
-									buff_duration = (generated * playerRoleActiveTime) / 100
-
-									RelicDataBuffs[player_name_prof][relic_name]['fightTime'].append(playerRoleActiveTime)
-									RelicDataBuffs[player_name_prof][relic_name]['buffDuration'].append(buff_duration)
-									RelicDataBuffs[player_name_prof][relic_name]['buffStacks'].append(buff_stacks)
-									if relic_name in activeMods:
-										for target in player_data['damageModifiersTarget']:
-											for Modifier in target:
-												if str(Modifier['id']) == str(activeMods[relic_name]):
-													damage_gained += Modifier['damageModifiers'][0]['damageGain']
-													hit_count += Modifier['damageModifiers'][0]['hitCount']
-													total_hits += Modifier['damageModifiers'][0]['totalHitCount']
+				if modifier_name in profModifiers['buffList'] and modifier_name not in modifierMap['Outgoing']['Prof']:
+					modifierMap['Outgoing']['Prof'][modifier_name] = modifier_icon
+				if modifier_name not in profModifiers['buffList'] and modifier_name not in modifierMap['Outgoing']['Shared']:
+					modifierMap['Outgoing']['Shared'][modifier_name] = modifier_icon
+
+		if any(keyword in modifier_name for keyword in ['Relic', 'Superior Sigil of', "Nourys's"]):
+			if modifier_name not in activeMods:
+				activeMods[modifier_name] = modifier_id[1:]
+		
+	# get stats for each player
+	for player_data in json_data['players']:
+		# get basic player data
+		account, name, profession, not_in_squad, playerGroup = get_basic_player_data_from_json(player_data)
 
-								else:
-									buff_duration = (generated * playerRoleActiveTime) / 100
-									RelicDataBuffs[player_name_prof][relic_name]['fightTime'].append(playerRoleActiveTime)
-									RelicDataBuffs[player_name_prof][relic_name]['buffDuration'].append(buff_duration)
-									RelicDataBuffs[player_name_prof][relic_name]['buffStacks'].append(buff_stacks)
-									if relic_name in activeMods:
-										for target in player_data['damageModifiersTarget']:
-											for Modifier in target:
-												if str(Modifier['id']) == str(activeMods[relic_name]):
-													damage_gained += Modifier['damageModifiers'][0]['damageGain']
-													hit_count += Modifier['damageModifiers'][0]['hitCount']
-													total_hits += Modifier['damageModifiers'][0]['totalHitCount']
-
-								RelicDataBuffs[player_name_prof][relic_name]['damageGain'].append(damage_gained)
-								RelicDataBuffs[player_name_prof][relic_name]['hitCount'].append(hit_count)
-								RelicDataBuffs[player_name_prof][relic_name]['totalHits'].append(total_hits)
-
-			#Collect Relic Skill Data for each player
-			if config.include_comp_and_review:
-				skillMap = json_data['skillMap']
-				for skill in skillMap:
-					if 'Relic' in skillMap[skill]['name'] or 'Sigil' in skillMap[skill]['name'] or "Nourys's" in skillMap[skill]['name']:
-						relicName = skillMap[skill]['name']
-						relicIcon = skillMap[skill]['icon']
-						if relicName not in usedRelicSkill:
-							usedRelicSkill[relicName] = relicIcon
-
-				if 'totalDamageDist' in player_data:
-					for item in player_data['totalDamageDist'][0]:
-						skill_id = item['id']
-						if f"s{skill_id}" in skillMap:
-							skill_name = skillMap[f"s{skill_id}"]['name']
-						else:
-							continue
-						if skill_name in usedRelicSkill:
-							if player_name_prof not in RelicDataSkills:
-								RelicDataSkills[player_name_prof] = {}
-							if skill_name not in RelicDataSkills[player_name_prof]:
-								RelicDataSkills[player_name_prof][skill_name] = {stat: item[stat] for stat in item}
+		if not_in_squad:
+			continue
+
+		record = PlayerFightRecord(account, name, profession, playerGroup)
+		record.initialize(config)
+		records.append(record)
+
+		playerRole=get_player_context(player_data).sub_type
+		playerRoleActiveTime = get_stat_from_player_json(player_data, players_running_healing_addon, 'time_active', config)
+		
+		if config.ignore_role_in_skill_cast:
+			player_prof_role = profession
+		else:
+			player_prof_role = profession + ' ' + playerRole
+
+		#Collect Role Data for Skill Casts
+		get_skill_casts_by_role(player_data, name, player_prof_role, playerRoleActiveTime, fight_context.skill_map)
+
+
+		# Collect Gear Buff Data for each player
+		if config.include_comp_and_review:
+			buff_map = fight_context.buff_map
+			player_name_prof = "{{" + profession + "}} " + name
+			if 'selfBuffs' in player_data:
+				for index, buff in enumerate(player_data['selfBuffs']):
+					buff_id = "b" + str(buff['id'])
+					generated = 0
+					buff_stacks = 0
+					if ("Relic" in buff_map[buff_id]['name'] or
+						"Superior Sigil of" in buff_map[buff_id]['name'] or
+						"Nourys's" in buff_map[buff_id]['name']):
+						relic_name = buff_map[buff_id]['name']
+						relic_icon = buff_map[buff_id]['icon']
+						if player_name_prof not in RelicDataBuffs:
+							RelicDataBuffs[player_name_prof] = {}
+
+						if name in player_data['buffUptimesActive'][index]['buffData'][0]['generated']:
+							if relic_name in relic_Stacks:
+								generated = player_data['buffUptimesActive'][index]['buffData'][0]['presence']
+								buff_stacks = player_data['buffUptimesActive'][index]['buffData'][0]['uptime']
 							else:
-								for stat in item:
-									RelicDataSkills[player_name_prof][skill_name][stat] += item[stat]
-							for cast in player_data['rotation']:
-								if cast['id'] == skill_id:
-									if 'casts' not in RelicDataSkills[player_name_prof][skill_name]:
-										RelicDataSkills[player_name_prof][skill_name]['casts'] = len(cast['skills'])
-									else:
-										RelicDataSkills[player_name_prof][skill_name]['casts'] += len(cast['skills'])
-			#End Collect Relic Skill Data for each player
-
-			#Collect Damage Modifier Data for each player
-			if 'damageModifiers' in player_data:
-				playerNameProf = name+"{{"+profession+"}}"
-
-				for modifier in player_data['damageModifiers']:
-					modID = 'd'+str(modifier['id'])
-					modName = damage_mod_map[modID]['name']
-					modHitCount = modifier['damageModifiers'][0]['hitCount']
-					modTotalHitCount = modifier['damageModifiers'][0]['totalHitCount']
-					modDamageGain = modifier['damageModifiers'][0]['damageGain']
-					modTotalDamage = modifier['damageModifiers'][0]['totalDamage']
-
-					if playerNameProf not in squadDamageMods:
-						squadDamageMods[playerNameProf] = {}
-						squadDamageMods[playerNameProf]['name'] = name
-						squadDamageMods[playerNameProf]['profession'] = profession
-						squadDamageMods[playerNameProf]['Shared'] = {}
-						squadDamageMods[playerNameProf]['Prof'] = {}
-					if modName not in profModifiers['buffList']: 
-						if modName not in squadDamageMods[playerNameProf]['Shared']:
-							squadDamageMods[playerNameProf]['Shared'][modName]={}
-							squadDamageMods[playerNameProf]['Shared'][modName]['hitCount']=modHitCount
-							squadDamageMods[playerNameProf]['Shared'][modName]['totalHitCount']=modTotalHitCount
-							squadDamageMods[playerNameProf]['Shared'][modName]['damageGain']=modDamageGain
-							squadDamageMods[playerNameProf]['Shared'][modName]['totalDamage']=modTotalDamage
-						else:
-							squadDamageMods[playerNameProf]['Shared'][modName]['hitCount']+=modHitCount
-							squadDamageMods[playerNameProf]['Shared'][modName]['totalHitCount']+=modTotalHitCount
-							squadDamageMods[playerNameProf]['Shared'][modName]['damageGain']+=modDamageGain
-							squadDamageMods[playerNameProf]['Shared'][modName]['totalDamage']+=modTotalDamage
+								generated = player_data['buffUptimesActive'][index]['buffData'][0]['uptime']
+
+							damage_gained = 0
+							hit_count = 0
+							total_hits = 0
+							if relic_name not in RelicDataBuffs[player_name_prof]:
+								if relic_name not in usedRelicBuff:
+									usedRelicBuff[relic_name] = relic_icon
+								RelicDataBuffs[player_name_prof][relic_name] = {
+									'fightTime': [],
+									'buffDuration': [],
+									'buffStacks': [],
+									'damageGain': [],
+									'hitCount': [],
+									'totalHits': []
+								}
+								buff_duration = (generated * playerRoleActiveTime) / 100
+
+								RelicDataBuffs[player_name_prof][relic_name]['fightTime'].append(playerRoleActiveTime)
+								RelicDataBuffs[player_name_prof][relic_name]['buffDuration'].append(buff_duration)
+								RelicDataBuffs[player_name_prof][relic_name]['buffStacks'].append(buff_stacks)
+								if relic_name in activeMods:
+									for target in player_data['damageModifiersTarget']:
+										for Modifier in target:
+											if str(Modifier['id']) == str(activeMods[relic_name]):
+												damage_gained += Modifier['damageModifiers'][0]['damageGain']
+												hit_count += Modifier['damageModifiers'][0]['hitCount']
+												total_hits += Modifier['damageModifiers'][0]['totalHitCount']
+
+							else:
+								buff_duration = (generated * playerRoleActiveTime) / 100
+								RelicDataBuffs[player_name_prof][relic_name]['fightTime'].append(playerRoleActiveTime)
+								RelicDataBuffs[player_name_prof][relic_name]['buffDuration'].append(buff_duration)
+								RelicDataBuffs[player_name_prof][relic_name]['buffStacks'].append(buff_stacks)
+								if relic_name in activeMods:
+									for target in player_data['damageModifiersTarget']:
+										for Modifier in target:
+											if str(Modifier['id']) == str(activeMods[relic_name]):
+												damage_gained += Modifier['damageModifiers'][0]['damageGain']
+												hit_count += Modifier['damageModifiers'][0]['hitCount']
+												total_hits += Modifier['damageModifiers'][0]['totalHitCount']
+
+							RelicDataBuffs[player_name_prof][relic_name]['damageGain'].append(damage_gained)
+							RelicDataBuffs[player_name_prof][relic_name]['hitCount'].append(hit_count)
+							RelicDataBuffs[player_name_prof][relic_name]['totalHits'].append(total_hits)
+
+		#Collect Relic Skill Data for each player
+		if config.include_comp_and_review:
+			skillMap = fight_context.skill_map
+			for relicName, relicIcon in fight_context.relic_skills.items():
+				if relicName not in usedRelicSkill:
+					usedRelicSkill[relicName] = relicIcon
+
+			if 'totalDamageDist' in player_data:
+				for item in player_data['totalDamageDist'][0]:
+					skill_id = item['id']
+					if f"s{skill_id}" in skillMap:
+						skill_name = skillMap[f"s{skill_id}"]['name']
 					else:
-						if modName not in squadDamageMods[playerNameProf]['Prof']:
-							squadDamageMods[playerNameProf]['Prof'][modName]={}
-							squadDamageMods[playerNameProf]['Prof'][modName]['hitCount']=modHitCount
-							squadDamageMods[playerNameProf]['Prof'][modName]['totalHitCount']=modTotalHitCount
-							squadDamageMods[playerNameProf]['Prof'][modName]['damageGain']=modDamageGain
-							squadDamageMods[playerNameProf]['Prof'][modName]['totalDamage']=modTotalDamage
-						else:
-							squadDamageMods[playerNameProf]['Prof'][modName]['hitCount']+=modHitCount
-							squadDamageMods[playerNameProf]['Prof'][modName]['totalHitCount']+=modTotalHitCount
-							squadDamageMods[playerNameProf]['Prof'][modName]['damageGain']+=modDamageGain
-							squadDamageMods[playerNameProf]['Prof'][modName]['totalDamage']+=modTotalDamage
-
-			if 'incomingDamageModifiersTarget' in player_data:
-				playerNameProf = name+"{{"+profession+"}}"
-
-				for modifier in player_data['incomingDamageModifiers']:
-					modID = 'd'+str(modifier['id'])
-					modName = damage_mod_map[modID]['name']
-					modHitCount = modifier['damageModifiers'][0]['hitCount']
-					modTotalHitCount = modifier['damageModifiers'][0]['totalHitCount']
-					modDamageGain = modifier['damageModifiers'][0]['damageGain']
-					modTotalDamage = modifier['damageModifiers'][0]['totalDamage']
-
-					if playerNameProf not in squadDamageMods:
-						squadDamageMods[playerNameProf] = {}
-						squadDamageMods[playerNameProf]['name'] = name
-						squadDamageMods[playerNameProf]['profession'] = profession
-						squadDamageMods[playerNameProf]['Shared'] = {}
-						squadDamageMods[playerNameProf]['Prof'] = {}
-					if modName not in profModifiers['buffList']:
-						if modName not in squadDamageMods[playerNameProf]['Shared']:
-							squadDamageMods[playerNameProf]['Shared'][modName]={}
-							squadDamageMods[playerNameProf]['Shared'][modName]['hitCount']=modHitCount
-							squadDamageMods[playerNameProf]['Shared'][modName]['totalHitCount']=modTotalHitCount
-							squadDamageMods[playerNameProf]['Shared'][modName]['damageGain']=modDamageGain
-							squadDamageMods[playerNameProf]['Shared'][modName]['totalDamage']=modTotalDamage
+						continue
+					if skill_name in usedRelicSkill:
+						if player_name_prof not in RelicDataSkills:
+							RelicDataSkills[player_name_prof] = {}
+						if skill_name not in RelicDataSkills[player_name_prof]:
+							RelicDataSkills[player_name_prof][skill_name] = {stat: item[stat] for stat in item}
 						else:
-							squadDamageMods[playerNameProf]['Shared'][modName]['hitCount']+=modHitCount
-							squadDamageMods[playerNameProf]['Shared'][modName]['totalHitCount']+=modTotalHitCount
-							squadDamageMods[playerNameProf]['Shared'][modName]['damageGain']+=modDamageGain
-							squadDamageMods[playerNameProf]['Shared'][modName]['totalDamage']+=modTotalDamage
+							for stat in item:
+								RelicDataSkills[player_name_prof][skill_name][stat] += item[stat]
+						for cast in player_data['rotation']:
+							if cast['id'] == skill_id:
+								if 'casts' not in RelicDataSkills[player_name_prof][skill_name]:
+									RelicDataSkills[player_name_prof][skill_name]['casts'] = len(cast['skills'])
+								else:
+									RelicDataSkills[player_name_prof][skill_name]['casts'] += len(cast['skills'])
+		#End Collect Relic Skill Data for each player
+
+		#Collect Damage Modifier Data for each player
+		if 'damageModifiers' in player_data:
+			playerNameProf = name+"{{"+profession+"}}"
+
+			for modifier in player_data['damageModifiers']:
+				modID = 'd'+str(modifier['id'])
+				modName = damage_mod_map[modID]['name']
+				modHitCount = modifier['damageModifiers'][0]['hitCount']
+				modTotalHitCount = modifier['damageModifiers'][0]['totalHitCount']
+				modDamageGain = modifier['damageModifiers'][0]['damageGain']
+				modTotalDamage = modifier['damageModifiers'][0]['totalDamage']
+
+				if playerNameProf not in squadDamageMods:
+					squadDamageMods[playerNameProf] = {}
+					squadDamageMods[playerNameProf]['name'] = name
+					squadDamageMods[playerNameProf]['profession'] = profession
+					squadDamageMods[playerNameProf]['Shared'] = {}
+					squadDamageMods[playerNameProf]['Prof'] = {}
+				if modName not in profModifiers['buffList']: 
+					if modName not in squadDamageMods[playerNameProf]['Shared']:
+						squadDamageMods[playerNameProf]['Shared'][modName]={}
+						squadDamageMods[playerNameProf]['Shared'][modName]['hitCount']=modHitCount
+						squadDamageMods[playerNameProf]['Shared'][modName]['totalHitCount']=modTotalHitCount
+						squadDamageMods[playerNameProf]['Shared'][modName]['damageGain']=modDamageGain
+						squadDamageMods[playerNameProf]['Shared'][modName]['totalDamage']=modTotalDamage
 					else:
-						if modName not in squadDamageMods[playerNameProf]['Prof']:
-							squadDamageMods[playerNameProf]['Prof'][modName]={}
-							squadDamageMods[playerNameProf]['Prof'][modName]['hitCount']=modHitCount
-							squadDamageMods[playerNameProf]['Prof'][modName]['totalHitCount']=modTotalHitCount
-							squadDamageMods[playerNameProf]['Prof'][modName]['damageGain']=modDamageGain
-							squadDamageMods[playerNameProf]['Prof'][modName]['totalDamage']=modTotalDamage
-						else:
-							squadDamageMods[playerNameProf]['Prof'][modName]['hitCount']+=modHitCount
-							squadDamageMods[playerNameProf]['Prof'][modName]['totalHitCount']+=modTotalHitCount
-							squadDamageMods[playerNameProf]['Prof'][modName]['damageGain']+=modDamageGain
-							squadDamageMods[playerNameProf]['Prof'][modName]['totalDamage']+=modTotalDamage
+						squadDamageMods[playerNameProf]['Shared'][modName]['hitCount']+=modHitCount
+						squadDamageMods[playerNameProf]['Shared'][modName]['totalHitCount']+=modTotalHitCount
+						squadDamageMods[playerNameProf]['Shared'][modName]['damageGain']+=modDamageGain
+						squadDamageMods[playerNameProf]['Shared'][modName]['totalDamage']+=modTotalDamage
+				else:
+					if modName not in squadDamageMods[playerNameProf]['Prof']:
+						squadDamageMods[playerNameProf]['Prof'][modName]={}
+						squadDamageMods[playerNameProf]['Prof'][modName]['hitCount']=modHitCount
+						squadDamageMods[playerNameProf]['Prof'][modName]['totalHitCount']=modTotalHitCount
+						squadDamageMods[playerNameProf]['Prof'][modName]['damageGain']=modDamageGain
+						squadDamageMods[playerNameProf]['Prof'][modName]['totalDamage']=modTotalDamage
+					else:
+						squadDamageMods[playerNameProf]['Prof'][modName]['hitCount']+=modHitCount
+						squadDamageMods[playerNameProf]['Prof'][modName]['totalHitCount']+=modTotalHitCount
+						squadDamageMods[playerNameProf]['Prof'][modName]['damageGain']+=modDamageGain
+						squadDamageMods[playerNameProf]['Prof'][modName]['totalDamage']+=modTotalDamage
+
+		if 'incomingDamageModifiersTarget' in player_data:
+			playerNameProf = name+"{{"+profession+"}}"
+
+			for modifier in player_data['incomingDamageModifiers']:
+				modID = 'd'+str(modifier['id'])
+				modName = damage_mod_map[modID]['name']
+				modHitCount = modifier['damageModifiers'][0]['hitCount']
+				modTotalHitCount = modifier['damageModifiers'][0]['totalHitCount']
+				modDamageGain = modifier['damageModifiers'][0]['damageGain']
+				modTotalDamage = modifier['damageModifiers'][0]['totalDamage']
+
+				if playerNameProf not in squadDamageMods:
+					squadDamageMods[playerNameProf] = {}
+					squadDamageMods[playerNameProf]['name'] = name
+					squadDamageMods[playerNameProf]['profession'] = profession
+					squadDamageMods[playerNameProf]['Shared'] = {}
+					squadDamageMods[playerNameProf]['Prof'] = {}
+				if modName not in profModifiers['buffList']:
+					if modName not in squadDamageMods[playerNameProf]['Shared']:
+						squadDamageMods[playerNameProf]['Shared'][modName]={}
+						squadDamageMods[playerNameProf]['Shared'][modName]['hitCount']=modHitCount
+						squadDamageMods[playerNameProf]['Shared'][modName]['totalHitCount']=modTotalHitCount
+						squadDamageMods[playerNameProf]['Shared'][modName]['damageGain']=modDamageGain
+						squadDamageMods[playerNameProf]['Shared'][modName]['totalDamage']=modTotalDamage
+					else:
+						squadDamageMods[playerNameProf]['Shared'][modName]['hitCount']+=modHitCount
+						squadDamageMods[playerNameProf]['Shared'][modName]['totalHitCount']+=modTotalHitCount
+						squadDamageMods[playerNameProf]['Shared'][modName]['damageGain']+=modDamageGain
+						squadDamageMods[playerNameProf]['Shared'][modName]['totalDamage']+=modTotalDamage
+				else:
+					if modName not in squadDamageMods[playerNameProf]['Prof']:
+						squadDamageMods[playerNameProf]['Prof'][modName]={}
+						squadDamageMods[playerNameProf]['Prof'][modName]['hitCount']=modHitCount
+						squadDamageMods[playerNameProf]['Prof'][modName]['totalHitCount']=modTotalHitCount
+						squadDamageMods[playerNameProf]['Prof'][modName]['damageGain']=modDamageGain
+						squadDamageMods[playerNameProf]['Prof'][modName]['totalDamage']=modTotalDamage
+					else:
+						squadDamageMods[playerNameProf]['Prof'][modName]['hitCount']+=modHitCount
+						squadDamageMods[playerNameProf]['Prof'][modName]['totalHitCount']+=modTotalHitCount
+						squadDamageMods[playerNameProf]['Prof'][modName]['damageGain']+=modDamageGain
+						squadDamageMods[playerNameProf]['Prof'][modName]['totalDamage']+=modTotalDamage
 
 
-			player.stats_per_fight[fight_number]['time_active'] = get_stat_from_player_json(player_data, players_running_healing_addon, 'time_active', config)
-			player.stats_per_fight[fight_number]['time_in_combat'] = get_stat_from_player_json(player_data, players_running_healing_addon, 'time_in_combat', config)
-			player.stats_per_fight[fight_number]['group'] = get_stat_from_player_json(player_data, players_running_healing_addon, 'group', config)
-			num_party_members = party_member_counts[player_data['group']]
-			player.num_allies_group_supported += party_member_counts[player_data['group']]
-			
-			# get all stats that are supposed to be computed from the player data
-			for stat in config.stats_to_compute:
-				player.stats_per_fight[fight_number][stat] = get_stat_from_player_json(player_data, players_running_healing_addon, stat, config)
+		record.stats['time_active'] = get_stat_from_player_json(player_data, players_running_healing_addon, 'time_active', config)
+		record.stats['time_in_combat'] = get_stat_from_player_json(player_data, players_running_healing_addon, 'time_in_combat', config)
+		record.stats['group'] = get_stat_from_player_json(player_data, players_running_healing_addon, 'group', config)
+		num_party_members = party_member_counts[player_data['group']]
+		record.num_party_members = num_party_members
+		
+		# get all stats that are supposed to be computed from the player data
+		stat_values = get_stats_from_player_json(player_data, players_running_healing_addon, config.stats_to_compute, config)
+		for stat in config.stats_to_compute:
+			record.stats[stat] = stat_values[stat]
+				
+			if stat == 'dist':
+				record.stats[stat] = round(record.stats[stat])
+			elif stat == 'dmg_taken':
+				if record.stats['time_in_combat'] == 0:
+					record.stats['time_in_combat'] = 1
+				record.stats[stat] = record.stats[stat]/record.stats['time_in_combat']
+			#ripsOutTime Hack to fix the random >2M boon strips time on some players
+			elif stat == 'ripsOutTime' and record.stats[stat] > 999999:
+				for target in json_data['targets']:
+					if target['defenses'][0].get('boonStripsTime', 0) > 99999:
+						record.stats[stat] = max(record.stats[stat] - target['defenses'][0]['boonStripsTime'], 0)
+			#cleanseOutTime Hack to fix the random >2M condi cleanse time on some players
+			elif stat == 'cleansesOutTime' and record.stats[stat] > 999999:
+				for cleanse_target in json_data['players']:
+					if 'condiCleanseTime' in cleanse_target['defenses'][0]:
+						if int(cleanse_target['defenses'][0]['condiCleanseTime']) > 99999:
+							print_to_file(log, f"----==== {target['name']} : {cleanse_target['defenses'][0]['condiCleanseTime']} ====----")
+							record.stats[stat] = max(record.stats[stat] - cleanse_target['defenses'][0]['condiCleanseTime'], 0)
+			#print(stat, name)
+			# add stats of this fight and player to total stats of this fight and player
+			if record.stats[stat] > 0:
+				# buff are generation squad values, using total over time
+				if stat in config.buffs_stacking_duration and stat != 'iol':
+					#value is generated boon time on all squad players / fight duration / (players-1)" in percent, we want generated boon time on all squad players
+					fight.total_stats[stat] += round(record.stats[stat]/100.*fight.duration*(fight.squad - 1), 4)
+					record.total_stats[stat] += round(record.stats[stat]/100.*fight.duration*(fight.squad - 1), 4)
+
+					group_gen = get_stat_from_player_json(player_data, players_running_healing_addon, stat, config, False, BuffGenerationType.GROUP)
+					record.total_stats_group[stat] += round(group_gen/100.*fight.duration*(num_party_members - 1), 4)
+					
+					self_gen = get_stat_from_player_json(player_data, players_running_healing_addon, stat, config, False, BuffGenerationType.SELF)
+					record.total_stats_self[stat] += round(self_gen/100.*fight.duration, 4)
+				elif stat in config.buffs_stacking_intensity and stat != 'iol':
+					#value is generated boon time on all squad players / fight duration / (players-1)", we want generated boon time on all squad players
+					fight.total_stats[stat] += round(record.stats[stat]*fight.duration*(fight.squad - 1), 4)
+					record.total_stats[stat] += round(record.stats[stat]*fight.duration*(fight.squad - 1), 4)
 					
-				if stat == 'heal' and player.stats_per_fight[fight_number][stat] >= 0:
-					found_healing = True
-				elif stat == 'barrier' and player.stats_per_fight[fight_number][stat] >= 0:
-					found_barrier = True                    
+					group_gen = get_stat_from_player_json(player_data, players_running_healing_addon, stat, config, False, BuffGenerationType.GROUP)
+					record.total_stats_group[stat] += round(group_gen*fight.duration*(num_party_members - 1), 4)
+					
+					self_gen = get_stat_from_player_json(player_data, players_running_healing_addon, stat, config, False, BuffGenerationType.SELF)
+					record.total_stats_self[stat] += round(self_gen*fight.duration, 4)
 				elif stat == 'dist':
-					player.stats_per_fight[fight_number][stat] = round(player.stats_per_fight[fight_number][stat])
+					fight.total_stats[stat] += round(record.stats[stat]*fight.duration)
+					record.total_stats[stat] += round(record.stats[stat]*fight.duration)
 				elif stat == 'dmg_taken':
-					if player.stats_per_fight[fight_number]['time_in_combat'] == 0:
-						player.stats_per_fight[fight_number]['time_in_combat'] = 1
-					player.stats_per_fight[fight_number][stat] = player.stats_per_fight[fight_number][stat]/player.stats_per_fight[fight_number]['time_in_combat']
-				#ripsOutTime Hack to fix the random >2M boon strips time on some players
-				elif stat == 'ripsOutTime' and player.stats_per_fight[fight_number][stat] > 999999:
-					for target in json_data['targets']:
-						if target['defenses'][0].get('boonStripsTime', 0) > 99999:
-							player.stats_per_fight[fight_number][stat] = max(player.stats_per_fight[fight_number][stat] - target['defenses'][0]['boonStripsTime'], 0)
-				#cleanseOutTime Hack to fix the random >2M condi cleanse time on some players
-				elif stat == 'cleansesOutTime' and player.stats_per_fight[fight_number][stat] > 999999:
-					for cleanse_target in json_data['players']:
-						if 'condiCleanseTime' in cleanse_target['defenses'][0]:
-							if int(cleanse_target['defenses'][0]['condiCleanseTime']) > 99999:
-								print_to_file(log, f"----==== {target['name']} : {cleanse_target['defenses'][0]['condiCleanseTime']} ====----")
-								player.stats_per_fight[fight_number][stat] = max(player.stats_per_fight[fight_number][stat] - cleanse_target['defenses'][0]['condiCleanseTime'], 0)
-				#print(stat, name)
-				# add stats of this fight and player to total stats of this fight and player
-				if player.stats_per_fight[fight_number][stat] > 0:
-					# buff are generation squad values, using total over time
-					if stat in config.buffs_stacking_duration and stat != 'iol':
-						#value is generated boon time on all squad players / fight duration / (players-1)" in percent, we want generated boon time on all squad players
-						fight.total_stats[stat] += round(player.stats_per_fight[fight_number][stat]/100.*fight.duration*(fight.squad - 1), 4)
-						player.total_stats[stat] += round(player.stats_per_fight[fight_number][stat]/100.*fight.duration*(fight.squad - 1), 4)
-
-						group_gen = get_stat_from_player_json(player_data, players_running_healing_addon, stat, config, False, BuffGenerationType.GROUP)
-						player.total_stats_group[stat] += round(group_gen/100.*fight.duration*(num_party_members - 1), 4)
-						
-						self_gen = get_stat_from_player_json(player_data, players_running_healing_addon, stat, config, False, BuffGenerationType.SELF)
-						player.total_stats_self[stat] += round(self_gen/100.*fight.duration, 4)
-					elif stat in config.buffs_stacking_intensity and stat != 'iol':
-						#value is generated boon time on all squad players / fight duration / (players-1)", we want generated boon time on all squad players
-						fight.total_stats[stat] += round(player.stats_per_fight[fight_number][stat]*fight.duration*(fight.squad - 1), 4)
-						player.total_stats[stat] += round(player.stats_per_fight[fight_number][stat]*fight.duration*(fight.squad - 1), 4)
-						
-						group_gen = get_stat_from_player_json(player_data, players_running_healing_addon, stat, config, False, BuffGenerationType.GROUP)
-						player.total_stats_group[stat] += round(group_gen*fight.duration*(num_party_members - 1), 4)
-						
-						self_gen = get_stat_from_player_json(player_data, players_running_healing_addon, stat, config, False, BuffGenerationType.SELF)
-						player.total_stats_self[stat] += round(self_gen*fight.duration, 4)
-					elif stat == 'dist':
-						fight.total_stats[stat] += round(player.stats_per_fight[fight_number][stat]*fight.duration)
-						player.total_stats[stat] += round(player.stats_per_fight[fight_number][stat]*fight.duration)
-					elif stat == 'dmg_taken':
-						fight.total_stats[stat] += round(player.stats_per_fight[fight_number][stat]*player.stats_per_fight[fight_number]['time_in_combat'])
-						player.total_stats[stat] += round(player.stats_per_fight[fight_number][stat]*player.stats_per_fight[fight_number]['time_in_combat'])
-					elif stat == 'heal':
-						fight.total_stats[stat] += player.stats_per_fight[fight_number][stat]
-						player.total_stats[stat] += player.stats_per_fight[fight_number][stat]
-
-						if player_data['name'] in players_running_healing_addon and 'extHealingStats' in player_data:
-							outgoingHealingAllies = player_data['extHealingStats']['outgoingHealingAllies']
-							total_healing_group = 0
-							for index in range(len(json_data['players'])):
-								is_same_group = player_data['group'] == json_data['players'][index]['group']
-								if is_same_group:
-									total_healing_group += (outgoingHealingAllies[index][0]['healing'] - outgoingHealingAllies[index][0]['downedHealing'])
-									if player_data['name'] == json_data['players'][index]['name']:
-										player.total_stats_self[stat] += (outgoingHealingAllies[index][0]['healing'] - outgoingHealingAllies[index][0]['downedHealing'])
-						player.total_stats_group[stat] += total_healing_group
-						if stat not in HighScores:
-							HighScores[stat]={}
-							HighScores[stat+'_PS']={}						
-						update_high_score(stat, "{{"+player_data['profession']+"}}"+player_data['name']+" | [["+str(fightStamp)+"|"+str(get_fight_log_link_data(json_data, fightStamp, fight_number)[7])+"]]", player.stats_per_fight[fight_number][stat])
-						if player.stats_per_fight[fight_number]['time_active'] > 0:
-							stat_per_sec = (player.stats_per_fight[fight_number][stat]/player.stats_per_fight[fight_number]['time_active'])
-						else:
-							stat_per_sec = 0
-						update_high_score(stat+'_PS', "{{"+player_data['profession']+"}}"+player_data['name']+" | [["+str(fightStamp)+"|"+str(get_fight_log_link_data(json_data, fightStamp, fight_number)[7])+"]]", stat_per_sec)
-					elif stat == 'barrier':
-						fight.total_stats[stat] += player.stats_per_fight[fight_number][stat]
-						player.total_stats[stat] += player.stats_per_fight[fight_number][stat]
-
-						if player_data['name'] in players_running_healing_addon and 'extBarrierStats' in player_data:
-							allied_barrier_1s = player_data['extBarrierStats']['alliedBarrier1S']
-							total_barrier_group = 0
-							for index in range(len(json_data['players'])):
-								is_same_group = player_data['group'] == json_data['players'][index]['group']
-								if is_same_group:
-									total_barrier_group += allied_barrier_1s[index][0][-1]
-									if player_data['name'] == json_data['players'][index]['name']:
-										player.total_stats_self[stat] += allied_barrier_1s[index][0][-1]
-						player.total_stats_group[stat] += total_barrier_group
-						if stat not in HighScores:
-							HighScores[stat]={}
-							HighScores[stat+'_PS']={}						
-						update_high_score(stat, "{{"+player_data['profession']+"}}"+player_data['name']+" | [["+str(fightStamp)+"|"+str(get_fight_log_link_data(json_data, fightStamp, fight_number)[7])+"]]", player.stats_per_fight[fight_number][stat])
-						if player.stats_per_fight[fight_number]['time_active'] > 0:
-							stat_per_sec = (player.stats_per_fight[fight_number][stat]/player.stats_per_fight[fight_number]['time_active'])
-						else:
-							stat_per_sec = 0
-						update_high_score(stat+'_PS', "{{"+player_data['profession']+"}}"+player_data['name']+" | [["+str(fightStamp)+"|"+str(get_fight_log_link_data(json_data, fightStamp, fight_number)[7])+"]]", stat_per_sec)
+					fight.total_stats[stat] += round(record.stats[stat]*record.stats['time_in_combat'])
+					record.total_stats[stat] += round(record.stats[stat]*record.stats['time_in_combat'])
+				elif stat == 'heal':
+					fight.total_stats[stat] += record.stats[stat]
+					record.total_stats[stat] += record.stats[stat]
+
+					if player_data['name'] in players_running_healing_addon and 'extHealingStats' in player_data:
+						outgoingHealingAllies = player_data['extHealingStats']['outgoingHealingAllies']
+						total_healing_group = 0
+						for index in actor_index.indices_by_group[player_data['group']]:
+							total_healing_group += (outgoingHealingAllies[index][0]['healing'] - outgoingHealingAllies[index][0]['downedHealing'])
+							if player_data['name'] == actor_index.actors[index].name:
+								record.total_stats_self[stat] += (outgoingHealingAllies[index][0]['healing'] - outgoingHealingAllies[index][0]['downedHealing'])
+					record.total_stats_group[stat] += total_healing_group
+					record.high_scores.append((stat, "{{"+player_data['profession']+"}}"+player_data['name']+" | "+fight_context.high_score_link, record.stats[stat]))
+					if record.stats['time_active'] > 0:
+						stat_per_sec = (record.stats[stat]/record.stats['time_active'])
 					else:
-						# all non-buff stats
-						fight.total_stats[stat] += player.stats_per_fight[fight_number][stat]
-						player.total_stats[stat] += player.stats_per_fight[fight_number][stat]
-						if stat not in HighScores:
-							HighScores[stat]={}
-							HighScores[stat+'_PS']={}
-			
-						update_high_score(stat, "{{"+player_data['profession']+"}}"+player_data['name']+" | [["+str(fightStamp)+"|"+str(get_fight_log_link_data(json_data, fightStamp, fight_number)[7])+"]]", player.stats_per_fight[fight_number][stat])
-						if player.stats_per_fight[fight_number]['time_active'] > 0:
-							stat_per_sec = (player.stats_per_fight[fight_number][stat]/player.stats_per_fight[fight_number]['time_active'])
-						else:
-							stat_per_sec = 0
-						update_high_score(stat+'_PS', "{{"+player_data['profession']+"}}"+player_data['name']+" | [["+str(fightStamp)+"|"+str(get_fight_log_link_data(json_data, fightStamp, fight_number)[7])+"]]", stat_per_sec)
-
-			if debug:
-				print("\n")
-				print(name)
-				for stat in player.stats_per_fight[fight_number].keys():
-					print(stat+": "+str(player.stats_per_fight[fight_number][stat]))
-				print("\n\n")
-
-			player.num_fights_present += 1
-			player.num_enemies_present += fight.enemies
-			player.num_allies_supported += (fight.squad)
-			player.wt_dps_enemies.append(fight.enemies)
-			player.wt_dps_duration.append(player.stats_per_fight[fight_number]['time_in_combat'])
-			player.wt_dps_damage.append(player.stats_per_fight[fight_number]['dmg'])
-			player.duration_fights_present += fight.duration
-			player.duration_active += player.stats_per_fight[fight_number]['time_active']
-			player.duration_in_combat += player.stats_per_fight[fight_number]['time_in_combat']
-			player.swapped_build |= build_swapped
-			player.stats_per_fight[fight_number]['fight_duration'] = fight.duration
-			player.stats_per_fight[fight_number]['allies'] = fight.squad
-			player.stats_per_fight[fight_number]['role'] = find_sub_type(player_data)
-
-
-		# create lists sorted according to stats
-		sortedStats = {key: list() for key in config.stats_to_compute}
-		for stat in config.stats_to_compute:
-			sortedStats[stat] = sort_players_by_value_in_fight(players, stat, fight_number)
+						stat_per_sec = 0
+					record.high_scores.append((stat+'_PS', "{{"+player_data['profession']+"}}"+player_data['name']+" | "+fight_context.high_score_link, stat_per_sec))
+				elif stat == 'barrier':
+					fight.total_stats[stat] += record.stats[stat]
+					record.total_stats[stat] += record.stats[stat]
+
+					if player_data['name'] in players_running_healing_addon and 'extBarrierStats' in player_data:
+						allied_barrier_1s = player_data['extBarrierStats']['alliedBarrier1S']
+						total_barrier_group = 0
+						for index in actor_index.indices_by_group[player_data['group']]:
+							total_barrier_group += allied_barrier_1s[index][0][-1]
+							if player_data['name'] == actor_index.actors[index].name:
+								record.total_stats_self[stat] += allied_barrier_1s[index][0][-1]
+					record.total_stats_group[stat] += total_barrier_group
+					record.high_scores.append((stat, "{{"+player_data['profession']+"}}"+player_data['name']+" | "+fight_context.high_score_link, record.stats[stat]))
+					if record.stats['time_active'] > 0:
+						stat_per_sec = (record.stats[stat]/record.stats['time_active'])
+					else:
+						stat_per_sec = 0
+					record.high_scores.append((stat+'_PS', "{{"+player_data['profession']+"}}"+player_data['name']+" | "+fight_context.high_score_link, stat_per_sec))
+				else:
+					# all non-buff stats
+					fight.total_stats[stat] += record.stats[stat]
+					record.total_stats[stat] += record.stats[stat]
+					record.high_scores.append((stat, "{{"+player_data['profession']+"}}"+player_data['name']+" | "+fight_context.high_score_link, record.stats[stat]))
+					if record.stats['time_active'] > 0:
+						stat_per_sec = (record.stats[stat]/record.stats['time_active'])
+					else:
+						stat_per_sec = 0
+					record.high_scores.append((stat+'_PS', "{{"+player_data['profession']+"}}"+player_data['name']+" | "+fight_context.high_score_link, stat_per_sec))
 
 		if debug:
-			for stat in config.stats_to_compute:
-				print("sorted "+stat+": "+str(sortedStats[stat]))
+			print("\n")
+			print(name)
+			for stat in record.stats.keys():
+				print(stat+": "+str(record.stats[stat]))
+			print("\n\n")
+
+
+		record.stats['fight_duration'] = fight.duration
+		record.stats['allies'] = fight.squad
+		record.stats['role'] = get_player_context(player_data).sub_type
+
+	return records
+
+
+# Read a log for extract_fight. Fights that are skipped by the values of probe_log_header are not decoded.
+def load_fight_log(file_path, filename, config):
+	load_stats = LoadStats(filename)
+	return decode_fight_log(read_log_bytes(file_path, load_stats), load_stats, config)
+
+
+# Decode the json text of a log read by read_log_bytes, see load_fight_log
+def decode_fight_log(buffer, load_stats, config):
+	header = probe_log_header(buffer)
+	if header is not None and get_skip_reasons(round(header.duration_ms/1000), header.num_players, header.num_enemies, config):
+		return LoadedLog(load_stats, header)
+	return LoadedLog(load_stats, header, decode_log(buffer, TOP_STATS_LOG_PROJECTION, stats=load_stats))
+
+
+# Extract everything the top stats need from a single log.
+# The module level accumulators are swapped for empty ones while the fight is parsed, so the
+# result doesn't depend on any other fight and can be computed in a worker process.
+# Input:
+# file_path = path of the log
+# filename = file name of the log
+# fight_number = index of the log in the input directory
+# config = configuration to use for top stats computation
+# loaded_log = the LoadedLog of this file if it was already read, see load_fight_log
+# Output:
+# FightPartial
+def extract_fight(file_path, filename, fight_number, config, loaded_log=None):
+	print_string = "parsing "+filename
+	print(print_string)
+
+	if loaded_log is None:
+		loaded_log = load_fight_log(file_path, filename, config)
+
+	module_globals = globals()
+	saved_state = {name: module_globals[name] for name in fight_state_globals}
+	module_globals.update(deepcopy(empty_fight_state))
+	try:
+		log = io.StringIO()
+		partial = FightPartial(filename, load_stats=loaded_log.load_stats)
+
+		print_to_file(log, str(loaded_log.load_stats))
+
+		# short or small fights are skipped without decoding them
+		header = loaded_log.header
+		if loaded_log.json_data is None:
+			partial.fight = init_fight(round(header.duration_ms/1000), header.num_players, header.num_squad, header.num_enemies, header.time_start_std, header.time_end_std, config, log)
+			partial.fight_state = {name: module_globals[name] for name in fight_state_globals}
+			partial.log_text = log.getvalue()
+			return partial
+		json_data = loaded_log.json_data
+
+		# buff ids are taken from the buffMap of this log
+		fight_config = deepcopy(config)
+		fight_config.buff_ids = {}
+		fight_config.buffs_stacking_duration = []
+		fight_config.buffs_stacking_intensity = []
+		get_buff_ids_from_json(json_data, fight_config)
+		partial.buff_ids = fight_config.buff_ids
+		partial.buffs_stacking_duration = fight_config.buffs_stacking_duration
+		partial.buffs_stacking_intensity = fight_config.buffs_stacking_intensity
+
+		fightStamp = os.path.basename(filename).split("_",1)[0]
+		fight_context = FightContext(json_data, fightStamp, fight_number)
+
+		# get fight stats
+		fight, players_running_healing_addon = get_stats_from_fight_json(json_data, fight_config, log, fight_context)[:2]
+		partial.fight = fight
+		partial.players_running_healing_addon = players_running_healing_addon
+
+		if not fight.skipped:
+			#Collect Fight Link Data
+			partial.fight_link = fight_context.link_data
+			partial.player_records = get_player_fight_records(fight_context, fight_config, fight, players_running_healing_addon, log)
+
+		partial.fight_state = {name: module_globals[name] for name in fight_state_globals}
+		partial.log_text = log.getvalue()
+	finally:
+		module_globals.update(saved_state)
+		reset_player_contexts()
+	return partial
+
+
+#Bump this when the extraction changes what ends up in a FightPartial, all cached fights are extracted again then
+EXTRACTOR_VERSION = 10
+
+#Config fields that are only used after all fights were extracted, changing them keeps the cached fights valid.
+#Buff ids are resolved from each log itself.
+output_only_config_fields = [
+	'num_players_listed', 'num_players_considered_top_percentage', 'num_players_considered_top', 'player_sorting_stat_type',
+	'min_attendance_portion_for_percentage', 'min_attendance_portion_for_late', 'min_attendance_portion_for_buildswap',
+	'min_attendance_percentage_for_average', 'min_attendance_percentage_for_top',
+	'portion_of_top_for_total', 'portion_of_topDamage_for_total', 'portion_of_top_for_consistent', 'portion_of_top_for_percentage',
+	'portion_of_top_for_late', 'portion_of_top_for_buildswap', 'portion_of_top_for_average',
+	'summary_title', 'summary_creator', 'charts', 'damage_overview_only', 'defensive_overview_only',
+	'buff_ids', 'buffs_stacking_duration', 'buffs_stacking_intensity'
+]
+
+
+def get_extraction_config_hash(config):
+	"""Hash of the extractor version and all config values the extraction of a fight depends on."""
+	relevant = sorted((key, repr(value)) for key, value in vars(config).items() if key not in output_only_config_fields)
+	return hashlib.sha256(repr((EXTRACTOR_VERSION, relevant)).encode()).hexdigest()
+
+
+def get_guild_members_hash():
+	"""Hash of the guild members and their ranks, the guild status of the players is stored with each extracted fight."""
+	if not Guild_Data:
+		return ""
+	ranks = sorted((member["name"], member["rank"]) for member in members)
+	return hashlib.sha256(repr(ranks).encode()).hexdigest()
+
+
+def get_fight_cache_path(cache_dir, buffer, filename, config_hash):
+	"""The cache file of a log, keyed by its json text, its name (used for the fight links), the guild members and the extraction config."""
+	fightStamp = os.path.basename(filename).split("_",1)[0]
+	key = "\n".join((hashlib.sha256(buffer).hexdigest(), filename, Plen_Bot_Logs.get(fightStamp, ""), get_guild_members_hash(), config_hash))
+	return os.path.join(cache_dir, hashlib.sha256(key.encode()).hexdigest()+".pickle")
+
+
+# Everything get_fight_partial does before the extraction: look up the log in the cache in cache_dir,
+# or read it when it isn't cached. Safe to run in a background thread, see prefetch_logs.
+# Output:
+# path of the cache file or None without cache_dir
+# FightPartial from the cache or LoadedLog
+def prefetch_fight(file_path, filename, config, cache_dir=None, config_hash=""):
+	if cache_dir is None:
+		return None, load_fight_log(file_path, filename, config)
+
+	# the log is read once, for its cache key and, if it isn't cached, for the extraction
+	load_stats = LoadStats(filename)
+	buffer = read_log_bytes(file_path, load_stats)
+	cache_path = get_fight_cache_path(cache_dir, buffer, filename, config_hash)
+	if os.path.isfile(cache_path):
+		try:
+			with open(cache_path, 'rb') as cache_file:
+				partial = pickle.load(cache_file)
+			print("using cached "+filename)
+			return cache_path, partial
+		except Exception as err:
+			print("WARNING: ignoring unreadable cache file "+cache_path+": "+str(err))
+	return cache_path, decode_fight_log(buffer, load_stats, config)
+
+
+# Get the FightPartial of a log from the cache in cache_dir, or extract it and add it to the cache.
+# prefetched is the result of prefetch_fight if that was already called for this log.
+def get_fight_partial(file_path, filename, fight_number, config, cache_dir=None, config_hash="", prefetched=None):
+	if prefetched is None:
+		prefetched = prefetch_fight(file_path, filename, config, cache_dir, config_hash)
+	cache_path, loaded = prefetched
+
+	if isinstance(loaded, FightPartial):
+		partial = loaded
+		partial.load_stats = None
+		# the fight number is the only part that depends on the other logs in the directory
+		if partial.fight_link:
+			partial.fight_link[0] = fight_number+1
+		return partial
+
+	partial = extract_fight(file_path, filename, fight_number, config, loaded)
+	if cache_path is not None:
+		# write to a temporary file first, so an interrupted run never leaves a broken cache entry
+		temp_path = cache_path+"."+str(os.getpid())+".tmp"
+		with open(temp_path, 'wb') as cache_file:
+			pickle.dump(partial, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+		os.replace(temp_path, cache_path)
+	return partial
+
+
+# This class stores the top stats collected from all fights added so far, see add_fight_to_aggregate.
+# It can be saved to add the new fights of a later run to it, see save_aggregate_state.
+@dataclass
+class AggregateState:
+	players: list = field(default_factory=list)        # list of all player/profession combinations
+	player_index: dict = field(default_factory=dict)   # dictionary that matches each player/profession combo to its index in players list
+	account_index: dict = field(default_factory=dict)  # dictionary that matches each account name to a list of its indices in players list
+	squad_comp: dict = field(default_factory=dict)     # dictionary that contains count of professions by fight_num
+	party_comp: dict = field(default_factory=dict)     # dictionary that contains list of professions by party by fight_num
+	fights: list = field(default_factory=list)         # list of all fights (also the skipped ones)
+	fight_files: list = field(default_factory=list)    # file name of each fight in fights
+	used_fights: int = 0
+	found_healing: bool = False    # healing only in logs if addon was installed
+	found_barrier: bool = False
+	buff_ids: dict = field(default_factory=dict)       # buff ids of the first fight, see get_buff_ids_from_json
+	buffs_stacking_duration: list = field(default_factory=list)
+	buffs_stacking_intensity: list = field(default_factory=list)
+	config_hash: str = ""                              # see get_aggregate_config_hash
+	module_state: dict = field(default_factory=dict)   # the aggregate_globals when the state was saved
+
+
+#Module level data that belongs to the aggregate besides the fight accumulators
+aggregate_globals = fight_state_globals + ['HighScores', 'Fight_Logs']
+
+
+def get_aggregate_config_hash(config):
+	"""Hash of the extractor version and all config values, a saved aggregate is only reused with the same config."""
+	relevant = sorted((key, repr(value)) for key, value in vars(config).items() if key not in ['buff_ids', 'buffs_stacking_duration', 'buffs_stacking_intensity'])
+	return hashlib.sha256(repr((EXTRACTOR_VERSION, relevant)).encode()).hexdigest()
+
+
+def save_aggregate_state(state, file_path):
+	"""Save the aggregate and the module level data it belongs to, before any output modifies them."""
+	temp_path = file_path+"."+str(os.getpid())+".tmp"
+	with open(temp_path, 'wb') as state_file:
+		state_file.write(snapshot_aggregate_state(state))
+	os.replace(temp_path, file_path)
+
+
+def snapshot_aggregate_state(state):
+	"""Pickle the aggregate together with the module level data it belongs to, see restore_aggregate_state."""
+	module_globals = globals()
+	state.module_state = {name: module_globals[name] for name in aggregate_globals}
+	try:
+		return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+	finally:
+		state.module_state = {}
+
+
+def restore_aggregate_state(snapshot):
+	"""Unpickle an aggregate from snapshot_aggregate_state and restore the module level data it belongs to."""
+	state = pickle.loads(snapshot)
+	# the top stats scripts import the module level data by name, so it is restored in place
+	module_globals = globals()
+	for name, value in state.module_state.items():
+		if isinstance(value, dict):
+			module_globals[name].clear()
+			module_globals[name].update(value)
+		else:
+			module_globals[name][:] = value
+	state.module_state = {}
+	return state
+
+
+def load_aggregate_state(file_path, config):
+	"""
+	Load an aggregate saved by save_aggregate_state and restore the module level data it belongs to.
+
+	Returns:
+		AggregateState: the saved aggregate, or None if there is none for this config.
+	"""
+	if not os.path.isfile(file_path):
+		return None
+	try:
+		with open(file_path, 'rb') as state_file:
+			snapshot = state_file.read()
+		state = pickle.loads(snapshot)
+	except Exception as err:
+		print("WARNING: ignoring unreadable aggregate state "+file_path+": "+str(err))
+		return None
+	if state.config_hash != get_aggregate_config_hash(config):
+		print("Config or parser changed since "+file_path+" was saved, parsing all fights again")
+		return None
+
+	state = restore_aggregate_state(snapshot)
+	config.buff_ids.update(state.buff_ids)
+	config.buffs_stacking_duration.extend(state.buffs_stacking_duration)
+	config.buffs_stacking_intensity.extend(state.buffs_stacking_intensity)
+	return state
+
+
+# Add the FightPartial of the next fight to the aggregate.
+# Input:
+# state = AggregateState to add the fight to
+# partial = FightPartial as returned by extract_fight
+# config = configuration to use for top stats computation
+# log = log file to write to
+def add_fight_to_aggregate(state, partial, config, log):
+	players = state.players
+	player_index = state.player_index
+	account_index = state.account_index
+	squad_comp = state.squad_comp
+	party_comp = state.party_comp
+	fights = state.fights
+
+	log.write(partial.log_text)
+	merge_fight_state(partial.fight_state)
+	fight = partial.fight
+
+	if not fights:
+		config.buff_ids.update(partial.buff_ids)
+		config.buffs_stacking_duration.extend(partial.buffs_stacking_duration)
+		config.buffs_stacking_intensity.extend(partial.buffs_stacking_intensity)
+		state.buff_ids = partial.buff_ids
+		state.buffs_stacking_duration = partial.buffs_stacking_duration
+		state.buffs_stacking_intensity = partial.buffs_stacking_intensity
+
+	# add new entry for this fight in all players
+	for player in players:
+		player.stats_per_fight.append({key: value for key, value in config.empty_stats.items()})   
+
+	fight_number = int(len(fights))
+	# don't compute anything for skipped fights
+	if fight.skipped:
+		fights.append(fight)
+		state.fight_files.append(partial.filename)
+		log.write("skipped "+partial.filename)            
+		return
+
+	Fight_Logs.append(partial.fight_link)
+
+	state.used_fights += 1
+	#fight_number = used_fights-1
+	squad_comp[fight_number]={}
+	party_comp[fight_number]={}
+	
+	# get stats for each player
+	for record in partial.player_records:
+		account, name, profession, playerGroup = record.account, record.name, record.profession, record.group
+		create_new_player = False
+		build_swapped = False
 		
-		# increase number of times top x was achieved for top x players in each stat
+		# Update squad composition for this fight
+		if profession not in squad_comp[fight_number]:
+			squad_comp[fight_number][profession] = 1
+		else:
+			squad_comp[fight_number][profession] += 1
+
+		#collect players by party
+		if playerGroup not in party_comp[fight_number]:
+			party_comp[fight_number][playerGroup]=[]
+		party_comp[fight_number][playerGroup].append([profession, name])
+
+		# if this combination of charname + profession is not in the player index yet, create a new entry
+		name_and_prof = name+" "+profession
+		if name_and_prof not in player_index.keys():
+			print("creating new player",name_and_prof)
+			create_new_player = True
+
+		# if this account is not in the account index yet, create a new entry
+		if account not in account_index.keys():
+			account_index[account] = [len(players)]
+		elif name_and_prof not in player_index.keys():
+			# if account does already exist, but name/prof combo does not, this player swapped build or character
+			# -> note for all Player instances of this account
+			for ind in range(len(account_index[account])):
+				players[account_index[account][ind]].swapped_build = True
+			account_index[account].append(len(players))
+			build_swapped = True
+
+		if create_new_player:
+			player = Player(account, name, profession)
+			player.initialize(config)
+			player_index[name_and_prof] = len(players)
+			# fill up fights where the player wasn't there yet with empty stats
+			while len(player.stats_per_fight) <= fight_number:                
+			#while len(player.stats_per_fight) <= used_fights:
+				player.stats_per_fight.append({key: value for key, value in config.empty_stats.items()})                
+			players.append(player)
+
+		player = players[player_index[name_and_prof]]
+
+		player.stats_per_fight[fight_number] = record.stats
+		player.num_allies_group_supported += record.num_party_members
+		if 'heal' in config.stats_to_compute and record.stats['heal'] >= 0:
+			state.found_healing = True
+		if 'barrier' in config.stats_to_compute and record.stats['barrier'] >= 0:
+			state.found_barrier = True
 		for stat in config.stats_to_compute:
-			increase_top_x_reached(players, sortedStats[stat], config, stat)
-			# round total_stats for this fight
-			fight.total_stats[stat] = round(fight.total_stats[stat])
+			player.total_stats[stat] += record.total_stats[stat]
+			player.total_stats_group[stat] += record.total_stats_group[stat]
+			player.total_stats_self[stat] += record.total_stats_self[stat]
+		for stat, key, value in record.high_scores:
+			if stat not in HighScores:
+				HighScores[stat]={}
+			update_high_score(stat, key, value)
+
+		player.num_fights_present += 1
+		player.num_enemies_present += fight.enemies
+		player.num_allies_supported += (fight.squad)
+		player.wt_dps_enemies.append(fight.enemies)
+		player.wt_dps_duration.append(player.stats_per_fight[fight_number]['time_in_combat'])
+		player.wt_dps_damage.append(player.stats_per_fight[fight_number]['dmg'])
+		player.duration_fights_present += fight.duration
+		player.duration_active += player.stats_per_fight[fight_number]['time_active']
+		player.duration_in_combat += player.stats_per_fight[fight_number]['time_in_combat']
+		player.swapped_build |= build_swapped
+
+	# create lists sorted according to stats
+	sortedStats = {key: list() for key in config.stats_to_compute}
+	for stat in config.stats_to_compute:
+		sortedStats[stat] = sort_players_by_value_in_fight(players, stat, fight_number)
 
-		fights.append(fight)
+	if debug:
+		for stat in config.stats_to_compute:
+			print("sorted "+stat+": "+str(sortedStats[stat]))
+	
+	# increase number of times top x was achieved for top x players in each stat
+	for stat in config.stats_to_compute:
+		increase_top_x_reached(players, sortedStats[stat], config, stat)
+		# round total_stats for this fight
+		fight.total_stats[stat] = round(fight.total_stats[stat])
+
+	fights.append(fight)
+	state.fight_files.append(partial.filename)
+
+
+# Collect the top stats data.
+# Input:
+# args = cmd line arguments
+# config = configuration to use for top stats computation
+# log = log file to write to
+# Output:
+# list of Players with their stats
+# list of all fights (also the skipped ones)
+# was healing found in the logs?
+def collect_stat_data(args, config, log, anonymize=False):
+
+	# with a state file, only the fights that are not in the saved aggregate yet are parsed
+	state_file = getattr(args, 'state_file', None)
+	state = None
+	if state_file is not None:
+		state = load_aggregate_state(state_file, config)
+	if state is None:
+		state = AggregateState(config_hash=get_aggregate_config_hash(config))
+	else:
+		print("continuing "+state_file+" with "+str(len(state.fights))+" fights")
+
+	log_files = [filename for filename in find_log_files(args.input_directory) if filename not in state.fight_files]
+
+	add_log_files_to_aggregate(args, state, log_files, config, log)
+
+	if state_file is not None:
+		save_aggregate_state(state, state_file)
+
+	return finish_stat_data(args, state, config, log, anonymize)
+
+
+# Extract the fights in log_files (names relative to args.input_directory) and add them to the aggregate in order.
+# Uses the --cache_dir, --jobs, --prefetch and --prefetch_memory options in args.
+def add_log_files_to_aggregate(args, state, log_files, config, log):
+	file_paths = ["".join((args.input_directory,"/",filename)) for filename in log_files]
+	fight_numbers = range(len(state.fights), len(state.fights)+len(log_files))
+
+	# extracted fights are reused from the cache as long as the log and the extraction config are the same
+	cache_dir = getattr(args, 'cache_dir', None)
+	config_hash = ""
+	if cache_dir is not None:
+		os.makedirs(cache_dir, exist_ok=True)
+		config_hash = get_extraction_config_hash(config)
+
+	# fights are extracted independently and merged in file order, either here or in --jobs worker processes
+	jobs = getattr(args, 'jobs', 1)
+	fight_args = (file_paths, log_files, fight_numbers, repeat(config), repeat(cache_dir), repeat(config_hash))
+	if jobs > 1:
+		executor = ProcessPoolExecutor(max_workers=jobs, initializer=init_fight_worker, initargs=(members, Plen_Bot_Logs))
+		partials = executor.map(get_fight_partial, *fight_args)
+	else:
+		# the next logs are read and decoded in background threads while the current one is extracted
+		executor = None
+		lookahead = getattr(args, 'prefetch', 0)
+		memory_limit = getattr(args, 'prefetch_memory', 512) * 1024 * 1024
+		log_file_names = dict(zip(file_paths, log_files))
+		prefetched = prefetch_logs(file_paths, lambda file_path: prefetch_fight(file_path, log_file_names[file_path], config, cache_dir, config_hash), lookahead, memory_limit)
+		partials = map(get_fight_partial, *fight_args, prefetched)
+
+	# iterating over all fights in directory
+	load_stats = []
+	for partial in partials:
+		if partial.load_stats is not None:
+			load_stats.append(partial.load_stats)
+		add_fight_to_aggregate(state, partial, config, log)
+
+	if executor is not None:
+		executor.shutdown()
+
+	# read throughput of the logs by how they were stored
+	for line in summarize_load_stats(load_stats):
+		print_to_file(log, line)
+
+
+# Compute the percentages, averages and ranks of the top stats from all fights in the aggregate.
+# This modifies the aggregate, use snapshot_aggregate_state first to add more fights afterwards.
+# Output:
+# the collected stats as returned by collect_stat_data
+def finish_stat_data(args, state, config, log, anonymize=False):
+	players = state.players
+	account_index = state.account_index
+	squad_comp = state.squad_comp
+	party_comp = state.party_comp
+	fights = state.fights
+	used_fights = state.used_fights
+	found_healing = state.found_healing
+	found_barrier = state.found_barrier
 
 	if used_fights == 0:
 		#print("ERROR: no valid fights with filetype "+args.filetype+" found in "+args.input_directory)
@@ -2869,266 +3483,432 @@ def get_combat_time_breakpoints(player_json):
 	return breakpoints
 
 def sum_breakpoints(breakpoints):
-	combat_time = 0
-	for [start, end] in breakpoints:
-		combat_time += end - start
-	return combat_time
+	return measure(breakpoints)
+
+
+# Names of the buff generation arrays of a player json by BuffGenerationType and active
+buff_array_names = {
+	(BuffGenerationType.SQUAD, False): 'squadBuffs',
+	(BuffGenerationType.SQUAD, True): 'squadBuffsActive',
+	(BuffGenerationType.GROUP, False): 'groupBuffs',
+	(BuffGenerationType.GROUP, True): 'groupBuffsActive',
+	(BuffGenerationType.OFFGROUP, False): 'offGroupBuffs',
+	(BuffGenerationType.OFFGROUP, True): 'offGroupBuffsActive',
+	(BuffGenerationType.SELF, False): 'selfBuffs',
+	(BuffGenerationType.SELF, True): 'selfBuffsActive',
+}
 
-# get value of stat from player_json
-def get_stat_from_player_json(player_json, players_running_healing_addon, stat, config, activeBuffs = False, buffGenType = BuffGenerationType.SQUAD):
-	if stat == 'time_in_combat':
-		return round(sum_breakpoints(get_combat_time_breakpoints(player_json)) / 1000)
+# This class stores what several parts of the parser derive from the same player of a fight,
+# so it is computed once per player and fight, on first use. Get it with get_player_context.
+class PlayerContext:
+	def __init__(self, player_json):
+		self.player_json = player_json
+		self.buff_data_by_id = {}    # buff array name -> buff id -> buffData[0], see get_buff_data
+
+	@cached_property
+	def combat_time_breakpoints(self):
+		# [start, end] in ms of each time in combat
+		return get_combat_time_breakpoints(self.player_json)
+
+	@cached_property
+	def combat_time_ms(self):
+		return sum_breakpoints(self.combat_time_breakpoints)
+
+	@cached_property
+	def time_in_combat(self):
+		# in s, as the time_in_combat stat
+		return round(self.combat_time_ms / 1000)
+
+	@cached_property
+	def sub_type(self):
+		# role of the player, see find_sub_type
+		return find_sub_type(self.player_json)
+
+	@cached_property
+	def buff_uptimes_by_id(self):
+		# buff id -> entry of buffUptimesActive, the first entry of a buff id counts. Set by
+		# BuffUptimeDispatcher.dispatch while it walks the entries, built here if it didn't.
+		buff_uptimes = {}
+		for item in self.player_json.get('buffUptimesActive', []):
+			buff_uptimes.setdefault(int(item['id']), item)
+		return buff_uptimes
+
+	def get_buff_data(self, buff_array_name):
+		"""Return the buffData[0] of each buff in a buff generation array of the player by buff id, None if the player has no such array."""
+		if buff_array_name not in self.buff_data_by_id:
+			if buff_array_name not in self.player_json:
+				self.buff_data_by_id[buff_array_name] = None
+			else:
+				buff_data = {}
+				for buff in self.player_json[buff_array_name]:
+					# the first entry of a buff id counts
+					if 'id' in buff and buff['id'] not in buff_data:
+						buff_data[buff['id']] = buff['buffData'][0]
+				self.buff_data_by_id[buff_array_name] = buff_data
+		return self.buff_data_by_id[buff_array_name]
+
+
+# PlayerContext of each player json of the current fight by id(). The contexts keep their player json
+# alive, so an id is never reused for another player while it is in here. Cleared for every new fight.
+player_contexts = {}
+
+def get_player_context(player_json):
+	context = player_contexts.get(id(player_json))
+	if context is None:
+		context = PlayerContext(player_json)
+		player_contexts[id(player_json)] = context
+	return context
+
+def reset_player_contexts():
+	player_contexts.clear()
+
+# This class stores what the buffUptimesActive handlers need to know about the squad player whose buffs they get
+@dataclass
+class BuffUptimePlayer:
+	name: str
+	prof_name: str               # {{profession}} name, as in uptime_Table
+	group: int
+	combat_time: float           # s in combat
+	condition_name: str          # |{{profession}} |name | group, as in conditionData
+	condition_fight_time: float  # s active, rounded to 0.1
+
+# This class walks the buffUptimesActive of a player once and hands each entry to the handlers
+# registered for its buff id, in order of registration. Each handler takes the entry and the
+# BuffUptimePlayer.
+class BuffUptimeDispatcher:
+	def __init__(self):
+		self.handlers = {}   # buff id -> handlers
+
+	def register(self, buff_ids, handler):
+		for buff_id in buff_ids:
+			self.handlers.setdefault(buff_id, []).append(handler)
+
+	def dispatch(self, context, buff_player):
+		"""Call the handlers of each buffUptimesActive entry of the player of context, and index the entries by id on context."""
+		buff_uptimes = {}
+		for item in context.player_json['buffUptimesActive']:
+			buff_id = int(item['id'])
+			buff_uptimes.setdefault(buff_id, item)
+			for handler in self.handlers.get(buff_id, ()):
+				handler(item, buff_player)
+		context.buff_uptimes_by_id = buff_uptimes
+
+#Track Incoming Control Effects generated by the enemy against Squad Members
+Incoming_Control_Effects = {720: 'Blinded', 721: 'Crippled', 722: 'Chilled', 727: 'Immobile', 742: 'Weakness', 791: 'Fear', 833: 'Daze', 872: 'Stun', 26766: 'Slow', 27705: 'Taunt', 30778: "Hunter's Mark", 738: 'Vulnerability', 72941: 'Extirpation', 44633:'Disenchantment'}
+def track_incoming_control(item, buff_player):
+	skill_name = Incoming_Control_Effects[int(item['id'])]
+	if skill_name not in enemy_Control:
+		enemy_Control[skill_name] = {}
+	if skill_name not in enemy_Control_Player:
+		enemy_Control_Player[skill_name] = {}
+	for cc in item['buffData']:
+		if 'generated' in cc:
+			for key in cc['generated']:
+				value = cc['generated'][key]
+				if key not in enemy_Control_Player[skill_name]:
+					enemy_Control_Player[skill_name][key] = float((value/100)*buff_player.combat_time)
+				else:
+					enemy_Control_Player[skill_name][key] = enemy_Control_Player[skill_name][key] + float((value/100)*buff_player.combat_time)
+				if buff_player.name not in enemy_Control[skill_name]:
+					enemy_Control[skill_name][buff_player.name] = float((value/100)*buff_player.combat_time)
+				else:
+					enemy_Control[skill_name][buff_player.name] = enemy_Control[skill_name][buff_player.name] + float((value/100)*buff_player.combat_time)
+
+#Track Aura Output
+Auras_Id = {5677: 'Fire', 5577: 'Shocking', 5579: 'Frost', 5684: 'Magnetic', 25518: 'Light', 39978: 'Dark', 10332: 'Chaos'}
+def track_aura_output(item, buff_player):
+	skill_name = Auras_Id[int(item['id'])]
+	if skill_name not in auras_TableIn:
+		auras_TableIn[skill_name] = {}
+	if skill_name not in auras_TableOut:
+		auras_TableOut[skill_name] = {}
+	for cc in item['buffData']:
+		if 'generated' in cc:
+			for key in cc['generated']:
+				value = cc['generated'][key]
+				if buff_player.name not in auras_TableIn[skill_name]:
+					auras_TableIn[skill_name][buff_player.name] = float((value/100)*buff_player.combat_time)
+				else:
+					auras_TableIn[skill_name][buff_player.name] = auras_TableIn[skill_name][buff_player.name] + float((value/100)*buff_player.combat_time)
+				if key not in auras_TableOut[skill_name]:
+					auras_TableOut[skill_name][key] = float((value/100)*buff_player.combat_time)
+				else:
+					auras_TableOut[skill_name][key] = auras_TableOut[skill_name][key] + float((value/100)*buff_player.combat_time)
 
-	if stat == 'group':
-		if 'group' not in player_json:
-			return 0
-		return int(player_json['group'])
-	
-	if stat == 'time_active':
-		if 'activeTimes' not in player_json:
-			return 0
-		return round(int(player_json['activeTimes'][0])/1000)
-	
-	if stat == 'dmg_taken':
-		if 'defenses' not in player_json or 'damageTaken' not in player_json['defenses'][0] or 'damageBarrier' not in player_json['defenses'][0]:
-			return 0
-		return int(player_json['defenses'][0]['damageTaken'])
+#Track Total Buff Uptimes, of the buffs in uptime_Buff_Ids
+def track_buff_uptime(item, buff_player):
+	buff_name = uptime_Buff_Ids[int(item['id'])]
+	if buff_name == 'stability' or buff_name == 'might':
+		uptime_value = float(item['buffData'][0]['presence'])
+	else:
+		uptime_value = float(item['buffData'][0]['uptime'])
+	uptime_duration = float(buff_player.combat_time * (uptime_value/100))
+	if buff_name not in uptime_Table[buff_player.prof_name]:
+		uptime_Table[buff_player.prof_name][buff_name] = uptime_duration
+	else:
+		uptime_Table[buff_player.prof_name][buff_name] = uptime_Table[buff_player.prof_name][buff_name] + uptime_duration
+	if buff_name not in partyUptimes[buff_player.group]['buffs']:
+		partyUptimes[buff_player.group]['buffs'][buff_name] = uptime_duration
+	else:
+		partyUptimes[buff_player.group]['buffs'][buff_name] += uptime_duration
+	if buff_name not in squadUptimes['buffs']:
+		squadUptimes['buffs'][buff_name] = uptime_duration
+	else:
+		squadUptimes['buffs'][buff_name] += uptime_duration
 
-	if stat == 'barrierDamage':
-		if 'defenses' not in player_json or 'damageBarrier' not in player_json['defenses'][0]:
-			return 0
-		return int(player_json['defenses'][0]['damageBarrier'])
-		
-	if stat == 'deaths':
-		if 'defenses' not in player_json or 'deadCount' not in player_json['defenses'][0]:
-			return 0        
-		return int(player_json['defenses'][0]['deadCount'])
+#Track Condition Uptime
+condition_Ids = {736: 'Bleeding', 737: 'Burning',861: 'Confusion', 723: 'Poison', 19426: 'Torment', 720: 'Blinded', 721: 'Crippled', 722: 'Chilled', 727: 'Immobile', 742: 'Weakness', 791: 'Fear', 833: 'Daze', 872: 'Stun', 26766: 'Slow', 27705: 'Taunt', 738: 'Vulnerability'}
+def track_condition_uptime(item, buff_player):
+	conditionName = condition_Ids[int(item['id'])]
+	conditionUptime = item['buffData'][0]['uptime']
+	conditionPresence = item['buffData'][0]['presence']
 
-	if stat == 'downed':
-		if 'defenses' not in player_json or 'downCount' not in player_json['defenses'][0]:
-			return 0        
-		return int(player_json['defenses'][0]['downCount'])
+	if conditionPresence:
+		conditionDuration = round((conditionPresence/100) *buff_player.condition_fight_time, 1)
+	else:
+		conditionDuration = round((conditionUptime/100) *buff_player.condition_fight_time, 1)
 
-	if stat == 'hitsMissed':
-		if 'defenses' not in player_json or 'missedCount' not in player_json['defenses'][0]:
-			return 0        
-		return int(player_json['defenses'][0]['missedCount'])
+	if conditionName not in conditionData[buff_player.condition_name]:
+		conditionData[buff_player.condition_name][conditionName]=conditionDuration
+	else:
+		conditionData[buff_player.condition_name][conditionName]+=conditionDuration
 
-	if stat == 'interupted':
-		if 'defenses' not in player_json or 'interruptedCount' not in player_json['defenses'][0]:
-			return 0        
-		return int(player_json['defenses'][0]['interruptedCount'])
+	if conditionName not in conditionDataGroups[buff_player.group]:
+		conditionDataGroups[buff_player.group][conditionName]=conditionDuration
+	else:
+		conditionDataGroups[buff_player.group][conditionName]+=conditionDuration
 
-	if stat == 'dmg':
-		if 'targetDamageDist' not in player_json:
-			return 0
-		sumDamage = 0
-		for target in player_json['targetDamageDist']:
-			for skill in target[0]:
-				sumDamage += skill['totalDamage']
-			#sumDamage = sumDamage + int(target[0]['damage'])
-		return int(sumDamage)
-	#Add Shield Damage Tracking
-	if stat == 'shieldDmg':
+	if conditionName not in conditionDataSquad:
+		conditionDataSquad[conditionName]=conditionDuration
+	else:
+		conditionDataSquad[conditionName]+=conditionDuration
+
+#Track the times resistance and the non damaging conditions were up, for the time resistance negated each condition
+ResistanceBuff = [26980]
+NonDamagingConditions = {720: 'Blinded', 721: 'Crippled', 722: 'Chilled', 727: 'Immobile', 742: 'Weakness', 791: 'Fear', 26766: 'Slow', 27705: 'Taunt'}
+def track_resistance_states(item, buff_player):
+	ResistanceData[buff_player.condition_name]['ResistStates'] = get_on_off_intervals(item['states'])
+
+def track_non_damaging_condition_states(item, buff_player):
+	ResistanceData[buff_player.condition_name]['Condition'][NonDamagingConditions[int(item['id'])]] = get_on_off_intervals(item['states'])
+
+buff_uptime_dispatcher = BuffUptimeDispatcher()
+buff_uptime_dispatcher.register(Incoming_Control_Effects, track_incoming_control)
+buff_uptime_dispatcher.register(Auras_Id, track_aura_output)
+buff_uptime_dispatcher.register(uptime_Buff_Ids, track_buff_uptime)
+buff_uptime_dispatcher.register(condition_Ids, track_condition_uptime)
+buff_uptime_dispatcher.register(ResistanceBuff, track_resistance_states)
+buff_uptime_dispatcher.register(NonDamagingConditions, track_non_damaging_condition_states)
+
+# This class stores who an allied player of a fight is, see ActorIndex
+@dataclass
+class Actor:
+	name: str
+	profession: str
+	group: int
+	account: str
+	in_squad: bool
+
+# This class looks up the allied players of a fight by name, group or position in the players
+# list of the log, so the players list doesn't have to be scanned for each lookup.
+class ActorIndex:
+	def __init__(self, players_json):
+		self.actors = []             # Actor of each player, in the order of the players list
+		self.by_name = {}            # name -> Actor, the last player with that name if it is used more than once
+		self.indices_by_group = {}   # group -> indices of its players in the players list, in order
+		for index, player_json in enumerate(players_json):
+			actor = Actor(player_json['name'], player_json['profession'], player_json['group'], player_json['account'], not player_json['notInSquad'])
+			self.actors.append(actor)
+			self.by_name[actor.name] = actor
+			self.indices_by_group.setdefault(actor.group, []).append(index)
+
+	def get_name_prof(self, name):
+		"""Return name_{{profession}} of the player with that name, just the name if it isn't one of the players."""
+		actor = self.by_name.get(name)
+		if actor is None:
+			return name
+		return name+"_{{"+actor.profession+"}}"
+
+# This class stores what the parts of the parser look up from the same log, so it is read once per
+# log instead of once per player. fightStamp and fight_number identify the fight in the high scores.
+class FightContext:
+	def __init__(self, json_data, fightStamp=None, fight_number=None):
+		self.json_data = json_data
+		self.fightStamp = fightStamp
+		self.fight_number = fight_number
+		self.skill_map = json_data['skillMap']
+		self.buff_map = json_data['buffMap']
+
+	@cached_property
+	def players_running_healing_addon(self):
+		# names of the players whose log includes healing and barrier, the last Healing Stats extension counts
+		players_running_healing_addon = []
+		for extension in self.json_data.get('usedExtensions', []):
+			if extension['name'] == "Healing Stats":
+				players_running_healing_addon = extension['runningExtension']
+		return players_running_healing_addon
+
+	@cached_property
+	def actor_index(self):
+		return ActorIndex(self.json_data['players'])
+
+	@cached_property
+	def party_member_counts(self):
+		# group -> number of allied players in it
+		party_member_counts = {}
+		for player_data in self.json_data['players']:
+			group = player_data['group']
+			if group in party_member_counts:
+				party_member_counts[group] += 1
+			else:
+				party_member_counts[group] = 1
+		return party_member_counts
+
+	@cached_property
+	def relic_skills(self):
+		# name -> icon of each relic and sigil skill of the skillMap, in its order, the first icon wins for skills sharing a name
+		relic_skills = {}
+		for skill in self.skill_map.values():
+			if 'Relic' in skill['name'] or 'Sigil' in skill['name'] or "Nourys's" in skill['name']:
+				relic_skills.setdefault(skill['name'], skill['icon'])
+		return relic_skills
+
+	@cached_property
+	def link_data(self):
+		return get_fight_log_link_data(self.json_data, self.fightStamp, self.fight_number)
+
+	@cached_property
+	def high_score_link(self):
+		# link to the log as shown after the player in the high scores
+		return "[["+str(self.fightStamp)+"|"+str(self.link_data[7])+"]]"
+
+# Extractors of the stats that are read from the player json alone, by stat name, see get_stat_from_player_json.
+# Each one takes the player json and returns the value of its stat.
+def section_field_extractor(section, key, convert=int, missing=0, required_keys=()):
+	"""Extractor of player_json[section][0][key], missing if the player json doesn't have it or one of required_keys."""
+	def extract(player_json):
+		if section not in player_json or key not in player_json[section][0]:
+			return missing
+		for required_key in required_keys:
+			if required_key not in player_json[section][0]:
+				return missing
+		return convert(player_json[section][0][key])
+	return extract
+
+def target_damage_dist_extractor(key):
+	"""Extractor of the sum of key over all skills in targetDamageDist."""
+	def extract(player_json):
 		if 'targetDamageDist' not in player_json:
 			return 0
 		sumDamage = 0
 		for target in player_json['targetDamageDist']:
 			for skill in target[0]:
-				sumDamage += skill['shieldDamage']
+				sumDamage += skill[key]
 		return int(sumDamage)
-	
-	if stat == 'dmgAll':
-		if 'dpsAll' not in player_json:
-			return 0
-		return int(player_json['dpsAll'][0]['damage'])
-	
-	#Add Power and Condition Damage Tracking
-	if stat == 'Cdmg':
-		if 'dpsTargets' not in player_json:
-			return 0
-		sumDamage = 0
-		for target in player_json['dpsTargets']:
-			sumDamage = sumDamage + int(target[0]['condiDamage'])
-		return int(sumDamage)
-		#return int(player_json['dpsAll'][0]['condiDamage'])    
-	
-	if stat == 'Pdmg':
+	return extract
+
+def dps_targets_extractor(key):
+	"""Extractor of the sum of key over all dpsTargets."""
+	def extract(player_json):
 		if 'dpsTargets' not in player_json:
 			return 0
 		sumDamage = 0
 		for target in player_json['dpsTargets']:
-			sumDamage = sumDamage + int(target[0]['powerDamage'])
+			sumDamage = sumDamage + int(target[0][key])
 		return int(sumDamage)
-		#return int(player_json['dpsAll'][0]['powerDamage'])  
-
-	if stat == 'res':
-		if 'support' not in player_json or 'resurrects' not in player_json['support'][0]:
-			return 0
-		return int(player_json['support'][0]['resurrects'])
-
-	if stat == 'resOutTime':
-		if 'support' not in player_json or 'resurrectTime' not in player_json['support'][0]:
-			return 0
-		return int(player_json['support'][0]['resurrectTime'])
-	
-	if stat == 'rips':
-		if 'support' not in player_json or 'boonStrips' not in player_json['support'][0]:
-			return 0
-		return int(player_json['support'][0]['boonStrips'])
-
-	if stat == 'ripsOutTime':
-		if 'support' not in player_json or 'boonStripsTime' not in player_json['support'][0]:
-			return 0
-		return int(player_json['support'][0]['boonStripsTime'])
-		
-	if stat == 'cleanses':
-		if 'support' not in player_json or 'condiCleanse' not in player_json['support'][0]:
-			return 0
-		return int(player_json['support'][0]['condiCleanse'])
+	return extract
 
-	if stat == 'cleansesOutTime':
-		if 'support' not in player_json or 'condiCleanseTime' not in player_json['support'][0]:
-			return 0
-		return int(player_json['support'][0]['condiCleanseTime'])
-	
-	if stat == 'ripsIn':
-		if 'defenses' not in player_json or 'boonStrips' not in player_json['defenses'][0]:
-			return 0        
-		return int(player_json['defenses'][0]['boonStrips'])
-
-	if stat == 'ripsTime':
-		if 'defenses' not in player_json or 'boonStripsTime' not in player_json['defenses'][0]:
-			return 0        
-		return int(player_json['defenses'][0]['boonStripsTime'])
-
-	if stat == 'cleansesIn':
-		if 'defenses' not in player_json or 'conditionCleanses' not in player_json['defenses'][0]:
-			return 0        
-		return int(player_json['defenses'][0]['conditionCleanses'])				
-
-	if stat == 'cleansesTime':
-		if 'defenses' not in player_json or 'conditionCleansesTime' not in player_json['defenses'][0]:
-			return 0        
-		return int(player_json['defenses'][0]['conditionCleansesTime'])		
-
-	if stat == 'dodges':
-		if 'defenses' not in player_json or 'dodgeCount' not in player_json['defenses'][0]:
-			return 0        
-		return int(player_json['defenses'][0]['dodgeCount'])	
-
-	if stat == 'evades':
-		if 'defenses' not in player_json or 'evadedCount' not in player_json['defenses'][0]:
-			return 0        
-		return int(player_json['defenses'][0]['evadedCount'])
-
-	if stat == 'invulns':
-		if 'defenses' not in player_json or 'invulnedCount' not in player_json['defenses'][0]:
-			return 0        
-		return int(player_json['defenses'][0]['invulnedCount'])
-
-	if stat == 'blocks':
-		if 'defenses' not in player_json or 'blockedCount' not in player_json['defenses'][0]:
-			return 0        
-		return int(player_json['defenses'][0]['blockedCount'])		
-
-	if stat == 'dist':
-		if 'statsAll' not in player_json or 'distToCom' not in player_json['statsAll'][0]:
-			return -1
-		return float(player_json['statsAll'][0]['distToCom'])
-
-	if stat == 'swaps':
-		if 'statsAll' not in player_json or 'swapCount' not in player_json['statsAll'][0]:
-			return -1
-		return float(player_json['statsAll'][0]['swapCount'])
-
-	if stat == 'receivedCrowdControl':
-		if 'defenses' not in player_json or 'receivedCrowdControl' not in player_json['defenses'][0]:
-			return -1
-		return float(player_json['defenses'][0]['receivedCrowdControl'])
-
-	if stat == 'receivedCrowdControlDuration':
-		if 'defenses' not in player_json or 'receivedCrowdControlDuration' not in player_json['defenses'][0]:
-			return -1
-		return float(player_json['defenses'][0]['receivedCrowdControlDuration'])
-
-	if stat == 'appliedCrowdControl':
-		if 'statsAll' not in player_json or 'appliedCrowdControl' not in player_json['statsAll'][0]:
-			return -1
-		return float(player_json['statsAll'][0]['appliedCrowdControl'])
-
-	if stat == 'appliedCrowdControlDuration':
-		if 'statsAll' not in player_json or 'appliedCrowdControlDuration' not in player_json['statsAll'][0]:
-			return -1
-		return float(player_json['statsAll'][0]['appliedCrowdControlDuration'])
-			
-	if stat == 'stunBreak':
-		if 'support' not in player_json or 'stunBreak' not in player_json['support'][0]:
-			return 0
-		return int(player_json['support'][0]['stunBreak'])
-
-	if stat == 'removedStunDuration':
-		if 'support' not in player_json or 'removedStunDuration' not in player_json['support'][0]:
-			return 0
-		return int(player_json['support'][0]['removedStunDuration'])
-	
-	if stat == 'kills':
-		countKills = 0
+def stats_targets_extractor(key):
+	"""Extractor of the sum of key over all statsTargets."""
+	def extract(player_json):
+		total = 0
 		for target in player_json['statsTargets']:
-			countKills = countKills + int(target[0]['killed'])
-		return int(countKills)
+			total = total + int(target[0][key])
+		return int(total)
+	return extract
 
-	if stat == 'downs':
-		countDowns = 0
-		for target in player_json['statsTargets']:
-			countDowns = countDowns + int(target[0]['downed'])
-		return int(countDowns)
+def get_group_from_player_json(player_json):
+	if 'group' not in player_json:
+		return 0
+	return int(player_json['group'])
 
-	if stat == 'againstDownedDamage':
-		againstDownedDamage = 0
-		for target in player_json['statsTargets']:
-			againstDownedDamage = againstDownedDamage + int(target[0]['againstDownedDamage'])
-		return int(againstDownedDamage)		
+def get_time_active_from_player_json(player_json):
+	if 'activeTimes' not in player_json:
+		return 0
+	return round(int(player_json['activeTimes'][0])/1000)
 
-	if stat == 'againstDownedCount':
-		againstDownedCount = 0
-		for target in player_json['statsTargets']:
-			againstDownedCount = againstDownedCount + int(target[0]['againstDownedCount'])
-		return int(againstDownedCount)		
+def get_dmg_all_from_player_json(player_json):
+	if 'dpsAll' not in player_json:
+		return 0
+	return int(player_json['dpsAll'][0]['damage'])
+
+# The keys of statsTargets summed up by the stats_targets_extractor stats, see get_stats_from_player_json
+stats_targets_keys = {
+	'kills': 'killed',
+	'downs': 'downed',
+	'againstDownedDamage': 'againstDownedDamage',
+	'againstDownedCount': 'againstDownedCount',
+	'downContribution': 'downContribution',
+}
 
-	if stat == 'downContribution':
-		downContributionDamage = 0
-		for target in player_json['statsTargets']:
-			downContributionDamage = downContributionDamage + int(target[0]['downContribution'])
-		return int(downContributionDamage)
+stat_extractors = {
+	'time_in_combat': lambda player_json: get_player_context(player_json).time_in_combat,
+	'group': get_group_from_player_json,
+	'time_active': get_time_active_from_player_json,
+	'dmg_taken': section_field_extractor('defenses', 'damageTaken', required_keys=('damageBarrier',)),
+	'barrierDamage': section_field_extractor('defenses', 'damageBarrier'),
+	'deaths': section_field_extractor('defenses', 'deadCount'),
+	'downed': section_field_extractor('defenses', 'downCount'),
+	'hitsMissed': section_field_extractor('defenses', 'missedCount'),
+	'interupted': section_field_extractor('defenses', 'interruptedCount'),
+	'dmg': target_damage_dist_extractor('totalDamage'),
+	'shieldDmg': target_damage_dist_extractor('shieldDamage'),
+	'dmgAll': get_dmg_all_from_player_json,
+	'Cdmg': dps_targets_extractor('condiDamage'),
+	'Pdmg': dps_targets_extractor('powerDamage'),
+	'res': section_field_extractor('support', 'resurrects'),
+	'resOutTime': section_field_extractor('support', 'resurrectTime'),
+	'rips': section_field_extractor('support', 'boonStrips'),
+	'ripsOutTime': section_field_extractor('support', 'boonStripsTime'),
+	'cleanses': section_field_extractor('support', 'condiCleanse'),
+	'cleansesOutTime': section_field_extractor('support', 'condiCleanseTime'),
+	'ripsIn': section_field_extractor('defenses', 'boonStrips'),
+	'ripsTime': section_field_extractor('defenses', 'boonStripsTime'),
+	'cleansesIn': section_field_extractor('defenses', 'conditionCleanses'),
+	'cleansesTime': section_field_extractor('defenses', 'conditionCleansesTime'),
+	'dodges': section_field_extractor('defenses', 'dodgeCount'),
+	'evades': section_field_extractor('defenses', 'evadedCount'),
+	'invulns': section_field_extractor('defenses', 'invulnedCount'),
+	'blocks': section_field_extractor('defenses', 'blockedCount'),
+	'dist': section_field_extractor('statsAll', 'distToCom', float, -1),
+	'swaps': section_field_extractor('statsAll', 'swapCount', float, -1),
+	'receivedCrowdControl': section_field_extractor('defenses', 'receivedCrowdControl', float, -1),
+	'receivedCrowdControlDuration': section_field_extractor('defenses', 'receivedCrowdControlDuration', float, -1),
+	'appliedCrowdControl': section_field_extractor('statsAll', 'appliedCrowdControl', float, -1),
+	'appliedCrowdControlDuration': section_field_extractor('statsAll', 'appliedCrowdControlDuration', float, -1),
+	'stunBreak': section_field_extractor('support', 'stunBreak'),
+	'removedStunDuration': section_field_extractor('support', 'removedStunDuration'),
+}
+for stat, key in stats_targets_keys.items():
+	stat_extractors[stat] = stats_targets_extractor(key)
+
+# get value of stat from player_json
+def get_stat_from_player_json(player_json, players_running_healing_addon, stat, config, activeBuffs = False, buffGenType = BuffGenerationType.SQUAD):
+	extractor = stat_extractors.get(stat)
+	if extractor is not None:
+		return extractor(player_json)
 
 	### Buffs ###
 	if stat in config.buff_ids:
-		if buffGenType == BuffGenerationType.GROUP:
-			buffArrayName = 'groupBuffs' if not activeBuffs else 'groupBuffsActive'
-		elif buffGenType == BuffGenerationType.OFFGROUP:
-			buffArrayName = 'offGroupBuffs' if not activeBuffs else 'offGroupBuffsActive'
-		elif buffGenType == BuffGenerationType.SELF:
-			buffArrayName = 'selfBuffs' if not activeBuffs else 'selfBuffsActive'
-		else:
-			buffArrayName = 'squadBuffs' if not activeBuffs else 'squadBuffsActive'
-
-		if buffArrayName not in player_json:
+		buff_data = get_player_context(player_json).get_buff_data(buff_array_names[(buffGenType, bool(activeBuffs))])
+		if buff_data is None or config.buff_ids[stat] not in buff_data:
 			return 0
-		# get buffs in squad generation -> need to loop over all buffs
-		for buff in player_json[buffArrayName]:
-			if 'id' not in buff:
-				continue 
-			# find right buff
-			buffId = buff['id']
-			if buffId == int(config.buff_ids[stat]):
-				if 'generation' not in buff['buffData'][0]:
-					return 0
-				if stat == 'iol':
-					return 1
-				else:
-					return float(buff['buffData'][0]['generation'])
-		return 0
+		buff_data = buff_data[config.buff_ids[stat]]
+		if 'generation' not in buff_data:
+			return 0
+		if stat == 'iol':
+			return 1
+		return float(buff_data['generation'])
 
 	if stat == 'heal':
 		#if player_json['name'] in players_running_healing_addon and 'extHealingStats' in player_json and 'alliedHealing1S' in player_json['extHealingStats']:
@@ -3145,6 +3925,25 @@ def get_stat_from_player_json(player_json, players_running_healing_addon, stat,
 			return sum([barrier[0][-1] for barrier in player_json['extBarrierStats']['alliedBarrier1S']])
 		return -1
 
+# get the values of all stats from player_json, as get_stat_from_player_json with the squad buff generation
+# Output:
+# dictionary of the value of each stat
+def get_stats_from_player_json(player_json, players_running_healing_addon, stats, config):
+	stat_values = {}
+	# all sums over statsTargets are done in one pass
+	targets_stats = [stat for stat in stats if stat in stats_targets_keys]
+	if targets_stats:
+		sums = dict.fromkeys(targets_stats, 0)
+		for target in player_json['statsTargets']:
+			target_stats = target[0]
+			for stat in targets_stats:
+				sums[stat] += int(target_stats[stats_targets_keys[stat]])
+		stat_values.update(sums)
+	for stat in stats:
+		if stat not in stat_values:
+			stat_values[stat] = get_stat_from_player_json(player_json, players_running_healing_addon, stat, config)
+	return stat_values
+
 # DPS Stats block
 arrow_cart_skill_ids = [18850, 18853, 18855, 18860, 18862, 18865, 18867, 18869, 18872]
 trebuchet_skill_ids = [21037, 21038]
@@ -3162,70 +3961,10 @@ siege_skill_ids = [
 	*dragon_banner_skill_ids
 ]
 
-def moving_average(data, window_size):
-	num_elements = len(data)
-	ma = []
-	for n in range(num_elements):
-		min_tick = max(n - window_size, 0)
-		max_tick = min(n + window_size, num_elements - 1)
-		sub_data = data[min_tick:max_tick + 1]
-		ma.append(sum(sub_data) / len(sub_data))
-
-	return ma
-
-# States array is formatted: [start, stack_count]
-# Reformat as: [start, end, stack_count]
-def split_boon_states(states, duration):
-	split_states = []
-	num_states = len(states) - 1
-	for index, [start, stacks] in enumerate(states):
-		if index == num_states:
-			if start < duration:
-				split_states.append([start, duration, stacks])
-		else:
-			split_states.append([start, min(states[index + 1][0], duration), stacks])
-	return split_states
-
 # Take state array and combat breakpoints, filter down states to only include those when in combat
+# States array is formatted: [start, stack_count], the result as: [start, end, stack_count]
 def split_boon_states_by_combat_breakpoints(states, breakpoints, duration):
-	if not breakpoints:
-		return []
-
-	breakpoints_copy = breakpoints[:]
-	split_states = split_boon_states(states, duration)
-	new_states = []
-
-	while(len(breakpoints_copy) > 0 and len(split_states) > 0):
-		[combat_start, combat_end] = breakpoints_copy.pop(0)
-		[start_state, end_state, stacks] = split_states.pop(0)
-
-		while(end_state < combat_start):
-			if len(split_states) == 0:
-				break
-			[start_state, end_state, stacks] = split_states.pop(0)
-
-		if end_state < combat_start:
-			break
-
-		new_start = combat_start if combat_start > start_state else start_state
-		new_end = combat_end if combat_end < end_state else end_state
-		if new_end > new_start:
-			new_states.append([new_start, new_end, stacks])
-
-		while(len(split_states) > 0 and split_states[0][1] <= combat_end):
-			[start_state, end_state, stacks] = split_states.pop(0)
-
-			new_start = combat_start if combat_start > start_state else start_state
-			new_end = combat_end if combat_end < end_state else end_state
-
-			if new_end > new_start:
-				new_states.append([
-					combat_start if combat_start > start_state else start_state,
-					combat_end if combat_end < end_state else end_state,
-					stacks
-				])
-
-	return new_states
+	return intersect(split_states(states, duration), breakpoints)
 
 player_roles = {}
 player_combat_time = {}
@@ -3235,17 +3974,13 @@ def calculate_dps_stats(fight_json, fight, players_running_healing_addon, config
 
 	fight_ticks = len(fight_json['players'][0]["damage1S"][0])
 
+	# cumulative damage of each player on all enemy players
 	damagePS = {}
-	for index, target in enumerate(fight_json['targets']):
-		if 'enemyPlayer' in target and target['enemyPlayer'] == True:
-			for player in fight_json['players']:
-				player_prof_name  = "{{"+player['profession']+"}} "+player['name']		
-				if player_prof_name  not in damagePS:
-					damagePS[player_prof_name ] = [0] * fight_ticks
-
-				damage_on_target = player["targetDamage1S"][index][0]
-				for i in range(fight_ticks):
-					damagePS[player_prof_name ][i] += damage_on_target[i]
+	enemy_indices = [index for index, target in enumerate(fight_json['targets']) if 'enemyPlayer' in target and target['enemyPlayer'] == True]
+	if enemy_indices:
+		for player in fight_json['players']:
+			player_prof_name = "{{"+player['profession']+"}} "+player['name']
+			damagePS[player_prof_name] = sum_series([player["targetDamage1S"][index][0] for index in enemy_indices], fight_ticks)
 
 	#player_roles = {}
 	#player_combat_time = {}
@@ -3263,24 +3998,15 @@ def calculate_dps_stats(fight_json, fight, players_running_healing_addon, config
 			continue
 
 		player_combat_time[player_prof_name] = time_in_combat
-		player_roles[player_prof_name] = find_sub_type(player)
+		player_roles[player_prof_name] = get_player_context(player).sub_type
 
 		if 'dead' in player['combatReplayData'] and len(player['combatReplayData']['dead']) > 0 and (time_in_combat / fight.duration) < 0.4:
 			skip_fight[player_prof_name] = True
 		else:
 			skip_fight[player_prof_name] = False
 
-	squad_damage_per_tick = []
-	for fight_tick in range(fight_ticks - 1):
-		squad_damage_on_tick = 0
-		for player in fight_json['players']:
-			player_prof_name = "{{"+player['profession']+"}} "+player['name']
-			if skip_fight[player_prof_name]:
-				continue
-	
-			player_damage = damagePS[player_prof_name]
-			squad_damage_on_tick += player_damage[fight_tick + 1] - player_damage[fight_tick]
-		squad_damage_per_tick.append(squad_damage_on_tick)
+	squad_damage = sum_series([damagePS["{{"+player['profession']+"}} "+player['name']] for player in fight_json['players'] if not skip_fight["{{"+player['profession']+"}} "+player['name']]], fight_ticks)
+	squad_damage_per_tick = get_tick_differences(squad_damage) if squad_damage else [0] * (fight_ticks - 1)
 
 	squad_damage_total = sum(squad_damage_per_tick)
 	squad_damage_per_tick_ma = moving_average(squad_damage_per_tick, 1)
@@ -3343,106 +4069,57 @@ def calculate_dps_stats(fight_json, fight, players_running_healing_addon, config
 						UsedOffensiveSiege[player_prof_name] = True
 
 		# Coordination_Damage: Damage weighted by coordination with squad
-		player_damage_per_tick = [player_damage[0]]
-		for fight_tick in range(fight_ticks - 1):
-			player_damage_per_tick.append(player_damage[fight_tick + 1] - player_damage[fight_tick])
-
-		player_damage_ma = moving_average(player_damage_per_tick, 1)
-
-		for fight_tick in range(fight_ticks - 1):
-			player_damage_on_tick = player_damage_ma[fight_tick]
-			if player_damage_on_tick == 0:
-				continue
-
-			squad_damage_on_tick = squad_damage_per_tick_ma[fight_tick]
-			if squad_damage_on_tick == 0:
-				continue
-
-			squad_damage_percent = squad_damage_on_tick / squad_damage_ma_total
-
-			DPSStats[DPSStats_prof_name]["Coordination_Damage"] += player_damage_on_tick * squad_damage_percent * fight.duration
+		player_damage_ma = moving_average(get_per_tick(player_damage), 1)
+		DPSStats[DPSStats_prof_name]["Coordination_Damage"] = get_coordination_damage(player_damage_ma, squad_damage_per_tick_ma, squad_damage_ma_total, fight.duration, DPSStats[DPSStats_prof_name]["Coordination_Damage"])
 
 	# Chunk damage: Damage done within X seconds of target down
+	# Carrion damage: damage to downs that die
+	# The downs and deaths of each enemy are turned into ticks once, all players and chunk sizes use them
+	chunk_damage_seconds = range(1, CHUNK_DAMAGE_SECONDS)
+	squad_chunk_damage = [0] * CHUNK_DAMAGE_SECONDS
+	squad_carrion_damage = 0
 	for index, target in enumerate(fight_json['targets']):
-		if 'enemyPlayer' in target and target['enemyPlayer'] == True and 'combatReplayData' in target and len(target['combatReplayData']['down']):
-			for chunk_damage_seconds in range(1, CHUNK_DAMAGE_SECONDS):
-				targetDowns = dict(target['combatReplayData']['down'])
-				for targetDownsIndex, (downKey, downValue) in enumerate(targetDowns.items()):
-					downIndex = math.ceil(downKey / 1000)
-					startIndex = max(0, math.ceil(downKey / 1000) - chunk_damage_seconds)
-					if targetDownsIndex > 0:
-						lastDownKey, lastDownValue = list(targetDowns.items())[targetDownsIndex - 1]
-						lastDownIndex = math.ceil(lastDownKey / 1000)
-						if lastDownIndex == downIndex:
-							# Probably an ele in mist form
-							continue
-						startIndex = max(startIndex, lastDownIndex)
-
-					squad_damage_on_target = 0
-					for player in fight_json['players']:
-						player_prof_name = "{{"+player['profession']+"}} "+player['name']	
-						if skip_fight[player_prof_name]:
-							continue
-						
-						player_role = player_roles[player_prof_name]
-						DPSStats_prof_name = player_prof_name + " " + player_role
-
-						damage_on_target = player["targetDamage1S"][index][0]
-						player_damage = damage_on_target[downIndex] - damage_on_target[startIndex]
-
-						DPSStats[DPSStats_prof_name]["Chunk_Damage"][chunk_damage_seconds] += player_damage
-						squad_damage_on_target += player_damage
-
-						if chunk_damage_seconds == 5:
-							for i in range(startIndex, downIndex):
-								Ch5CaDamage1S[player_prof_name][i] += damage_on_target[i + 1] - damage_on_target[i]
-
-					for player in fight_json['players']:
-						player_prof_name = "{{"+player['profession']+"}} "+player['name']
-						if skip_fight[player_prof_name]:
-							continue
-
-						player_role = player_roles[player_prof_name]
-						DPSStats_prof_name = player_prof_name + " " + player_role
-
-						DPSStats[DPSStats_prof_name]["Chunk_Damage_Total"][chunk_damage_seconds] += squad_damage_on_target
-
-	# Carrion damage: damage to downs that die 
-	for index, target in enumerate(fight_json['targets']):
-		if 'enemyPlayer' in target and target['enemyPlayer'] == True and 'combatReplayData' in target and len(target['combatReplayData']['dead']):
-			targetDeaths = dict(target['combatReplayData']['dead'])
-			targetDowns = dict(target['combatReplayData']['down'])
-			for deathKey, deathValue in targetDeaths.items():
-				for downKey, downValue in targetDowns.items():
-					if deathKey == downValue:
-						dmgEnd = math.ceil(deathKey / 1000)
-						dmgStart = math.ceil(downKey / 1000)
+		if not ('enemyPlayer' in target and target['enemyPlayer'] == True and 'combatReplayData' in target):
+			continue
+		down_events = get_down_events(target['combatReplayData']['down'], target['combatReplayData']['dead'], chunk_damage_seconds)
+		if not down_events.down_ticks and not down_events.carrion_ticks:
+			continue
 
-						total_carrion_damage = 0
-						for player in fight_json['players']:
-							player_prof_name = "{{"+player['profession']+"}} "+player['name']
-							if skip_fight[player_prof_name]:
-								continue
-							
-							player_role = player_roles[player_prof_name]
-							DPSStats_prof_name = player_prof_name + " " + player_role
-							damage_on_target = player["targetDamage1S"][index][0]
-							carrion_damage = damage_on_target[dmgEnd] - damage_on_target[dmgStart]
+		for player in fight_json['players']:
+			player_prof_name = "{{"+player['profession']+"}} "+player['name']
+			if skip_fight[player_prof_name]:
+				continue
 
-							DPSStats[DPSStats_prof_name]["Carrion_Damage"] += carrion_damage
-							total_carrion_damage += carrion_damage
+			player_role = player_roles[player_prof_name]
+			DPSStats_prof_name = player_prof_name + " " + player_role
+			damage_on_target = player["targetDamage1S"][index][0]
+			damage_on_target_per_tick = get_tick_differences(damage_on_target)
+
+			chunk_damage = DPSStats[DPSStats_prof_name]["Chunk_Damage"]
+			for seconds in chunk_damage_seconds:
+				player_damage = get_window_damage(damage_on_target, down_events.chunk_start_ticks[seconds], down_events.down_ticks)
+				chunk_damage[seconds] += player_damage
+				squad_chunk_damage[seconds] += player_damage
+			for start_tick, down_tick in zip(down_events.chunk_start_ticks[5], down_events.down_ticks):
+				add_window_per_tick(Ch5CaDamage1S[player_prof_name], damage_on_target_per_tick, start_tick, down_tick)
+
+			for down_tick, death_tick in down_events.carrion_ticks:
+				carrion_damage = damage_on_target[death_tick] - damage_on_target[down_tick]
+				DPSStats[DPSStats_prof_name]["Carrion_Damage"] += carrion_damage
+				squad_carrion_damage += carrion_damage
+				add_window_per_tick(Ch5CaDamage1S[player_prof_name], damage_on_target_per_tick, down_tick, death_tick)
 
-							for i in range(dmgStart, dmgEnd):
-								Ch5CaDamage1S[player_prof_name][i] += damage_on_target[i + 1] - damage_on_target[i]
+	for player in fight_json['players']:
+		player_prof_name = "{{"+player['profession']+"}} "+player['name']
+		if skip_fight[player_prof_name]:
+			continue
 
-						for player in fight_json['players']:
-							player_prof_name = "{{"+player['profession']+"}} "+player['name']
-							if skip_fight[player_prof_name]:
-								continue
-							
-							player_role = player_roles[player_prof_name]
-							DPSStats_prof_name = player_prof_name + " " + player_role
-							DPSStats[DPSStats_prof_name]["Carrion_Damage_Total"] += total_carrion_damage
+		player_role = player_roles[player_prof_name]
+		DPSStats_prof_name = player_prof_name + " " + player_role
+		chunk_damage_total = DPSStats[DPSStats_prof_name]["Chunk_Damage_Total"]
+		for seconds in chunk_damage_seconds:
+			chunk_damage_total[seconds] += squad_chunk_damage[seconds]
+		DPSStats[DPSStats_prof_name]["Carrion_Damage_Total"] += squad_carrion_damage
 
 	# Burst damage: max damage done in n seconds
 	for player in fight_json['players']:
@@ -3453,11 +4130,9 @@ def calculate_dps_stats(fight_json, fight, players_running_healing_addon, config
 
 		player_role = player_roles[player_prof_name]
 		DPSStats_prof_name = player_prof_name + " " + player_role
-		player_damage = damagePS[player_prof_name]
-		for i in range(1, CHUNK_DAMAGE_SECONDS):
-			for fight_tick in range(i, fight_ticks):
-				dmg = player_damage[fight_tick] - player_damage[fight_tick - i]
-				DPSStats[DPSStats_prof_name]["Burst_Damage"][i] = max(dmg, DPSStats[DPSStats_prof_name]["Burst_Damage"][i])
+		burst_damage = DPSStats[DPSStats_prof_name]["Burst_Damage"]
+		for i, dmg in get_window_maxima(damagePS[player_prof_name], range(1, CHUNK_DAMAGE_SECONDS)).items():
+			burst_damage[i] = max(dmg, burst_damage[i])
 
 	# Ch5Ca Burst damage: max damage done in n seconds
 	for player in fight_json['players']:
@@ -3468,15 +4143,9 @@ def calculate_dps_stats(fight_json, fight, players_running_healing_addon, config
 
 		player_role = player_roles[player_prof_name]
 		DPSStats_prof_name = player_prof_name + " " + player_role
-		player_damage_ps = Ch5CaDamage1S[player_prof_name]
-		player_damage = [0] * len(player_damage_ps)
-		player_damage[0] = player_damage_ps[0]
-		for i in range(1, len(player_damage)):
-			player_damage[i] = player_damage[i - 1] + player_damage_ps[i]
-		for i in range(1, CHUNK_DAMAGE_SECONDS):
-			for fight_tick in range(i, fight_ticks):
-				dmg = player_damage[fight_tick] - player_damage[fight_tick - i]
-				DPSStats[DPSStats_prof_name]["Ch5Ca_Burst_Damage"][i] = max(dmg, DPSStats[DPSStats_prof_name]["Ch5Ca_Burst_Damage"][i])
+		burst_damage = DPSStats[DPSStats_prof_name]["Ch5Ca_Burst_Damage"]
+		for i, dmg in get_window_maxima(get_cumulative(Ch5CaDamage1S[player_prof_name]), range(1, CHUNK_DAMAGE_SECONDS)).items():
+			burst_damage[i] = max(dmg, burst_damage[i])
 	
 	# Track Stacking Buff Uptimes
 	damage_with_buff_buffs = ['stability', 'protection', 'aegis', 'might', 'fury', 'resistance', 'resolution', 'quickness', 'swiftness', 'alacrity', 'vigor', 'regeneration']
@@ -3501,74 +4170,29 @@ def calculate_dps_stats(fight_json, fight, players_running_healing_addon, config
 			for buff_name in damage_with_buff_buffs:
 				stacking_uptime_Table[DPSStats_prof_name]["damage_with_"+buff_name] = [0] * 26 if buff_name == 'might' else [0] * 2
 		  
-		player_damage = damagePS[player_prof_name]
-		player_damage_per_tick = [player_damage[0]]
-		for fight_tick in range(fight_ticks - 1):
-			player_damage_per_tick.append(player_damage[fight_tick + 1] - player_damage[fight_tick])
+		player_damage_per_tick = get_per_tick(damagePS[player_prof_name])
+		player_damage_prefix_sums = get_prefix_sums(player_damage_per_tick)
 
-		player_combat_breakpoints = get_combat_time_breakpoints(player)
+		player_context = get_player_context(player)
+		player_combat_breakpoints = player_context.combat_time_breakpoints
 
-		for item in player['buffUptimesActive']:
-			buffId = int(item['id'])	
-			if buffId not in uptime_Buff_Ids:
+		for buffId, buff_name in uptime_Buff_Ids.items():
+			if buffId not in player_context.buff_uptimes_by_id:
 				continue
 
-			buff_name = uptime_Buff_Ids[buffId]
+			item = player_context.buff_uptimes_by_id[buffId]
 			if buff_name in damage_with_buff_buffs:
 				states = split_boon_states_by_combat_breakpoints(item['states'], player_combat_breakpoints, fight.duration*1000)
 
-				total_time = 0
-				for idx, [state_start, state_end, stacks] in enumerate(states):
-					if buff_name in ['stability', 'might']:
+				if buff_name in ['stability', 'might']:
+					total_time = 0
+					for state_start, state_end, stacks in states:
 						uptime = state_end - state_start
 						total_time += uptime
 						stacking_uptime_Table[DPSStats_prof_name][buff_name][min(stacks, 25)] += uptime
-
-					if buff_name in damage_with_buff_buffs:
-						start_sec = state_start / 1000
-						end_sec = state_end / 1000
-
-						start_sec_int = int(start_sec)
-						start_sec_rem = start_sec - start_sec_int
-
-						end_sec_int = int(end_sec)
-						end_sec_rem = end_sec - end_sec_int
-
-						damage_with_stacks = 0
-						if start_sec_int == end_sec_int:
-							damage_with_stacks = player_damage_per_tick[start_sec_int] * (end_sec - start_sec)
-						else:
-							damage_with_stacks = player_damage_per_tick[start_sec_int] * (1.0 - start_sec_rem)
-							damage_with_stacks += sum(player_damage_per_tick[start_sec_int + s] for s in range(1, end_sec_int - start_sec_int))
-							damage_with_stacks += player_damage_per_tick[end_sec_int] * end_sec_rem
-
-						if idx == 0:
-							# Get any damage before we have boon states
-							damage_with_stacks += player_damage_per_tick[start_sec_int] * (start_sec_rem)
-							damage_with_stacks += sum(player_damage_per_tick[s] for s in range(0, start_sec_int))
-						if idx == len(states) - 1:
-							# leave this as if, not elif, since we can have 1 state which is both the first and last
-							# Get any damage after we have boon states
-							damage_with_stacks += player_damage_per_tick[end_sec_int] * (1.0 - end_sec_rem)
-							damage_with_stacks += sum(player_damage_per_tick[s] for s in range(end_sec_int + 1, len(player_damage_per_tick)))
-						elif len(states) > 1 and state_end != states[idx + 1][0]:
-							# Get any damage between deaths, this is usually a small amount of condis that are still ticking after death
-							next_state_start = states[idx + 1][0]
-							next_state_sec = next_state_start / 1000
-							next_start_sec_int = int(next_state_sec)
-							next_start_sec_rem = next_state_sec - next_start_sec_int
-
-							damage_with_stacks += player_damage_per_tick[end_sec_int] * (1.0 - end_sec_rem)
-							damage_with_stacks += sum(player_damage_per_tick[s] for s in range(end_sec_int + 1, next_start_sec_int))
-							damage_with_stacks += player_damage_per_tick[next_start_sec_int] * (next_start_sec_rem)
-
-						if buff_name == 'might':
-							stacking_uptime_Table[DPSStats_prof_name]["damage_with_"+buff_name][min(stacks, 25)] += damage_with_stacks
-						else:
-							stacking_uptime_Table[DPSStats_prof_name]["damage_with_"+buff_name][min(stacks, 1)] += damage_with_stacks
-
-				if buff_name in ['stability', 'might']:
 					stacking_uptime_Table[DPSStats_prof_name]["duration_"+buff_name] += total_time
+
+				add_damage_by_stacks(stacking_uptime_Table[DPSStats_prof_name]["damage_with_"+buff_name], states, player_damage_per_tick, player_damage_prefix_sums)
 					
 		if player_prof_name not in FB_Pages:
 			FB_Pages[player_prof_name] = {}
@@ -3597,12 +4221,53 @@ def calculate_dps_stats(fight_json, fight, players_running_healing_addon, config
  
 	return DPSStats
 
+
+# Why a fight with these values is skipped (an empty list if it is used), see init_fight. The same check
+# is done with the values of probe_log_header before a log is decoded, see decode_fight_log
+def get_skip_reasons(duration, num_allies, num_enemies, config):
+	skip_reasons = []
+	# skip fights that last less than min_fight_duration seconds
+	if(duration < config.min_fight_duration):
+		skip_reasons.append("\nFight only took "+str(duration)+"s. Skipping fight.")
+		
+	# skip fights with less than min_allied_players allies
+	if num_allies < config.min_allied_players:
+		skip_reasons.append("\nOnly "+str(num_allies)+" allied players involved. Skipping fight.")
+
+	# skip fights with less than min_enemy_players enemies
+	if num_enemies < config.min_enemy_players:
+		skip_reasons.append("\nOnly "+str(num_enemies)+" enemies involved. Skipping fight.")
+	return skip_reasons
+
+
+# Create the Fight of a log with the values that decide whether it is used, and check them against
+# min_fight_duration, min_allied_players and min_enemy_players. These come from the decoded log
+# or, before decoding, from probe_log_header.
+def init_fight(duration, num_allies, num_squad, num_enemies, start_time, end_time, config, log):
+	fight = Fight()
+	fight.duration = duration
+	fight.enemies = num_enemies
+	fight.allies = num_allies
+	fight.squad = num_squad
+	fight.notSquad = num_allies - num_squad
+	fight.start_time = start_time
+	fight.end_time = end_time
+	fight.total_stats = {key: 0 for key in config.stats_to_compute}
+
+	for print_string in get_skip_reasons(duration, num_allies, num_enemies, config):
+		fight.skipped = True
+		print_to_file(log, print_string)
+
+	return fight
+
+
 # get stats for this fight from fight_json
 # Input:
 # fight_json = json object including one fight
 # config = the config to use
 # log = log file to write to
-def get_stats_from_fight_json(fight_json, config, log):
+# fight_context = FightContext of fight_json, optional
+def get_stats_from_fight_json(fight_json, config, log, fight_context=None):
 	# get fight duration
 	#fight_duration_json = fight_json['duration']
 	#split_duration = fight_duration_json.split('m ', 1)
@@ -3614,6 +4279,9 @@ def get_stats_from_fight_json(fight_json, config, log):
 	#duration = mins*60 + secs
 	duration = round(fight_json['durationMS']/1000)
 
+	# combat times etc. are computed once per player of this fight
+	reset_player_contexts()
+
 	num_allies = len(fight_json['players'])
 	num_squad = 0
 	for player in fight_json['players']:
@@ -3621,6 +4289,19 @@ def get_stats_from_fight_json(fight_json, config, log):
 			num_squad += 1
 	num_NotSquad = num_allies - num_squad
 	num_enemies = 0
+	for enemy in fight_json['targets']:
+		if enemy['enemyPlayer'] == True:
+			num_enemies += 1
+
+	if fight_context is None:
+		fight_context = FightContext(fight_json)
+	players_running_healing_addon = fight_context.players_running_healing_addon
+
+	# skipped fights are left out before anything is collected from them
+	fight = init_fight(duration, num_allies, num_squad, num_enemies, fight_json['timeStartStd'], fight_json['timeEndStd'], config, log)
+	if fight.skipped:
+		return fight, players_running_healing_addon, squad_offensive, squad_Control, enemy_Control, enemy_Control_Player, downed_Healing, uptime_Table, stacking_uptime_Table, auras_TableIn, auras_TableOut, Death_OnTag, Attendance, DPS_List, CPS_List, SPS_List, HPS_List, DPSStats
+
 	num_enemies_Red = 0
 	num_enemies_Blue = 0
 	num_enemies_Green = 0
@@ -3648,7 +4329,7 @@ def get_stats_from_fight_json(fight_json, config, log):
 	teamID = {698: 'Red', 705: 'Red', 706: 'Red', 882: 'Red', 2520: 'Red', 2739: 'Green', 2741: 'Green', 2752: 'Green', 2763: 'Green', 432: 'Blue', 1277: 'Blue'}
 
 	#creat dictionary of skill_ids and skill_names
-	skills = fight_json['skillMap']
+	skills = fight_context.skill_map
 	for skill_id, skill in skills.items():
 		x_id=skill_id[1:]
 		if x_id not in skill_Dict:
@@ -3660,7 +4341,7 @@ def get_stats_from_fight_json(fight_json, config, log):
 			skill_Dict[x_id]['icon'] = skill['icon']
 
 
-	skillBuffs = fight_json['buffMap']
+	skillBuffs = fight_context.buff_map
 	for skill_id, skill in skillBuffs.items():
 		x_id=skill_id[1:]
 		if x_id not in skill_Dict:
@@ -3673,6 +4354,8 @@ def get_stats_from_fight_json(fight_json, config, log):
 
 	SiegeSkills = {14627: "Punch", 14639: "Whirling Assualt", 14709: "Rocket Punch", 14710: "Whirling Inferno", 14708: "Rocket Salvo"}
 
+	actorIndex = fight_context.actor_index
+
 	for player in fight_json['players']:
 		if player['notInSquad']:
 			continue
@@ -3691,8 +4374,6 @@ def get_stats_from_fight_json(fight_json, config, log):
 
 	for enemy in fight_json['targets']:
 		if enemy['enemyPlayer'] == True:
-			num_enemies += 1
-
 			#Validate EI version supports teamID
 			if 'teamID' in enemy:
 				enemy_team = int(enemy['teamID'])
@@ -3768,17 +4449,13 @@ def get_stats_from_fight_json(fight_json, config, log):
 				if skill_name not in squad_Control:
 					squad_Control[skill_name] = {}
 				for name in item['statesPerSource']:
-					key_Prof = name
+					key_Prof = actorIndex.get_name_prof(name)
 					buffTime = 0
 					buffOn = 0
 					firstTime = 0
 					conditionTime = 0
 					appliedCounts = 0
 
-					for player in fight_json['players']:
-						if player['name'] == name:
-							prof = player['profession']
-							key_Prof = name+"_{{"+prof+"}}"
 					for stateChange in item['statesPerSource'][name]:
 						if stateChange[0] == 0:
 							continue
@@ -3877,7 +4554,7 @@ def get_stats_from_fight_json(fight_json, config, log):
 			ResistanceData[conditionPlayerName]={}
 			ResistanceData[conditionPlayerName]['Condition']={}
 			ResistanceData[conditionPlayerName]['ResistOffset']={}
-			ResistanceData[conditionPlayerName]['ResistStates']={}
+			ResistanceData[conditionPlayerName]['ResistStates']=[]
 		if squadDps_group not in ResistanceData['Group']:
 			ResistanceData['Group'][squadDps_group]={}
 			ResistanceData['Group'][squadDps_group]['ResistOffset']={}
@@ -3941,14 +4618,13 @@ def get_stats_from_fight_json(fight_json, config, log):
 			squadDps_name = player['name']
 			squadDps_profession = player['profession']
 			squadDps_prof_name = "{{"+squadDps_profession+"}} "+squadDps_name			
+			#the casts are added to the damage of each skill once the fight is merged, see merge_fight_state
+			if squadDps_prof_name not in Player_Skill_Casts:
+				Player_Skill_Casts[squadDps_prof_name] = {}
 			for skill_cast in player['rotation']:
-				skill_id = skill_cast['id']
-				skill_name = skill_Dict[str(skill_id)]['name']
-				if skill_id == 72992:	#Adjust Spearmarshal's support damage ID for cast ID
-					skill_id = 74290
-				if skill_name in Player_Damage_by_Skill[squadDps_prof_name]['Skills'].keys():
-					skill_casts = len(skill_cast['skills'])
-					Player_Damage_by_Skill[squadDps_prof_name]['Skills'][skill_name][7]+=skill_casts
+				skill_id = str(skill_cast['id'])
+				skill_casts = len(skill_cast['skills'])
+				Player_Skill_Casts[squadDps_prof_name][skill_id] = Player_Skill_Casts[squadDps_prof_name].get(skill_id, 0) + skill_casts
 
 		#Collect Spike Damage for first 60 seconds of each fight
 		sec_dmg = 0
@@ -3960,18 +4636,10 @@ def get_stats_from_fight_json(fight_json, config, log):
 					squad_damage_output[fight_name][idx] = (damage-sec_dmg)
 			sec_dmg = damage
 
-		player_combat_time = sum_breakpoints(get_combat_time_breakpoints(player)) / 1000
+		player_combat_time = get_player_context(player).combat_time_ms / 1000
 
 		#Collect Outgoing Healing and Barrier by Target
 		if config.include_comp_and_review:
-			if 'usedExtensions' not in fight_json:
-				players_running_healing_addon = []
-			else:
-				extensions = fight_json['usedExtensions']
-				for extension in extensions:
-					if extension['name'] == "Healing Stats":
-						players_running_healing_addon = extension['runningExtension']
-
 			if player['name'] in players_running_healing_addon:
 				healerName = player['name']+"|"+player['profession']
 				healerGroup = player['group']
@@ -3993,8 +4661,8 @@ def get_stats_from_fight_json(fight_json, config, log):
 				if 'extHealingStats' in player:
 					for index, target in enumerate(player['extHealingStats']['outgoingHealingAllies']):
 						targetHealing = target[0]['healing']
-						targetName = fight_json['players'][index]['name']
-						targetGroup = fight_json['players'][index]['group']
+						targetName = actorIndex.actors[index].name
+						targetGroup = actorIndex.actors[index].group
 						if targetName not in OutgoingHealing[healerName]['Targets']:
 							OutgoingHealing[healerName]['Targets'][targetName] = {}
 							OutgoingHealing[healerName]['Targets'][targetName]['Group'] = {}
@@ -4024,8 +4692,8 @@ def get_stats_from_fight_json(fight_json, config, log):
 				if 'extBarrierStats' in player:
 					for index, target in enumerate(player['extBarrierStats']['outgoingBarrierAllies']):
 						targetBarrier = target[0]['barrier']
-						targetName = fight_json['players'][index]['name']
-						targetGroup = fight_json['players'][index]['group']
+						targetName = actorIndex.actors[index].name
+						targetGroup = actorIndex.actors[index].group
 						if targetName not in OutgoingHealing[healerName]['Targets']:
 							OutgoingHealing[healerName]['Targets'][targetName] = {}
 							OutgoingHealing[healerName]['Targets'][targetName]['Group'][targetGroup] = 1
@@ -4055,30 +4723,9 @@ def get_stats_from_fight_json(fight_json, config, log):
 						else:
 							MOA_Casters[squadDps_name]['attempts'] += len(item['skills'])
 
-		#Track Incoming Control Effects generated by the enemy against Squad Members
-		Control_Effects = {720: 'Blinded', 721: 'Crippled', 722: 'Chilled', 727: 'Immobile', 742: 'Weakness', 791: 'Fear', 833: 'Daze', 872: 'Stun', 26766: 'Slow', 27705: 'Taunt', 30778: "Hunter's Mark", 738: 'Vulnerability', 72941: 'Extirpation', 44633:'Disenchantment'}
-		#config.condition_ids = {720: 'Blinded', 721: 'Crippled', 722: 'Chilled', 727: 'Immobile', 742: 'Weakness', 791: 'Fear', 833: 'Daze', 872: 'Stun', 26766: 'Slow', 27705: 'Taunt', 30778: 'Hunters Mark'}
-		for item in player['buffUptimesActive']:
-			conditionId = int(item['id'])
-			if conditionId in Control_Effects:
-
-				skill_name = Control_Effects[conditionId]
-				if skill_name not in enemy_Control:
-					enemy_Control[skill_name] = {}
-				if skill_name not in enemy_Control_Player:
-					enemy_Control_Player[skill_name] = {}
-				for cc in item['buffData']:
-					if 'generated' in cc:
-						for key in cc['generated']:
-							value = cc['generated'][key]
-							if key not in enemy_Control_Player[skill_name]:
-								enemy_Control_Player[skill_name][key] = float((value/100)*player_combat_time)
-							else:
-								enemy_Control_Player[skill_name][key] = enemy_Control_Player[skill_name][key] + float((value/100)*player_combat_time)
-							if player['name'] not in enemy_Control[skill_name]:
-								enemy_Control[skill_name][player['name']] = float((value/100)*player_combat_time)
-							else:
-								enemy_Control[skill_name][player['name']] = enemy_Control[skill_name][player['name']] + float((value/100)*player_combat_time)
+		#Track Incoming Control Effects, Aura Output, Total Buff Uptimes, Condition Uptime and Resistance in one walk over buffUptimesActive
+		buff_player = BuffUptimePlayer(player['name'], squadDps_prof_name, squadDps_group, player_combat_time, conditionPlayerName, conditionFightTime)
+		buff_uptime_dispatcher.dispatch(get_player_context(player), buff_player)
 
 		#Track Offensive stats from [statsTarets]
 		statAll = ["totalDamageCount", "directDamageCount", "connectedDirectDamageCount", "connectedDamageCount", "critableDirectDamageCount", "criticalRate", "criticalDmg", "flankingRate", "againstMovingRate", "glanceRate", "missed", "evaded", "blocked", "interrupts", "invulned", "appliedCrowdControl", "appliedCrowdControlDuration"]
@@ -4169,138 +4816,18 @@ def get_stats_from_fight_json(fight_json, config, log):
 									downed_Healing[squadDps_prof_name][reviveSkill]['Hits'] += reviveSkill_hits
 		#End Instant Revive tracking
 									
-		#Track Aura Output		
-		Auras_Id = {5677: 'Fire', 5577: 'Shocking', 5579: 'Frost', 5684: 'Magnetic', 25518: 'Light', 39978: 'Dark', 10332: 'Chaos'}
-		for item in player['buffUptimesActive']:
-			auraId = int(item['id'])
-			if auraId in Auras_Id:
-				skill_name = Auras_Id[auraId]
-				if skill_name not in auras_TableIn:
-					auras_TableIn[skill_name] = {}
-				if skill_name not in auras_TableOut:
-					auras_TableOut[skill_name] = {}
-				#debug attempt
-				#print(player['name'], skill_name, auraId)				
-				for cc in item['buffData']:
-					if 'generated' in cc:
-						for key in cc['generated']:
-							value = cc['generated'][key]
-							if player['name'] not in auras_TableIn[skill_name]:
-								auras_TableIn[skill_name][player['name']] = float((value/100)*player_combat_time)
-							else:
-								auras_TableIn[skill_name][player['name']] = auras_TableIn[skill_name][player['name']] + float((value/100)*player_combat_time)
-							if key not in auras_TableOut[skill_name]:
-								auras_TableOut[skill_name][key] = float((value/100)*player_combat_time)
-							else:
-								auras_TableOut[skill_name][key] = auras_TableOut[skill_name][key] + float((value/100)*player_combat_time)
-
-		#Track Total Buff Uptimes
-		uptime_Buff_Ids = {1122: 'stability', 717: 'protection', 743: 'aegis', 740: 'might', 725: 'fury', 26980: 'resistance', 873: 'resolution', 1187: 'quickness', 719: 'swiftness', 30328: 'alacrity', 726: 'vigor', 718: 'regeneration'}
-		#uptime_Buff_Names = { 'stability': 1122,  'protection': 717,  'aegis': 743,  'might': 740,  'fury': 725,  'resistance': 26980,  'resolution': 873,  'quickness': 1187,  'swiftness': 719,  'alacrity': 30328,  'vigor': 726,  'regeneration': 718}
-		for item in player['buffUptimesActive']:
-			buffId = int(item['id'])	
-			if buffId not in uptime_Buff_Ids:
-				continue
-			buff_name = uptime_Buff_Ids[buffId]
-			if buff_name == 'stability' or buff_name == 'might':
-				uptime_value = float(item['buffData'][0]['presence'])
-			else:
-				uptime_value = float(item['buffData'][0]['uptime'])
-			uptime_duration = float(player_combat_time * (uptime_value/100))
-			if buff_name not in uptime_Table[squadDps_prof_name]:
-				uptime_Table[squadDps_prof_name][buff_name] = uptime_duration
-			else:
-				uptime_Table[squadDps_prof_name][buff_name] = uptime_Table[squadDps_prof_name][buff_name] + uptime_duration
-			if buff_name not in partyUptimes[squadDps_group]['buffs']:
-				partyUptimes[squadDps_group]['buffs'][buff_name] = uptime_duration
-			else:
-				partyUptimes[squadDps_group]['buffs'][buff_name] += uptime_duration
-			if buff_name not in squadUptimes['buffs']:
-				squadUptimes['buffs'][buff_name] = uptime_duration
-			else:
-				squadUptimes['buffs'][buff_name] += uptime_duration
+		#Total Buff Uptimes are relative to the time in combat
 		uptime_Table[squadDps_prof_name]['duration'] = uptime_Table[squadDps_prof_name]['duration'] + player_combat_time
 		partyUptimes[squadDps_group]['totalFightTime']+=player_combat_time
 		squadUptimes['FightTime'] += player_combat_time
 
-		#Track Condition Uptime
-		condition_ids = {736: 'Bleeding', 737: 'Burning',861: 'Confusion', 723: 'Poison', 19426: 'Torment', 720: 'Blinded', 721: 'Crippled', 722: 'Chilled', 727: 'Immobile', 742: 'Weakness', 791: 'Fear', 833: 'Daze', 872: 'Stun', 26766: 'Slow', 27705: 'Taunt', 738: 'Vulnerability'}
-		NonDamagingConditions = {720: 'Blinded', 721: 'Crippled', 722: 'Chilled', 727: 'Immobile', 742: 'Weakness', 791: 'Fear', 26766: 'Slow', 27705: 'Taunt'}
-		#conditionFightTime = round(player['activeTimes'][0]/1000, 1)
-		for item in player['buffUptimesActive']:
-			itemID = item['id']	
-			if itemID in condition_ids:
-				conditionName = condition_ids[itemID]
-				conditionUptime = item['buffData'][0]['uptime']
-				conditionPresence = item['buffData'][0]['presence']
-
-				if conditionPresence:
-					conditionDuration = round((conditionPresence/100) *conditionFightTime, 1)
-				else:
-					conditionDuration = round((conditionUptime/100) *conditionFightTime, 1)
-					
-				if conditionName not in conditionData[conditionPlayerName]:
-					conditionData[conditionPlayerName][conditionName]=conditionDuration
-				else:
-					conditionData[conditionPlayerName][conditionName]+=conditionDuration
-
-				if conditionName not in conditionDataGroups[squadDps_group]:
-					conditionDataGroups[squadDps_group][conditionName]=conditionDuration
-				else:
-					conditionDataGroups[squadDps_group][conditionName]+=conditionDuration
-					
-				if conditionName not in conditionDataSquad:
-					conditionDataSquad[conditionName]=conditionDuration
-				else:
-					conditionDataSquad[conditionName]+=conditionDuration
-
-			ResistanceBuff = [26980]
-			if itemID in ResistanceBuff:
-				#ResistanceUptime = itemID['buffData'][0]['uptime']
-				ResistanceStates = item['states']
-				resistStart = []
-				resistEnd = []
-				for x, y in ResistanceStates:
-					if x == 0 and y == 0:
-						continue
-					elif y == 1:
-						resistStart.append(x)
-					elif y == 0:
-						resistEnd.append(x)
-					resDict = dict(zip(resistStart, resistEnd))
-					ResistanceData[conditionPlayerName]['ResistStates'] = resDict
-			if itemID in NonDamagingConditions:
-				#conditionUptime = itemID['buffData'][0]['uptime']
-				conditionStates = item['states']
-				conditionStart = []
-				conditionEnd = []
-				for x, y in conditionStates:
-					if x == 0 and y == 0:
-						continue
-					elif y == 1:
-						conditionStart.append(x)
-					elif y == 0:
-						conditionEnd.append(x)
-					conditionDict = dict(zip(conditionStart, conditionEnd))
-					ResistanceData[conditionPlayerName]['Condition'][NonDamagingConditions[itemID]] = conditionDict
+		# time under each condition while resistance was up, in one pass over the condition and resistance intervals
 		for itemID in NonDamagingConditions:
 			conditionName = NonDamagingConditions[itemID]
 			if conditionName in ResistanceData[conditionPlayerName]['Condition']:
-				offset = 0
-				time_applied = 0
-				for value in ResistanceData[conditionPlayerName]['Condition'][conditionName]:
-					ConditionStart = value
-					ConditionEnd = ResistanceData[conditionPlayerName]['Condition'][conditionName][value]
-					time_applied += ConditionEnd - ConditionStart
-					for item in ResistanceData[conditionPlayerName]['ResistStates']:
-						ResStart = item
-						ResEnd = ResistanceData[conditionPlayerName]['ResistStates'][item]
-						if ResStart <= ConditionEnd <= ResEnd and ConditionStart >= ResStart:
-							offset += ConditionEnd - ConditionStart
-						elif ConditionEnd > ResEnd and ConditionStart >=ResStart and ConditionStart <= ResEnd:
-							offset += ResEnd - ConditionStart
-						elif ConditionEnd < ResEnd and ConditionEnd >= ResStart and ConditionStart < ResStart:
-							offset += ConditionEnd - ResStart
+				conditionIntervals = ResistanceData[conditionPlayerName]['Condition'][conditionName]
+				time_applied = measure(conditionIntervals)
+				offset = measure(intersect(conditionIntervals, ResistanceData[conditionPlayerName]['ResistStates']))
 				if time_applied:
 					ResistReduction = offset/1000
 					if conditionName not in ResistanceData[conditionPlayerName]['ResistOffset']:
@@ -4327,21 +4854,13 @@ def get_stats_from_fight_json(fight_json, config, log):
 
 		if player['notInSquad']:
 			continue
-		
-		if 'usedExtensions' not in fight_json:
-			players_running_healing_addon = []
-		else:
-			extensions = fight_json['usedExtensions']
-			for extension in extensions:
-				if extension['name'] == "Healing Stats":
-					players_running_healing_addon = extension['runningExtension']
 
 		time_in_combat = get_stat_from_player_json(player, players_running_healing_addon, 'time_in_combat', config)
 
 		if time_in_combat == 0:
 			continue
 
-		player_role = find_sub_type(player)
+		player_role = get_player_context(player).sub_type
 		player_prof_role = player_prof+" "+player_role
 
 		if Guild_Data:
@@ -4397,18 +4916,18 @@ def get_stats_from_fight_json(fight_json, config, log):
 		active_time = round(player['activeTimes'][0] / 1000, 2)
 
 		if profession in buffs_personal:
+			buff_uptimes = get_player_context(player).buff_uptimes_by_id
 			for buff in buffs_personal[profession]['buffList']:
-				for active_buff in player['buffUptimesActive']:
-					if active_buff['id'] == buff:
-						uptime = active_buff['buffData'][0]['uptime']
-						uptime_seconds = round((uptime * active_time) / 100, 2)
-
-						if name not in buffs_personal[profession]['player']:
-							buffs_personal[profession]['player'][name] = {buff: uptime_seconds}
-						elif buff not in buffs_personal[profession]['player'][name]:
-							buffs_personal[profession]['player'][name][buff] = uptime_seconds
-						else:
-							buffs_personal[profession]['player'][name][buff] += uptime_seconds
+				if buff in buff_uptimes:
+					uptime = buff_uptimes[buff]['buffData'][0]['uptime']
+					uptime_seconds = round((uptime * active_time) / 100, 2)
+
+					if name not in buffs_personal[profession]['player']:
+						buffs_personal[profession]['player'][name] = {buff: uptime_seconds}
+					elif buff not in buffs_personal[profession]['player'][name]:
+						buffs_personal[profession]['player'][name][buff] = uptime_seconds
+					else:
+						buffs_personal[profession]['player'][name][buff] += uptime_seconds
 
 
 		#track minions created by player
@@ -4459,11 +4978,12 @@ def get_stats_from_fight_json(fight_json, config, log):
 
 	if commanderFound:
 			commanderMissing = False
+	#distances to tag of each player are computed once from the replay positions
+	tagDistances = TagDistances(tagPositions, inchToPixel)
 
 	for id in fight_json['players']:
 		if id['notInSquad']:
 			continue	
-		playerDistances = []
 		playerDistToTag = id['statsAll'][0]['distToCom']
 		deathOnTag_name = id['name']
 		deathOnTag_profession = id['profession']
@@ -4482,48 +5002,26 @@ def get_stats_from_fight_json(fight_json, config, log):
 		if commanderMissing:
 			continue
 		if id['combatReplayData']['dead'] and id['combatReplayData']['down']:
-			#print(id['profession'], id['name'])
 			playerDeaths = dict(id['combatReplayData']['dead'])
 			playerDowns = dict(id['combatReplayData']['down'])
-			playerDistToTag = id['statsAll'][0]['distToCom']
+			playerPositions = id['combatReplayData']['positions']
+			#polls up to each death that count for the average distance to tag
+			playerDeadPolls = []
 			for deathKey, deathValue in playerDeaths.items():
 				if deathKey < 0: #Handle death on the field before main squad combat log starts
 					continue
-					#Death_OnTag[deathOnTag_prof_name]["Off_Tag"] = Death_OnTag[deathOnTag_prof_name]["Off_Tag"] + 1
 				for downKey, downValue in playerDowns.items():
 					if deathKey == downValue:
 						#process data for downKey
 						positionMark = int(downKey/pollingRate)
-						positionDown = id['combatReplayData']['positions'][positionMark]
-						x1 = positionDown[0]
-						y1 = positionDown[1]
-						x2 = tagPositions[positionMark][0]
-						y2 = tagPositions[positionMark][1]
-						deathDistance = math.sqrt((x1-x2)**2 + (y1-y2)**2)
-						#deathRange = deathDistance/0.01
-						deathRange = deathDistance/inchToPixel
+						deathRange = tagDistances.get_range(playerPositions, positionMark)
 						Death_OnTag[deathOnTag_prof_name]["Total"] = Death_OnTag[deathOnTag_prof_name]["Total"] + 1
 						if int(downKey) > int(dead_Tag_Mark) and dead_Tag:
 							Death_OnTag[deathOnTag_prof_name]["After_Tag_Death"] = Death_OnTag[deathOnTag_prof_name]["After_Tag_Death"] + 1
 							#Calc Avg distance through dead tag final mark
-							playerDeadPoll = int(dead_Tag_Mark/150)
-							playerPositions = id['combatReplayData']['positions']
-							for position,tagPosition in zip(playerPositions[:playerDeadPoll], tagPositions[:playerDeadPoll]):
-								deltaX = position[0] - tagPosition[0]
-								deltaY = position[1] - tagPosition[1]
-								playerDistances.append(math.sqrt(deltaX * deltaX + deltaY * deltaY))
-							#playerDistToTag = (sum(playerDistances) / len(playerDistances))/inchToPixel
-							#Death_OnTag[deathOnTag_prof_name]["distToTag"].append(playerDistToTag)
+							playerDeadPolls.append(int(dead_Tag_Mark/150))
 						else:
-							playerDeadPoll = positionMark
-							playerPositions = id['combatReplayData']['positions']
-							for position,tagPosition in zip(playerPositions[:playerDeadPoll], tagPositions[:playerDeadPoll]):
-								deltaX = position[0] - tagPosition[0]
-								deltaY = position[1] - tagPosition[1]
-								playerDistances.append(math.sqrt(deltaX * deltaX + deltaY * deltaY))
-						#Debug Msg: print(player_name, "Calculating PlayerDistToTag =========================================", playerDistances)
-						if playerDistances:
-							playerDistToTag = (sum(playerDistances) / len(playerDistances))/inchToPixel
+							playerDeadPolls.append(positionMark)
 
 						if deathRange <= On_Tag:
 							Death_OnTag[deathOnTag_prof_name]["On_Tag"] = Death_OnTag[deathOnTag_prof_name]["On_Tag"] + 1
@@ -4535,6 +5033,10 @@ def get_stats_from_fight_json(fight_json, config, log):
 						if deathRange > Run_Back:
 							Death_OnTag[deathOnTag_prof_name]["Run_Back"] = Death_OnTag[deathOnTag_prof_name]["Run_Back"] + 1
 
+			averageDistToTag = tagDistances.get_average_distance(playerPositions, playerDeadPolls)
+			if averageDistToTag is not None:
+				playerDistToTag = averageDistToTag
+
 		if playerDistToTag <= Run_Back:
 			Death_OnTag[deathOnTag_prof_name]["distToTag"].append(playerDistToTag)
 		
@@ -4558,7 +5060,7 @@ def get_stats_from_fight_json(fight_json, config, log):
 		playerHeals = 0						
 		name = player['name']
 		acct = player['account']
-		sub_type = player['profession'] + "_" + find_sub_type(player)
+		sub_type = player['profession'] + "_" + get_player_context(player).sub_type
 		prof = sub_type
 		prof_name = sub_type+"\n"+name
 		for target in player['dpsTargets']:
@@ -4660,10 +5162,7 @@ def get_stats_from_fight_json(fight_json, config, log):
 
 	
 
-	# initialize fight         
-	fight = Fight()
-	fight.duration = duration
-	fight.enemies = num_enemies
+	# fill in the rest of the fight
 	fight.enemies_Red = num_enemies_Red
 	fight.enemies_Blue = num_enemies_Blue
 	fight.enemies_Green = num_enemies_Green
@@ -4674,14 +5173,8 @@ def get_stats_from_fight_json(fight_json, config, log):
 	fight.squad_spike_dmg = squad_spike_dmg
 	fight.enemy_skill_dmg = enemy_skill_dmg
 	fight.squad_skill_dmg = squad_skill_dmg
-	fight.allies = num_allies
-	fight.squad = num_squad
-	fight.notSquad = num_NotSquad
 	fight.kills = num_kills
 	fight.downs = num_downs
-	fight.start_time = fight_json['timeStartStd']
-	fight.end_time = fight_json['timeEndStd']        
-	fight.total_stats = {key: 0 for key in config.stats_to_compute}
 
 	#Capture Tag Stats for fight
 	if current_Tag:
@@ -4697,32 +5190,6 @@ def get_stats_from_fight_json(fight_json, config, log):
 			Cmd_Tags[current_Tag]['Deaths'] += player_deaths
 			Cmd_Tags[current_Tag]['Downed'] += player_downed
 
-	# skip fights that last less than min_fight_duration seconds
-	if(duration < config.min_fight_duration):
-		fight.skipped = True
-		print_string = "\nFight only took "+str(duration)+"s. Skipping fight."
-		print_to_file(log, print_string)
-		
-	# skip fights with less than min_allied_players allies
-	if num_allies < config.min_allied_players:
-		fight.skipped = True
-		print_string = "\nOnly "+str(num_allies)+" allied players involved. Skipping fight."
-		print_to_file(log, print_string)
-
-	# skip fights with less than min_enemy_players enemies
-	if num_enemies < config.min_enemy_players:
-		fight.skipped = True
-		print_string = "\nOnly "+str(num_enemies)+" enemies involved. Skipping fight."
-		print_to_file(log, print_string)
-
-	if 'usedExtensions' not in fight_json:
-		players_running_healing_addon = []
-	else:
-		extensions = fight_json['usedExtensions']
-		for extension in extensions:
-			if extension['name'] == "Healing Stats":
-				players_running_healing_addon = extension['runningExtension']
-
 	calculate_dps_stats(fight_json, fight, players_running_healing_addon, config)
 		
 	return fight, players_running_healing_addon, squad_offensive, squad_Control, enemy_Control, enemy_Control_Player, downed_Healing, uptime_Table, stacking_uptime_Table, auras_TableIn, auras_TableOut, Death_OnTag, Attendance, DPS_List, CPS_List, SPS_List, HPS_List, DPSStats
@@ -4897,7 +5364,7 @@ def write_fights_overview_xls(fights, overall_squad_stats, overall_raid_stats, c
 		sheet1.write(i+1, 6, skipped_str)
 		sheet1.write(i+1, 7, fight.squad)
 		sheet1.write(i+1, 8, fight.enemies)
-		sheet1.write(i+1, 9, fight.kills)
+		sheet1.write(i+1, 9, "-" if fight.skipped else fight.kills)
 		for j,stat in enumerate(config.stats_to_compute):
 			sheet1.write(i+1, 10+j, fight.total_stats[stat])
 
@@ -4937,7 +5404,13 @@ def print_fights_overview(fights, overall_squad_stats, overall_raid_stats, confi
 			skipped_str = "yes" if fight.skipped else "no"
 			date = fight.start_time.split()[0]
 			end_time = fight.end_time.split()[1]        
-			print_string = "| "+str((i+1))+" | "+str(end_time)+" | "+str(fight.duration)+" | "+skipped_str+" | "+str(fight.squad)+" | <<tc src:'"+str(fight.notSquad)+"' color:'green'>> | "+str(fight.enemies)+" | "+str(fight.enemies_Red)+"/"+str(fight.enemies_Blue)+"/"+str(fight.enemies_Green)+" | "+str(fight.downs)+" | "+str(fight.kills)+" |"
+			# teams, downs and kills are not collected from skipped fights
+			if fight.skipped:
+				teams_str, downs_str, kills_str = "-", "-", "-"
+			else:
+				teams_str = str(fight.enemies_Red)+"/"+str(fight.enemies_Blue)+"/"+str(fight.enemies_Green)
+				downs_str, kills_str = str(fight.downs), str(fight.kills)
+			print_string = "| "+str((i+1))+" | "+str(end_time)+" | "+str(fight.duration)+" | "+skipped_str+" | "+str(fight.squad)+" | <<tc src:'"+str(fight.notSquad)+"' color:'green'>> | "+str(fight.enemies)+" | "+teams_str+" | "+downs_str+" | "+kills_str+" |"
 			for stat in overall_squad_stats:
 				if stat in general_overview_stats:
 					print_string += " "+my_value(round(fight.total_stats[stat]))+"|"
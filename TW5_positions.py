@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+#    TW5_positions.py computes on the combat replay positions of arcdps logs for the TW5 top stats scripts.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# EI writes the combat replay positions of a player as a list of [x, y] in pixels, one per poll
+# (combatReplayMetaData pollingRate ms). inchToPixel converts pixels to game units (inches).
+
+
+import math
+
+from TW5_damage_series import get_prefix_sums
+
+
+def get_distance_series(positions, other_positions):
+	"""Return the distance in pixels between positions and other_positions for each poll both have."""
+	return [math.sqrt(delta_x * delta_x + delta_y * delta_y) for delta_x, delta_y in ((position[0] - other[0], position[1] - other[1]) for position, other in zip(positions, other_positions))]
+
+
+# This class stores the distance of each player of a fight to the commander tag for every poll.
+# The distances of a player are computed once, on first use, and answer all questions about
+# that player, e.g. the range at each death and the average distance up to it.
+class TagDistances:
+	def __init__(self, tag_positions, inch_to_pixel):
+		self.tag_positions = tag_positions
+		self.inch_to_pixel = inch_to_pixel
+		self.distances = {}      # id of a player's positions list -> (distances, prefix sums of distances)
+
+	def get_distances(self, positions):
+		"""Return the distances in pixels of a player to the tag for each poll, and their prefix sums."""
+		key = id(positions)
+		if key not in self.distances:
+			distances = get_distance_series(positions, self.tag_positions)
+			self.distances[key] = (distances, get_prefix_sums(distances))
+		return self.distances[key]
+
+	def get_range(self, positions, poll):
+		"""Return the distance in inches of a player to the tag on poll."""
+		return self.get_distances(positions)[0][poll] / self.inch_to_pixel
+
+	def get_average_distance(self, positions, poll_counts):
+		"""
+		Return the average distance in inches of a player to the tag over the first polls of the fight,
+		once for each entry of poll_counts, or None if that covers no poll.
+		"""
+		distances, prefix_sums = self.get_distances(positions)
+		total_distance = 0
+		total_polls = 0
+		for poll_count in poll_counts:
+			# same polls as distances[:poll_count]
+			num_polls = len(range(len(distances))[:poll_count])
+			total_distance += prefix_sums[num_polls]
+			total_polls += num_polls
+		if not total_polls:
+			return None
+		return (total_distance / total_polls) / self.inch_to_pixel
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+#    TW5_watch_top_stats.py keeps the detailed top stats up to date while Elite Insights writes new logs.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from copy import copy, deepcopy
+import datetime
+import importlib
+import os
+import os.path
+import queue
+import sys
+import threading
+import time
+import traceback
+
+from TW5_log_loader import split_archive_path
+from TW5_parse_top_stats_detailed import create_argument_parser, set_output_filenames, write_top_stats
+from TW5_parse_top_stats_tools import AggregateState, add_log_files_to_aggregate, fill_config, find_log_files, finish_stat_data, get_aggregate_config_hash, getPlenBotLogs, load_aggregate_state, print_to_file, restore_aggregate_state, save_aggregate_state, snapshot_aggregate_state
+
+
+def get_settled_logs(input_directory, known_files, pending, settle_time):
+	"""
+	Return the new logs in input_directory that didn't change for settle_time seconds, in file order.
+
+	Logs in known_files are skipped. pending remembers the size and modification time of the other
+	logs between calls, so a log that is still being written by Elite Insights is picked up later.
+	"""
+	now = time.monotonic()
+	settled = []
+	for filename in find_log_files(input_directory):
+		if filename in known_files:
+			continue
+		try:
+			file_stat = os.stat(split_archive_path("".join((input_directory,"/",filename)))[0])
+		except OSError:
+			continue
+		signature = (file_stat.st_size, file_stat.st_mtime)
+		if filename not in pending or pending[filename][0] != signature:
+			pending[filename] = (signature, now)
+		elif now - pending[filename][1] >= settle_time:
+			settled.append(filename)
+			del pending[filename]
+	return settled
+
+
+def write_outputs(args, state, config, log):
+	"""
+	Write the .tid, .xls and .json top stats of all fights in the aggregate, stamped with the current time.
+
+	Computing the top stats modifies the aggregate, so it is restored from a snapshot afterwards.
+
+	Returns:
+		AggregateState: the restored aggregate, to add the next fights to.
+	"""
+	if state.used_fights == 0:
+		print("No fights to write yet")
+		return state
+
+	myDate = datetime.datetime.now()
+	output_args = copy(args)
+	set_output_filenames(output_args, myDate)
+	output_config = deepcopy(config)
+	snapshot = snapshot_aggregate_state(state)
+	try:
+		stat_data = finish_stat_data(output_args, state, output_config, log, args.anonymize)
+		write_top_stats(output_args, output_config, log, myDate, stat_data)
+		print_to_file(log, "Wrote "+output_args.output_filename+" with "+str(state.used_fights)+" fights")
+	except Exception:
+		traceback.print_exc()
+		print("WARNING: writing the top stats failed, the collected fights are kept")
+	log.flush()
+	return restore_aggregate_state(snapshot)
+
+
+def read_commands(commands):
+	"""Put each line typed on the console into commands, until the input is closed."""
+	for line in sys.stdin:
+		commands.put(line.strip().lower())
+
+
+if __name__ == '__main__':
+	parser = create_argument_parser('This watches a directory for arcdps reports as written by Elite Insights, adds each new fight to the top stats right away and writes the top stats on demand or on a timer.')
+	parser.add_argument('--poll_interval', dest="poll_interval", type=float, help="Seconds between two looks at the input directory for new logs.", default=5)
+	parser.add_argument('--settle_time', dest="settle_time", type=float, help="Seconds a new log has to stay unchanged before it is parsed, so logs that are still being written are left alone.", default=3)
+	parser.add_argument('--write_interval', dest="write_interval", type=float, help="Minutes between writing the top stats while new fights come in, 0 to only write them on demand.", default=0)
+	args = parser.parse_args()
+
+	if not os.path.isdir(args.input_directory):
+		print("Directory ",args.input_directory," is not a directory or does not exist!")
+		sys.exit()
+	if args.log_file is None:
+		args.log_file = args.input_directory+"/log_watch_"+datetime.datetime.now().strftime("%Y%m%d%H%M")+".txt"
+	log = open(args.log_file, "w")
+
+	parser_config = importlib.import_module("parser_configs."+args.config_file , package=None)
+	config = fill_config(parser_config)
+
+	print_string = "Watching input directory "+args.input_directory+", writing log to "+args.log_file
+	print(print_string)
+	print_string = "Considering fights with at least "+str(config.min_allied_players)+" allied players and at least "+str(config.min_enemy_players)+" enemies that took longer than "+str(config.min_fight_duration)+" s."
+	print_to_file(log, print_string)
+
+	# the aggregate of all fights so far stays in memory, with --state_file it also survives a restart
+	state = None
+	if args.state_file is not None:
+		state = load_aggregate_state(args.state_file, config)
+	if state is None:
+		state = AggregateState(config_hash=get_aggregate_config_hash(config))
+	else:
+		print("continuing "+args.state_file+" with "+str(len(state.fights))+" fights")
+
+	commands = queue.Queue()
+	threading.Thread(target=read_commands, args=(commands,), daemon=True).start()
+	print("Press Enter to write the top stats now, type q and Enter to quit after writing the fights added since.")
+
+	pending = {}
+	new_fights = 0
+	last_write_time = time.monotonic()
+	running = True
+	while running:
+		try:
+			command = commands.get(timeout=args.poll_interval)
+		except queue.Empty:
+			command = None
+		except KeyboardInterrupt:
+			command = 'q'
+
+		# fights are added in the order their logs settle, which is the order Elite Insights wrote them in
+		log_files = get_settled_logs(args.input_directory, set(state.fight_files), pending, args.settle_time)
+		if log_files:
+			if config.use_PlenBot:
+				getPlenBotLogs(config.PlenBotPath)
+			add_log_files_to_aggregate(args, state, log_files, config, log)
+			new_fights += len(log_files)
+			if args.state_file is not None:
+				save_aggregate_state(state, args.state_file)
+			log.flush()
+
+		if command == 'q':
+			running = False
+		write_due = args.write_interval > 0 and time.monotonic() - last_write_time >= args.write_interval * 60
+		if command == '' or (new_fights and (write_due or not running)):
+			state = write_outputs(args, state, config, log)
+			new_fights = 0
+			last_write_time = time.monotonic()
+
+	log.close()
@@ -0,0 +1,16 @@
+from TW5_damage_series import add_window_per_tick, get_window_maxima
+
+
+def test_add_window_per_tick_keeps_length():
+	per_tick_sum = [1, 1, 1, 1, 1]
+	add_window_per_tick(per_tick_sum, [10, 20, 30], 1, 5)
+	assert per_tick_sum == [1, 21, 31, 1, 1]
+	add_window_per_tick(per_tick_sum, [1, 1, 1, 1, 1, 1, 1], 3, 7)
+	assert per_tick_sum == [1, 21, 31, 2, 2]
+	add_window_per_tick(per_tick_sum, [5, 5], 4, 2)
+	assert per_tick_sum == [1, 21, 31, 2, 2]
+
+
+def test_window_maxima():
+	cumulative = [0, 5, 5, 20, 21, 30]
+	assert get_window_maxima(cumulative, range(1, 7)) == {1: 15, 2: 16, 3: 25, 4: 25, 5: 30}
@@ -0,0 +1,136 @@
+from copy import deepcopy
+
+import TW5_parse_top_stats_tools as tools
+
+PLAYER = "{{Guardian}} Tester"
+
+
+def add_skill(skill_id, name):
+	if skill_id not in tools.skill_Dict or (tools.skill_Dict[skill_id]['name'] == "UNKNOWN" and name != "UNKNOWN"):
+		tools.skill_Dict[skill_id] = {'name': name, 'icon': name+".png"}
+
+
+def add_damage(skill_id, damage, min_damage, max_damage):
+	skill_name = tools.skill_Dict[skill_id]['name'] if skill_id in tools.skill_Dict else 'Skill-'+skill_id
+	tools.total_Squad_Skill_Dmg[skill_name] = tools.total_Squad_Skill_Dmg.get(skill_name, 0) + damage
+	if PLAYER not in tools.Player_Damage_by_Skill:
+		tools.Player_Damage_by_Skill[PLAYER] = {'Name': "Tester", 'Prof': "Guardian", 'Total': 0, 'Skills': {}}
+	player_skills = tools.Player_Damage_by_Skill[PLAYER]['Skills']
+	if skill_name not in player_skills:
+		player_skills[skill_name] = [0, 0, 0, 0, 0, 0, 0, 0]
+	skill = player_skills[skill_name]
+	skill[0] += damage
+	if skill[1] == 0 or min_damage <= skill[1]:
+		skill[1] = min_damage
+	if skill[2] == 0 or max_damage >= skill[2]:
+		skill[2] = max_damage
+	skill[3] += 1
+	tools.Player_Damage_by_Skill[PLAYER]['Total'] += damage
+
+
+def add_casts(skill_id, casts, serial):
+	# a serial run added the casts right away, a fight extracted on its own leaves them to merge_fight_state
+	if serial:
+		skill_name = tools.skill_Dict[skill_id]['name']
+		if skill_name in tools.Player_Damage_by_Skill[PLAYER]['Skills']:
+			tools.Player_Damage_by_Skill[PLAYER]['Skills'][skill_name][7] += casts
+	else:
+		player_casts = tools.Player_Skill_Casts.setdefault(PLAYER, {})
+		player_casts[skill_id] = player_casts.get(skill_id, 0) + casts
+
+
+def add_dps_stats(role, damage, chunk_damage, burst_damage):
+	if PLAYER not in tools.DPSStats:
+		tools.DPSStats[PLAYER] = {'role': role, 'Damage_Total': 0, 'Chunk_Damage': [0, 0, 0], 'Burst_Damage': [0, 0, 0]}
+	stats = tools.DPSStats[PLAYER]
+	stats['Damage_Total'] += damage
+	for index, value in enumerate(chunk_damage):
+		stats['Chunk_Damage'][index] += value
+	for index, value in enumerate(burst_damage):
+		stats['Burst_Damage'][index] = max(stats['Burst_Damage'][index], value)
+
+
+def add_personal_buffs(buffs):
+	if "Guardian" not in tools.buffs_personal:
+		tools.buffs_personal["Guardian"] = {'buffList': [], 'player': {}}
+	for buff in buffs:
+		if buff not in tools.buffs_personal["Guardian"]['buffList']:
+			tools.buffs_personal["Guardian"]['buffList'].append(buff)
+
+
+def add_dps(dps):
+	tools.DPS_List['acct'].setdefault("tester.1234", []).append(dps)
+
+
+def first_fight(serial):
+	add_skill('100', "Deploy Arrow Cart")
+	add_skill('200', "UNKNOWN")
+	add_skill('300', "Old Name")
+	add_damage('100', 900, 150, 300)
+	add_damage('200', 50, 50, 50)
+	add_damage('300', 400, 100, 300)
+	add_casts('100', 6, serial)
+	add_dps_stats("Support", 1350, [100, 200, 300], [500, 700, 900])
+	add_personal_buffs([1, 2])
+	add_dps(12.5)
+
+
+def second_fight(serial):
+	# arrow cart is only cast, the other skills are known by another name or not at all in this log
+	add_skill('100', "Deploy Arrow Cart")
+	add_skill('200', "Sword of Justice")
+	add_skill('300', "New Name")
+	add_damage('200', 80, 40, 40)
+	add_damage('300', 200, 60, 140)
+	add_damage('400', 70, 70, 70)
+	add_casts('100', 4, serial)
+	add_casts('200', 2, serial)
+	add_casts('300', 3, serial)
+	add_dps_stats("Power", 350, [10, 20, 30], [800, 600, 1000])
+	add_personal_buffs([2, 3])
+	add_dps(7.25)
+
+
+def third_fight(serial):
+	add_skill('400', "Late Skill")
+	add_damage('400', 30, 30, 30)
+	add_casts('400', 1, serial)
+
+
+def run_fights(fights, serial):
+	"""Run fights against empty accumulators, either all together or each on its own merged with merge_fight_state."""
+	module_globals = vars(tools)
+	saved_state = {name: module_globals[name] for name in tools.fight_state_globals}
+	module_globals.update(deepcopy(tools.empty_fight_state))
+	try:
+		for fight in fights:
+			if serial:
+				fight(serial)
+				continue
+			totals = {name: module_globals[name] for name in tools.fight_state_globals}
+			module_globals.update(deepcopy(tools.empty_fight_state))
+			fight(serial)
+			fight_state = {name: module_globals[name] for name in tools.fight_state_globals}
+			module_globals.update(totals)
+			tools.merge_fight_state(fight_state)
+		return {name: deepcopy(module_globals[name]) for name in tools.fight_state_globals if name != 'Player_Skill_Casts'}
+	finally:
+		module_globals.update(saved_state)
+
+
+def test_merged_fights_match_serial_run():
+	fights = [first_fight, second_fight, third_fight]
+	serial = run_fights(fights, True)
+	merged = run_fights(fights, False)
+	assert merged == serial
+	# dict order decides the order of the output tables
+	assert repr(merged) == repr(serial)
+
+	skills = merged['Player_Damage_by_Skill'][PLAYER]['Skills']
+	assert list(skills) == ["Deploy Arrow Cart", "UNKNOWN", "Old Name", "Sword of Justice", "Skill-400", "Late Skill"]
+	assert skills["Deploy Arrow Cart"][7] == 10
+	assert skills["Old Name"] == [600, 60, 300, 2, 0, 0, 0, 3]
+	assert skills["Late Skill"][7] == 1
+	assert merged['DPSStats'][PLAYER] == {'role': "Support", 'Damage_Total': 1700, 'Chunk_Damage': [110, 220, 330], 'Burst_Damage': [800, 700, 1000]}
+	assert merged['buffs_personal']["Guardian"]['buffList'] == [1, 2, 3]
+	assert merged['DPS_List']['acct']["tester.1234"] == [12.5, 7.25]
@@ -0,0 +1,33 @@
+import io
+
+from parser_configs import TW5_parser_config_detailed
+import TW5_parse_top_stats_tools as tools
+
+
+def make_fight(duration, config, log):
+	return tools.init_fight(duration, 30, 25, 20, "2024-01-01 20:00:00 +01:00", "2024-01-01 20:05:00 +01:00", config, log)
+
+
+def test_overview_with_skipped_fight():
+	config = tools.fill_config(TW5_parser_config_detailed)
+	config.include_comp_and_review = True
+	log = io.StringIO()
+	used_fight = make_fight(config.min_fight_duration + 60, config, log)
+	used_fight.downs = 3
+	used_fight.kills = 2
+	skipped_fight = make_fight(config.min_fight_duration - 1, config, log)
+	assert not used_fight.skipped
+	assert skipped_fight.skipped
+
+	fights = [used_fight, skipped_fight]
+	overall_squad_stats = tools.get_overall_squad_stats(fights, config)
+	overall_raid_stats = tools.get_overall_raid_stats(fights)
+	output = io.StringIO()
+	tools.print_fights_overview(fights, overall_squad_stats, overall_raid_stats, config, output)
+
+	lines = output.getvalue().splitlines()
+	assert any(line.startswith("| 1 |") and " | no | " in line and " | 0/0/0 | 3 | 2 |" in line for line in lines)
+	assert any(line.startswith("| 2 |") and " | yes | " in line and " | - | - | - |" in line for line in lines)
+	assert overall_raid_stats['num_skipped_fights'] == 1
+	assert overall_raid_stats['total_downs'] == 3
+	assert overall_raid_stats['total_kills'] == 2
@@ -0,0 +1,33 @@
+from TW5_intervals import get_on_off_intervals, intersect, measure, split_states
+from TW5_parse_top_stats_tools import split_boon_states_by_combat_breakpoints
+
+
+def test_on_off_intervals_pair_each_off_with_the_open_on():
+	assert get_on_off_intervals([[0, 0], [1000, 1], [3000, 0], [5000, 1], [6000, 0]]) == [[1000, 3000], [5000, 6000]]
+	# a repeated on keeps the interval open, a repeated off doesn't close another one
+	states = [[0, 1], [1000, 1], [2000, 0], [2500, 0], [4000, 1], [4000, 0], [7000, 1]]
+	assert get_on_off_intervals(states) == [[0, 2000]]
+	resisted = intersect([[500, 3000], [3500, 8000]], get_on_off_intervals([[0, 1], [1000, 0], [2000, 1], [3000, 1], [4000, 0]]))
+	assert resisted == [[500, 1000], [2000, 3000], [3500, 4000]]
+
+
+def test_split_states_end_at_the_next_state_or_the_fight():
+	states = [[0, 0], [1000, 3], [4000, 1], [9000, 2], [10000, 5]]
+	assert split_states(states, 10000) == [[0, 1000, 0], [1000, 4000, 3], [4000, 9000, 1], [9000, 10000, 2]]
+	assert split_states([[0, 2]], 5000) == [[0, 5000, 2]]
+	assert split_states([], 5000) == []
+
+
+def test_intersect_cuts_intervals_by_each_period():
+	assert intersect([[0, 10, 'a'], [10, 20, 'b']], [[5, 12], [15, 30]]) == [[5, 10, 'a'], [10, 12, 'b'], [15, 20, 'b']]
+	assert intersect([[0, 5, 'a']], [[5, 10]]) == []
+	assert measure([[0, 1000], [2500, 4000]]) == 2500
+
+
+def test_stacking_uptime_counts_a_state_in_every_combat_period_it_spans():
+	# 0 stacks from the down at 3s across the death and rally up to 12s, in combat again from 8s
+	states = [[0, 10], [3000, 0], [12000, 25]]
+	breakpoints = [[1000, 5000], [8000, 15000]]
+	split = split_boon_states_by_combat_breakpoints(states, breakpoints, 15000)
+	assert split == [[1000, 3000, 10], [3000, 5000, 0], [8000, 12000, 0], [12000, 15000, 25]]
+	assert measure(split) == measure(breakpoints)
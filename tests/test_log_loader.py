@@ -0,0 +1,53 @@
+import gzip
+import io
+import json
+import os
+import tarfile
+
+import TW5_log_loader as loader
+
+
+def add_member(archive, name, data):
+	info = tarfile.TarInfo(name)
+	info.size = len(data)
+	archive.addfile(info, io.BytesIO(data))
+
+
+def test_compressed_tar_is_read_in_one_pass(tmp_path, monkeypatch, capsys):
+	with tarfile.open(str(tmp_path / "week.tar.gz"), 'w:gz') as archive:
+		for index in range(5):
+			add_member(archive, "fight_{}.json.gz".format(index), gzip.compress(json.dumps({'index': index}).encode()))
+	(tmp_path / "fight.zst").write_bytes(b"")
+	if '.zst' in loader.LOG_EXTENSIONS:
+		monkeypatch.setattr(loader, 'LOG_EXTENSIONS', [extension for extension in loader.LOG_EXTENSIONS if extension != '.zst'])
+
+	opened = []
+	open_tar = tarfile.open
+	monkeypatch.setattr(tarfile, 'open', lambda name, *args, **kwargs: opened.append(name) or open_tar(name, *args, **kwargs))
+	log_files = loader.find_log_files(str(tmp_path))
+	assert log_files == ["week.tar.gz/fight_{}.json.gz".format(index) for index in range(5)]
+	assert "pip3 install zstandard" in capsys.readouterr().out
+
+	file_paths = [os.path.join(str(tmp_path), log_file) for log_file in log_files]
+	for file_path in file_paths:
+		loader.get_uncompressed_size(file_path)
+	loaded = loader.prefetch_logs(file_paths, loader.load_log, lookahead=3)
+	assert [json_data for json_data, stats in loaded] == [{'index': index} for index in range(5)]
+	# one scan for the member index and one pass over the members, even with several prefetch threads
+	assert opened.count(str(tmp_path / "week.tar.gz")) == 2
+	assert loader.get_tar_reader(str(tmp_path / "week.tar.gz")).archive is None
+
+
+def test_header_only_reads_top_level_keys():
+	buffer = json.dumps({
+		'fightName': "durationMS",
+		'mechanics': [{'durationMS': 5, 'timeStartStd': "nested"}],
+		'durationMS': 90000,
+		'timeStartStd': "2024-01-01 20:00:00 +01:00",
+		'timeEndStd': "2024-01-01 20:01:30 +01:00",
+		'targets': [{'enemyPlayer': True}, {'enemyPlayer': False}],
+		'players': [{'notInSquad': False}, {'notInSquad': True}],
+	}).encode()
+	header = loader.probe_log_header(buffer)
+	assert header == loader.LogHeader(90000, "2024-01-01 20:00:00 +01:00", "2024-01-01 20:01:30 +01:00", 2, 1, 1)
+	assert loader.probe_log_header(json.dumps({'mechanics': [{'durationMS': 5}]}).encode()) is None